@@ -88,9 +88,16 @@ def super_pose_multiply_check(obj, other):
         assert (obj.length == other.length) \
                or (obj.length == 1 and other.length > 1) \
                or (obj.length > 1 and other.length == 1)
-    elif isinstance(other, np.matrix):
-        assert other.shape[1] == 1  # Should be vector
-        assert obj.shape[1] == other.shape[0]  # Inner Dimensions must match
+    else:
+        assert isinstance(other, np.ndarray)
+        assert other.ndim == 2  # Should be column vectors
+        # Inner Dimensions must match. SE poses also accept Euclidean points.
+        assert obj.dim[1] == other.shape[0] or (obj.isSE and obj.dim[1] - 1 == other.shape[0])
+
+
+def super_pose_compose_check(obj, other, outer):
+    assert type(obj) is type(other)
+    assert outer or obj.length == other.length or obj.length == 1 or other.length == 1
 
 
 def super_pose_divide_check(obj, other):
@@ -98,6 +105,18 @@ def super_pose_divide_check(obj, other):
     assert obj.length == other.length or obj.length == 1 or other.length == 1
 
 
+def transform_points_check(obj, points, out):
+    assert isinstance(points, np.ndarray) and points.ndim == 2 and points.shape[1] == 3
+    assert points.dtype == np.float32 or points.dtype == np.float64
+    if out is not None:
+        assert isinstance(out, np.ndarray) and (out.dtype == np.float32 or out.dtype == np.float64)
+        if obj.length == 1:
+            assert out.shape == points.shape
+        else:
+            assert out.shape == (obj.length,) + points.shape
+            assert not np.shares_memory(out, points)  # In place only possible for a single pose
+
+
 def super_pose_add_sub_check(obj, other):
     valid_pose(obj)
     valid_pose(other)
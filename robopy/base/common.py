@@ -2,9 +2,24 @@
 # 13 June, 2017
 
 """Common Module contains code shared by robotics and machine vision toolboxes"""
+import importlib
 import numpy as np
 from . import check_args
-import numpy.testing as npt
+
+
+def optional_import(module, extra):
+    """
+    Imports a module of an optional dependency, on first use of the functionality needing it.
+    :param module: name of the module, e.g. 'vtk'
+    :param extra: name of the robopy extra installing it, e.g. 'graphics'
+    :return: the module
+    :raises ImportError: with installation instructions if the module is missing
+    """
+    try:
+        return importlib.import_module(module)
+    except ImportError as error:
+        raise ImportError("%s is required for this functionality, but it is not installed. "
+                          "Install it with: pip install robopy[%s]" % (module.split('.')[0], extra)) from error
 
 
 def ishomog(tr, dim, rtest=''):
@@ -65,7 +80,7 @@ def isrot(rot, dtest=False):
             try:
                 assert type(each) is np.matrix
                 assert each.shape == (3, 3)
-                npt.assert_almost_equal(np.linalg.det(each), 1)
+                assert abs(np.linalg.det(each) - 1) < 1.5e-7
             except AssertionError:
                 return False
     return True
@@ -79,7 +94,7 @@ def isrot2(rot, dtest=False):
             try:
                 assert type(each) is np.matrix
                 assert each.shape == (2, 2)
-                npt.assert_almost_equal(np.linalg.det(each), 1)
+                assert abs(np.linalg.det(each) - 1) < 1.5e-7
             except AssertionError:
                 return False
     return True
@@ -1,20 +1,254 @@
 # Created by: Aditya Dua
 # 18 August 2017
-import pkg_resources
-import vtk
 import math
+import os
+from collections import OrderedDict
 import numpy as np
+from .common import optional_import
+
+vtk = optional_import('vtk', 'graphics')
+
+
+def media_path(*parts):
+    """
+    Returns the path of a file shipped in the robopy media directory.
+    :param parts: path components below media, e.g. 'puma_560', 'link0.stl'
+    :return: str
+    """
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'media', *parts)
+
+
+# Process-wide cache of loaded meshes, shared between all actors, pipelines and SerialLink objects.
+# Keyed by absolute file path, least recently used meshes are evicted beyond MESH_CACHE_SIZE.
+MESH_CACHE_SIZE = 64
+_mesh_cache = OrderedDict()
+
+# Levels of detail of meshes, as the fraction of triangles removed by decimation. Level 0 is full resolution.
+LOD_REDUCTIONS = (0.0, 0.75, 0.95)
+# Named quality settings of SerialLink plot, animate and render_frames, as levels of detail.
+LOD_QUALITY = {'high': 0, 'medium': 1, 'low': 2}
+# Triangles allowed per square pixel of the apparent size of a mesh, the most detailed level within it is shown.
+LOD_TRIANGLES_PER_PIXEL = 1.0
+
+
+def load_mesh(path):
+    """
+    Returns the mesh of an STL file as vtkPolyData from the process-wide mesh cache, loading it on first use.
+    If a precompiled mesh (see compile_mesh) with the same name and a .npz extension is present and not
+    older than the STL file, it is loaded instead as it is faster to read.
+    The returned vtkPolyData is shared, it must not be modified.
+    :param path: path of an .stl or .npz mesh file
+    :return: vtkPolyData
+    """
+    key = os.path.abspath(path)
+    if key in _mesh_cache:
+        _mesh_cache.move_to_end(key)
+        return _mesh_cache[key]
+
+    compiled = os.path.splitext(key)[0] + '.npz'
+    if key.endswith('.npz') or (os.path.exists(compiled) and os.path.getmtime(compiled) >= os.path.getmtime(key)):
+        polydata = _read_compiled_mesh(compiled)
+    else:
+        reader = vtk.vtkSTLReader()
+        reader.SetFileName(key)
+        reader.Update()
+        polydata = vtk.vtkPolyData()
+        polydata.ShallowCopy(reader.GetOutput())
+
+    return _cache_mesh(key, polydata)
+
+
+def load_mesh_lod(path, level):
+    """
+    Returns a level of detail of the mesh of an STL file, decimated with vtkQuadricDecimation to remove
+    the fraction LOD_REDUCTIONS[level] of its triangles. Each level is decimated once and kept in the
+    process-wide mesh cache alongside the full-resolution mesh, which is level 0.
+    The returned vtkPolyData is shared, it must not be modified.
+    :param path: path of an .stl or .npz mesh file
+    :param level: level of detail, an index into LOD_REDUCTIONS
+    :return: vtkPolyData
+    """
+    if level == 0:
+        return load_mesh(path)
+    key = (os.path.abspath(path), level)
+    if key in _mesh_cache:
+        _mesh_cache.move_to_end(key)
+        return _mesh_cache[key]
+
+    mesh = load_mesh(path)
+    if mesh.GetNumberOfCells() == 0:
+        return mesh
+    decimate = vtk.vtkQuadricDecimation()
+    decimate.SetInputData(mesh)
+    decimate.SetTargetReduction(LOD_REDUCTIONS[level])
+    decimate.Update()
+    polydata = vtk.vtkPolyData()
+    polydata.ShallowCopy(decimate.GetOutput())
+    return _cache_mesh(key, polydata)
+
+
+def _cache_mesh(key, polydata):
+    """
+    Internal function to add a mesh to the process-wide mesh cache, evicting the least recently used meshes.
+    """
+    _mesh_cache[key] = polydata
+    while len(_mesh_cache) > MESH_CACHE_SIZE:
+        _mesh_cache.popitem(last=False)
+    return polydata
+
+
+def clear_mesh_cache():
+    """
+    Empties the process-wide mesh cache.
+    :return: null
+    """
+    _mesh_cache.clear()
+
+
+def lod_level(quality):
+    """
+    Returns the level of detail of a quality setting.
+    :param quality: 'high', 'medium', 'low' or a level of detail, an index into LOD_REDUCTIONS
+    :return: int
+    """
+    if quality in LOD_QUALITY:
+        return LOD_QUALITY[quality]
+    assert type(quality) is int and 0 <= quality < len(LOD_REDUCTIONS), \
+        "quality must be 'high', 'medium', 'low' or a level of detail"
+    return quality
+
+
+class LodSelector:
+    """
+    Switches the meshes of actors between levels of detail by their apparent size in pixels,
+    each time before the renderer draws. Distant actors thus keep few triangles per pixel they cover.
+    """
+    def __init__(self, ren):
+        self.ren = ren
+        self.actors = []
+        self.mappers = []
+        self.paths = []
+        self.cells = []
+        self.levels = []
+        ren.AddObserver('StartEvent', self.update)
+
+    def add(self, actor, mapper, path, level=0):
+        """
+        Selects the level of detail of an actor, whose mapper shows the mesh at path.
+        :param actor: vtkActor
+        :param mapper: vtkPolyDataMapper of the actor
+        :param path: path of the full-resolution mesh
+        :param level: level of detail currently shown by the mapper
+        :return: null
+        """
+        self.actors.append(actor)
+        self.mappers.append(mapper)
+        self.paths.append(path)
+        self.cells.append(load_mesh(path).GetNumberOfCells())
+        self.levels.append(level)
+
+    def level(self, i):
+        """
+        Returns the level of detail for the i-th actor, from the size of its bounding box diagonal in pixels.
+        :param i: index of the actor
+        :return: int
+        """
+        actor = self.actors[i]
+        camera = self.ren.GetActiveCamera()
+        x0, x1, y0, y1, z0, z1 = actor.GetBounds()
+        size = math.sqrt((x1 - x0) ** 2 + (y1 - y0) ** 2 + (z1 - z0) ** 2)
+        if camera.GetParallelProjection():
+            view = 2 * camera.GetParallelScale()
+        else:
+            distance = np.linalg.norm(np.subtract(actor.GetCenter(), camera.GetPosition()))
+            view = 2 * distance * math.tan(math.radians(camera.GetViewAngle()) / 2)
+        if view <= 0:
+            return 0
+        budget = LOD_TRIANGLES_PER_PIXEL * (size / view * self.ren.GetSize()[1]) ** 2
+        for level, reduction in enumerate(LOD_REDUCTIONS):
+            if self.cells[i] * (1 - reduction) <= budget:
+                return level
+        return len(LOD_REDUCTIONS) - 1
+
+    def update(self, obj=None, event=None):
+        """
+        Observer of the renderer StartEvent, swaps in the level of detail of each actor.
+        :return: null
+        """
+        for i in range(len(self.actors)):
+            level = self.level(i)
+            if level != self.levels[i]:
+                self.mappers[i].SetInputData(load_mesh_lod(self.paths[i], level))
+                self.levels[i] = level
+
+
+def compile_mesh(path, out=None):
+    """
+    Precompiles an STL file into a binary .npz mesh of float32 points and triangle indices,
+    which load_mesh reads much faster than STL.
+    :param path: path of the STL file
+    :param out: path of the .npz file, next to the STL file if None
+    :return: path of the .npz file
+    """
+    from vtk.util import numpy_support
+    if out is None:
+        out = os.path.splitext(path)[0] + '.npz'
+    reader = vtk.vtkSTLReader()
+    reader.SetFileName(path)
+    reader.Update()
+    polydata = reader.GetOutput()
+    polys = polydata.GetPolys()
+    assert polys.IsHomogeneous() == 3, "Only triangle meshes can be compiled"
+    np.savez(out,
+             points=numpy_support.vtk_to_numpy(polydata.GetPoints().GetData()).astype(np.float32),
+             triangles=numpy_support.vtk_to_numpy(polys.GetConnectivityArray()).reshape(-1, 3).astype(np.int32))
+    return out
+
+
+def _read_compiled_mesh(path):
+    """
+    Internal function to build vtkPolyData from a .npz mesh written by compile_mesh.
+    """
+    from vtk.util import numpy_support
+    with np.load(path) as data:
+        points = np.ascontiguousarray(data['points'], dtype=np.float32)
+        triangles = np.ascontiguousarray(data['triangles'], dtype=np.int64).ravel()
+    vtk_points = vtk.vtkPoints()
+    vtk_points.SetData(numpy_support.numpy_to_vtk(points, deep=True))
+    cells = vtk.vtkCellArray()
+    offsets = np.arange(0, triangles.shape[0] + 1, 3, dtype=np.int64)
+    cells.SetData(numpy_support.numpy_to_vtkIdTypeArray(offsets, deep=True),
+                  numpy_support.numpy_to_vtkIdTypeArray(triangles, deep=True))
+    polydata = vtk.vtkPolyData()
+    polydata.SetPoints(vtk_points)
+    polydata.SetPolys(cells)
+    return polydata
 
 
 class VtkPipeline:
-    def __init__(self, background=(0.15, 0.15, 0.15), total_time_steps=None, timer_rate=60, gif_file=None):
+    def __init__(self, background=(0.15, 0.15, 0.15), total_time_steps=None, timer_rate=60, gif_file=None,
+                 offscreen=False, size=None):
+        """
+        :param offscreen: render without a window or interactor, e.g. on servers without a display.
+        Frames are then obtained with capture.
+        :param size: (width, height) of the render window in pixels
+        """
         self.ren = vtk.vtkRenderer()
         self.ren.SetBackground(background[0], background[1], background[2])
         self.ren_win = vtk.vtkRenderWindow()
+        self.offscreen = offscreen
+        if offscreen:
+            self.ren_win.SetOffScreenRendering(1)
+        if size is not None:
+            self.ren_win.SetSize(size[0], size[1])
         self.ren_win.AddRenderer(self.ren)
-        self.iren = vtk.vtkRenderWindowInteractor()
-        self.iren.SetRenderWindow(self.ren_win)
-        self.iren.SetInteractorStyle(vtk.vtkInteractorStyleTrackballCamera())
+        if offscreen:
+            self.iren = None
+        else:
+            self.iren = vtk.vtkRenderWindowInteractor()
+            self.iren.SetRenderWindow(self.ren_win)
+            self.iren.SetInteractorStyle(vtk.vtkInteractorStyleTrackballCamera())
+        self.capture_filter = None
         self.actor_list = []
         self.mapper_list = []
         self.source_list = []
@@ -40,7 +274,7 @@ class VtkPipeline:
             self.ren.AddActor(each)
         self.ren.ResetCamera()
         self.ren_win.Render()
-        if ui:
+        if ui and not self.offscreen:
             self.iren.Initialize()
             self.iren.Start()
 
@@ -73,25 +307,40 @@ class VtkPipeline:
         writer.SetInputData(w2if.GetOutput())
         writer.Write()
 
+    def capture(self):
+        """
+        Renders the scene and returns it as an image, straight from memory without writing to disk.
+        :return: (height, width, 3) uint8 ndarray, first row at the top
+        """
+        from vtk.util import numpy_support
+        if self.capture_filter is None:
+            self.capture_filter = vtk.vtkWindowToImageFilter()
+            self.capture_filter.SetInput(self.ren_win)
+            self.capture_filter.SetInputBufferTypeToRGB()
+            self.capture_filter.ReadFrontBufferOff()
+        self.ren_win.Render()
+        self.capture_filter.Modified()
+        self.capture_filter.Update()
+        image = self.capture_filter.GetOutput()
+        width, height, _ = image.GetDimensions()
+        frame = numpy_support.vtk_to_numpy(image.GetPointData().GetScalars()).reshape(height, width, -1)
+        # vtk images start with the bottom row
+        return frame[::-1].copy()
+
     def timer_tick(self):
-        import imageio
         self.timer_count += 1
 
         if self.timer_count >= self.total_time_steps:
             self.iren.DestroyTimer()
             if self.gif_file is not None:
                 assert len(self.gif_data) > 0
+                imageio = optional_import('imageio', 'graphics')
                 imageio.mimsave(self.gif_file + '.gif', self.gif_data)
-                import os
-                for i in range(self.screenshot_count):
-                    os.remove(self.gif_file + '%d.png' % i)
                 return
 
         if self.gif_file is not None:
             if (self.timer_count % 60) == 0:
-                self.screenshot(self.gif_file)
-                path = self.gif_file + '%d.png' % (self.screenshot_count - 1)
-                self.gif_data.append(imageio.imread(path))
+                self.gif_data.append(self.capture())
 
 
 def axesUniversal():
@@ -165,7 +414,7 @@ def vtk_named_colors(colors):
 def floor():
     plane = vtk.vtkPlaneSource()
     reader = vtk.vtkJPEGReader()
-    reader.SetFileName(pkg_resources.resource_filename("robopy", "media/imgs/floor.jpg"))
+    reader.SetFileName(media_path('imgs', 'floor.jpg'))
     texture = vtk.vtkTexture()
     texture.SetInputConnection(reader.GetOutputPort())
     map_to_plane = vtk.vtkTextureMapToPlane()
@@ -5,11 +5,13 @@ from .serial_link import Revolute
 from math import pi
 import numpy as np
 from . import transforms as tr
-from . import graphics
 from .common import ishomog
 
 
 class Puma560(SerialLink):
+    # Arm (left/right), elbow (up/down) and wrist (noflip/flip) configurations, in the order returned by ikine_analytic
+    ik_configs = ['lun', 'luf', 'ldn', 'ldf', 'run', 'ruf', 'rdn', 'rdf']
+
     def __init__(self, base=None):
 
         self.qn = np.matrix([[0, pi / 4, pi, 0, pi / 4, 0]])
@@ -37,10 +39,89 @@ class Puma560(SerialLink):
         else:
             assert ishomog(base, (4, 4))
         file_names = SerialLink._setup_file_names(7)
-        colors = graphics.vtk_named_colors(["Red", "DarkGreen", "Blue", "Cyan", "Magenta", "Yellow", "White"])
+        colors = ["Red", "DarkGreen", "Blue", "Cyan", "Magenta", "Yellow", "White"]
 
         super().__init__(links=links, base=base, name='puma_560', stl_files=file_names, colors=colors, param=param)
 
+    def ikine_analytic(self, T, config=None, unit='rad'):
+        """
+        Calculates closed-form inverse kinematics of the Puma560, which has a spherical wrist.
+        All eight arm/elbow/wrist configurations of many poses are solved in one vectorised pass.
+        Based on the solution of ikine560 in Peter Corke's Robotics Toolbox.
+        :param T: homogeneous transformation matrix, SE3 object or (N, 4, 4) ndarray.
+        :param config: a configuration from Puma560.ik_configs, e.g. 'run' for right arm, elbow up, wrist noflip.
+        If None, all eight configurations are returned.
+        :param unit: preferred unit for returned joint angles. Allowed values: 'rad' or 'deg'.
+        :return: (8, 6) ndarray of joint angles, one row per configuration in ik_configs order, or (6,) if config is
+        given. Many poses add a leading N axis. Joint angles are within the qlim of each link, those of unreachable
+        poses and of configurations outside the joint limits are NaN.
+        """
+        if hasattr(T, 'data') and not isinstance(T, np.ndarray):
+            T = T.data
+        T = np.asarray(T, dtype=np.float64)
+        single = T.ndim == 2
+        T = np.matmul(np.matmul(np.linalg.inv(np.asarray(self.base)), T.reshape(-1, 4, 4)), np.linalg.inv(np.asarray(self.tool)))
+        km = self.kinematic_model
+        a2, a3, d3, d4 = km.a[1], km.a[2], km.d[2], km.d[3]
+
+        # Sign of the arm (left -1, right 1), elbow (up 1, down -1) and wrist (noflip -1, flip 1) solutions
+        arm = np.array([-1 if each[0] == 'l' else 1 for each in self.ik_configs])
+        elbow = np.array([1 if each[1] == 'u' else -1 for each in self.ik_configs])
+        wrist = np.array([-1 if each[2] == 'n' else 1 for each in self.ik_configs])
+
+        px, py, pz = (T[:, i, 3, None] for i in range(3))
+        ox, oy, oz = (T[:, i, 1, None] for i in range(3))
+        ax, ay, az = (T[:, i, 2, None] for i in range(3))
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # Shoulder
+            r = np.sqrt(px ** 2 + py ** 2)
+            q1 = np.arctan2(py, px) + np.where(arm == 1, np.arcsin(d3 / r), pi - np.arcsin(d3 / r))
+            c1 = np.cos(q1)
+            s1 = np.sin(q1)
+
+            # Upper arm and elbow
+            v114 = px * c1 + py * s1
+            r = np.sqrt(v114 ** 2 + pz ** 2)
+            psi = np.arccos((a2 ** 2 - d4 ** 2 - a3 ** 2 + v114 ** 2 + pz ** 2) / (2.0 * a2 * r))
+            q2 = np.arctan2(pz, v114) + arm * elbow * psi
+            c2 = np.cos(q2)
+            s2 = np.sin(q2)
+            q3 = np.arctan2(a3, d4) - np.arctan2(c2 * v114 + s2 * pz - a2, c2 * pz - s2 * v114)
+            c23 = np.cos(q2 + q3)
+            s23 = np.sin(q2 + q3)
+
+            # Wrist
+            v113 = c1 * ax + s1 * ay
+            v323 = c1 * ay - s1 * ax
+            v313 = c23 * v113 + s23 * az
+            q4 = np.arctan2(wrist * v323, wrist * v313)
+            c4 = np.cos(q4)
+            s4 = np.sin(q4)
+            q5 = np.arctan2(-c4 * v313 - s4 * v323, -v113 * s23 + az * c23)
+            c5 = np.cos(q5)
+            s5 = np.sin(q5)
+            v112 = c1 * ox + s1 * oy
+            v132 = s1 * ox - c1 * oy
+            v312 = v112 * c23 + oz * s23
+            v332 = -v112 * s23 + oz * c23
+            q6 = np.arctan2(-(v312 * c4 - v132 * s4) * c5 - v332 * s5, -(v312 * s4 + v132 * c4))
+
+        q = np.stack((q1, q2, q3, q4, q5, q6), axis=-1)
+        q = np.mod(q + pi, 2 * pi) - pi
+        # Joints outside their limits are shifted by 2*pi where that lands them within limits
+        lower, upper = km.qlim
+        outside = (q < lower) | (q > upper)
+        q = np.where(outside & np.isfinite(lower), lower + np.mod(q - lower, 2 * pi), q)
+        q[np.isnan(q).any(axis=-1) | ((q < lower) | (q > upper)).any(axis=-1)] = np.nan
+        if unit == 'deg':
+            q = q * 180 / pi
+        if config is not None:
+            q = q[:, self.ik_configs.index(config)]
+        if single:
+            q = q[0]
+        return q
+
 
 class Orion5(SerialLink):
     def __init__(self, base=None):
@@ -64,8 +145,7 @@ class Orion5(SerialLink):
             assert ishomog(base, (4, 4))
 
         file_names = SerialLink._setup_file_names(7)
-        colors = graphics.vtk_named_colors(
-            ["DimGray", "IndianRed", "DimGray", "IndianRed", "DimGray", "IndianRed", "IndianRed"])
+        colors = ["DimGray", "IndianRed", "DimGray", "IndianRed", "DimGray", "IndianRed", "IndianRed"]
 
         super().__init__(links=links, base=base, name='orion5', stl_files=file_names, colors=colors)
 
@@ -8,9 +8,6 @@ from . import check_args
 from .super_pose import SuperPose
 from random import uniform, randint
 from . import transforms
-import vtk
-from . import graphics
-from .graphics import VtkPipeline
 
 
 # TODO Implement argument checking for all poses
@@ -23,32 +20,26 @@ class SO2(SuperPose):
         check_args.unit_check(unit)
         check_args.so2_input_types_check(args_in)
         self._unit = unit
-        self._list = []
-        angles_deg = []
+        mats = []
 
         if null:  # Usually only internally used to create empty objects
             pass
         elif args_in is None:
-            self._list.append(np.asmatrix(np.eye(2, 2)))
+            mats.append(np.eye(2, 2))
         elif isinstance(args_in, int) or isinstance(args_in, float):
             if unit == 'deg':
                 args_in = args_in * math.pi / 180
-            self._list.append(np.matrix([[math.cos(args_in), -math.sin(args_in)],
-                                         [math.sin(args_in), math.cos(args_in)]]))
+            mats.append(np.matrix([[math.cos(args_in), -math.sin(args_in)],
+                                   [math.sin(args_in), math.cos(args_in)]]))
         elif isinstance(args_in, SO2):
             check_args.so2_valid(args_in)
-            for each_matrix in args_in:
-                self._list.append(each_matrix)
+            mats = args_in._data
         elif isinstance(args_in, np.matrix):
             if SO2.is_valid(args_in):
-                self._list.append(args_in)
+                mats.append(args_in)
         elif isinstance(args_in, list):
             check_args.so2_angle_list_check(args_in)
-            if unit == "deg":
-                for each_angle in args_in:
-                    angles_deg.append(each_angle * math.pi / 180)
-            for each_angle in angles_deg:
-                self._list.append(transforms.rot2(each_angle))
+            mats = transforms.rot2(args_in, unit=unit)
         else:
             raise AttributeError("\nINVALID instantiation. Valid scenarios:-\n"
                                  "SO2(angle)\n"
@@ -58,10 +49,7 @@ class SO2(SuperPose):
                                  "SO2()\n"
                                  "SO2(so2)\n"
                                  "SO2(np.matrix)\n")
-        # Round all matrices to 15 decimal places
-        # Removes eps values
-        for i in range(len(self._list)):
-            self._list[i] = np.asmatrix(self._list[i].round(15))
+        self._data = SuperPose._stack(mats, 2)
 
     @staticmethod
     def is_valid(obj):
@@ -132,9 +120,7 @@ class SO2(SuperPose):
     @property
     def angle(self):
         """Returns angle of SO2 object matrices in unit radians"""
-        angles = []
-        for each_matrix in self:
-            angles.append(math.atan2(each_matrix[1, 0], each_matrix[0, 0]))
+        angles = np.arctan2(self._data[:, 1, 0], self._data[:, 0, 0]).tolist()
         # TODO !! Return list be default ?
         if len(angles) == 1:
             return angles[0]
@@ -153,10 +139,7 @@ class SO2(SuperPose):
     @property
     def det(self):
         """Returns a list containing determinants of all matrices in a SO2 object"""
-        val = []
-        for i in range(len(self._list)):
-            val.append(np.linalg.det(self._list[i]))
-        return val
+        return np.linalg.det(self._data[:, :2, :2]).tolist()
 
     def t_matrix(self):
         """Returns a list of transformation matrices"""
@@ -167,17 +150,10 @@ class SO2(SuperPose):
 
     def SE2(self):
         """Returns SE2 object with same rotational component as SO2 and a zero translation component"""
-        se2_pose = SE2(null=True)  # Creates empty poses with no data
-        for each_matrix in self:
-            se2_pose.append(transforms.r2t(each_matrix))
-        return se2_pose
-
-    def inv(self):
-        """Returns inverse SO2 object"""
-        new_pose = SO2(null=True)
-        for each_matrix in self:
-            new_pose.append(np.matrix.transpose(each_matrix))
-        return new_pose
+        data = np.zeros((self.length, 3, 3))
+        data[:, :2, :2] = self._data
+        data[:, 2, 2] = 1
+        return SE2._from_array(data)
 
     def eig(self):
         # TODO !! How to ?
@@ -193,7 +169,7 @@ class SO2(SuperPose):
         check_args.so2_interp_check(self, other, s)
         if type(self.angle) is list:
             angle_diff = []
-            for i in range(len(self._list)):
+            for i in range(self.length):
                 angle_diff.append(self.angle[i] + s * (other.angle[i] - self.angle[i]))
             return SO2(angle_diff)
         else:
@@ -202,12 +178,11 @@ class SO2(SuperPose):
 
     def new(self):
         """Returns a deep copy of SO2 object"""
-        new_pose = SO2(null=True)
-        for each_matrix in self:
-            new_pose.append(each_matrix)
-        return new_pose
+        return SO2._from_array(self._data.copy())
 
     def plot(self):
+        from . import graphics
+        from .graphics import VtkPipeline
 
         angles = self.angle
         if type(angles) == int or type(angles) == float:
@@ -243,8 +218,7 @@ class SE2(SO2):
     def __init__(self, theta=None, unit='rad', x=None, y=None, rot=None, so2=None, se2=None, null=False):
         check_args.unit_check(unit)
         check_args.se2_constructor_args_check(x, y, rot, theta, so2, se2)
-        self._list = []
-        self._transl = []
+        mats = []
         self._unit = unit
         if theta is None:
             theta = 0
@@ -260,7 +234,6 @@ class SE2(SO2):
         elif x is not None and y is not None and rot is None and se2 is None and so2 is None:
             if isinstance(x, list) and isinstance(y, list):
                 for i in range(len(x)):
-                    self._transl.append((x[i], y[i]))
                     angle = 0
                     if isinstance(theta, list):
                         angle = theta[i]
@@ -268,56 +241,44 @@ class SE2(SO2):
                         angle = theta
                     mat = transforms.rot2(angle)
                     mat = SO2.form_trans_matrix(mat, (x[i], y[i]))
-                    self._list.append(mat)
+                    mats.append(mat)
             else:
-                self._transl.append((x, y))
                 mat = transforms.rot2(theta)
                 mat = SO2.form_trans_matrix(mat, (x, y))
-                self._list.append(mat)
+                mats.append(mat)
         elif x is not None and y is not None and rot is not None and se2 is None and so2 is None:
             if isinstance(x, list) and isinstance(y, list) and isinstance(rot, list):
                 for i in range(len(x)):
-                    self._transl.append((x[i], y[i]))
                     mat = SO2.form_trans_matrix(rot[i], (x[i], y[i]))
-                    self._list.append(mat)
+                    mats.append(mat)
             else:
-                self._transl.append((x, y))
                 mat = SO2.form_trans_matrix(rot, (x, y))
-                self._list.append(mat)
+                mats.append(mat)
         elif x is None and y is None and rot is not None and se2 is None and so2 is None:
             if isinstance(rot, list):
                 for i in range(len(rot)):
-                    self._transl.append((0, 0))
                     mat = SO2.form_trans_matrix(rot[i], (0, 0))
-                    self._list.append(mat)
+                    mats.append(mat)
             else:
-                self._transl.append((0, 0))
                 mat = SO2.form_trans_matrix(rot, (0, 0))
-                self._list.append(mat)
+                mats.append(mat)
         elif x is None and y is None and rot is None and se2 is not None and so2 is None:
-            self._transl = se2.transl
-            for each_matrix in se2:
-                self._list.append(each_matrix)
+            mats = se2._data
         elif x is None and y is None and rot is None and se2 is None and so2 is not None:
-            for i in range(so2.length):
-                self._transl.append((0, 0))
             for each_matrix in so2:
                 mat = SO2.form_trans_matrix(each_matrix, (0, 0))
-                self._list.append(mat)
+                mats.append(mat)
         elif x is None and y is None and rot is None and se2 is None and so2 is None and isinstance(theta, list):
             for i in range(len(theta)):
                 mat = transforms.rot2(theta[i])
                 mat = SO2.form_trans_matrix(mat, (0, 0))
-                self._list.append(mat)
-                self._transl.append((0, 0))
+                mats.append(mat)
         elif x is None and y is None and rot is None and se2 is None and so2 is None and theta != 0:
             mat = transforms.rot2(theta)
             mat = SO2.form_trans_matrix(mat, (0, 0))
-            self._list.append(mat)
-            self._transl.append((0, 0))
+            mats.append(mat)
         elif x is None and y is None and rot is None and se2 is None and so2 is None and theta == 0:
-            self._list.append(np.asmatrix(np.eye(3, 3)))
-            self._transl.append((0, 0))
+            mats.append(np.eye(3, 3))
         else:
             raise AttributeError("\nINVALID instantiation. Valid scenarios:-\n"
                                  "- SE2(x, y)\n"
@@ -327,14 +288,11 @@ class SE2(SO2):
                                  "- SE2(so2)\n"
                                  "- SE2(theta)\n"
                                  "- SE2(rot)\n")
-        # Round all matrices to 15 decimal places
-        # Removes eps values
-        for i in range(len(self._list)):
-            self._list[i] = np.asmatrix(self._list[i].round(15))
+        self._data = SuperPose._stack(mats, 3)
 
     @property  # transl_vec is dependent on this !
     def transl(self):
-        return self._transl
+        return [tuple(each) for each in self._data[:, :2, 2].tolist()]
 
     # @transl.setter
     # def transl(self, value):
@@ -344,10 +302,7 @@ class SE2(SO2):
     @property
     def transl_vec(self):
         """Returns list of translation vectors of SE2 object"""
-        mat = []
-        for each in self.transl:
-            mat.append(np.matrix([[each[0]], [each[1]]]))
-        return mat
+        return [np.asmatrix(each) for each in self._data[:, :2, 2:]]
 
     @staticmethod
     def is_valid(obj):
@@ -361,43 +316,22 @@ class SE2(SO2):
 
     def t_matrix(self):
         """Returns list of translation matrices of SE2 object"""
-        if self.length == 1:
-            return self._list[0]
-        elif self.length > 1:
-            return self._list
-
-    def inv(self):
-        """Returns an inverse SE2 object of same length"""
-        new_transl = []
-        new_rot = []
-        for i in range(len(self._list)):
-            # Get rotation matrix. Transpose it. Then append in new_rot
-            rot_transposed = np.matrix.transpose(transforms.t2r(self._list[i]))
-            new_rot.append(rot_transposed)
-            transl_mat = -rot_transposed * self.transl_vec[i]
-            new_transl.append(transl_mat)
-
-        new_x = []
-        new_y = []
-        for each in new_transl:  # Get all x and y translations from list of new translation vectors
-            new_x.append(each[0, 0])
-            new_y.append(each[1, 0])
-
-        return SE2(x=new_x, y=new_y, rot=new_rot)
+        return self.mat
 
     def xyt(self, unit='rad'):
         """Return list of 3x1 dimension vectors containing x, y translation components and theta"""
         check_args.unit_check(unit)
         val = []
-        assert len(self._transl) == len(self.angle)
-        for i in range(len(self._list)):
-            x = self._transl[i][0]
-            y = self._transl[i][1]
+        transl = self.transl
+        angle = np.atleast_1d(self.angle)
+        for i in range(self.length):
+            x = transl[i][0]
+            y = transl[i][1]
             theta = 0
             if unit == 'deg':
-                theta = self.angle[i] * 180 / math.pi
+                theta = angle[i] * 180 / math.pi
             elif unit == 'rad':
-                theta = self.angle[i]
+                theta = angle[i]
             val.append(np.matrix([[x], [y], [theta]]))
         return val
 
@@ -429,20 +363,20 @@ class SO3(SuperPose):
         check_args.so3_constructor_args_check(args_in)
         # TODO make sure all list elements are of same data type. !!! Throw TypeError if not
 
-        self._list = []
+        mats = []
 
         if args_in is None and null is True:
             pass
         elif args_in is None and null is False:
-            self._list.append(np.asmatrix(np.eye(3, 3)))
+            mats.append(np.eye(3, 3))
         elif type(args_in) is list:
-            SO3.np(args_in)
+            mats = SO3.np(args_in)._data
         elif type(args_in) is SE3:
-            SO3.se3(args_in)
+            mats = SO3.se3(args_in)._data
         elif type(args_in) is SO3:
-            SO3.so3(args_in)
+            mats = args_in._data
         elif type(args_in) is np.matrix:
-            self.np(args_in)
+            mats = SO3.np(args_in)._data
         else:
             raise AttributeError("\n INVALID instantiation. Valid scenarios:\n"
                                  "- SO3()\n"
@@ -452,10 +386,7 @@ class SO3(SuperPose):
                                  "- SO3([se3, se3, se3])\n"
                                  "- SO3(so3)\n"
                                  "- SO3([so3, so3, so3])\n")
-        # Round all matrices to 15 decimal places
-        # Removes eps values
-        for i in range(len(self._list)):
-            self._list[i] = np.asmatrix(self._list[i].round(15))
+        self._data = SuperPose._stack(mats, 3)
 
     @classmethod
     def so3(cls, args_in):
@@ -465,10 +396,7 @@ class SO3(SuperPose):
     @classmethod
     def se3(cls, args_in):
         assert type(args_in) is SE3
-        obj = cls(null=True)
-        for each in args_in:
-            obj._list.append(np.delete(np.delete(each, [3], axis=0), [3], axis=1))
-        return obj
+        return cls._from_array(args_in._data[:, :3, :3].copy())
 
     @classmethod
     def np(cls, args_in):
@@ -480,20 +408,17 @@ class SO3(SuperPose):
     @classmethod
     def Rx(cls, theta, unit="rad"):
         theta = cls.__RxRyRz(theta, unit)
-        rot = [transforms.rotx(each) for each in theta]
-        return cls(null=True).__fill(rot)
+        return cls(null=True).__fill(transforms.rotx(theta))
 
     @classmethod
     def Ry(cls, theta, unit="rad"):
         theta = cls.__RxRyRz(theta, unit)
-        rot = [transforms.roty(each) for each in theta]
-        return cls(null=True).__fill(rot)
+        return cls(null=True).__fill(transforms.roty(theta))
 
     @classmethod
     def Rz(cls, theta, unit="rad"):
         theta = cls.__RxRyRz(theta, unit)
-        rot = [transforms.rotz(each) for each in theta]
-        return cls(null=True).__fill(rot)
+        return cls(null=True).__fill(transforms.rotz(theta))
 
     @classmethod
     def rand(cls):
@@ -544,17 +469,19 @@ class SO3(SuperPose):
                                  "list of float or int")
 
     def __fill(self, data):
-        for each in data:
-            self._list.append(each)
+        data = np.asarray(data, dtype=np.float64)
+        self._data = data.reshape((-1,) + data.shape[-2:])
         return self
 
     def to_se3(self):
-        pose_se3 = SE3(null=True)
-        for each in self:
-            pose_se3.append(transforms.r2t(each))
-        return pose_se3
+        data = np.zeros((self.length, 4, 4))
+        data[:, :3, :3] = self._data
+        data[:, 3, 3] = 1
+        return SE3._from_array(data)
 
     def plot(self):
+        from . import graphics
+        from .graphics import vtk, VtkPipeline
         pose_se3 = self
         if type(self) is SO3:
             pose_se3 = self.to_se3()
@@ -573,6 +500,8 @@ class SO3(SuperPose):
         pipeline.iren.Start()
 
     def animate(self, other=None, duration=5, gif=None):
+        from . import graphics
+        from .graphics import vtk, VtkPipeline
         from .quaternion import UnitQuaternion
         assert duration > 0
         q1 = []
@@ -632,9 +561,7 @@ class SO3(SuperPose):
             return mat
 
     def det(self):
-        det_list = []
-        for each in self:
-            det_list.append(np.linalg.det(each))
+        det_list = np.linalg.det(self._data[:, :3, :3]).tolist()
         if self.length == 1:
             return det_list[0]
         elif self.length > 1:
@@ -679,10 +606,7 @@ class SO3(SuperPose):
         pass
 
     def new(self):
-        new_pose = SO3(null=True)
-        for each in self:
-            new_pose.append(each)
-        return new_pose
+        return type(self)._from_array(self._data.copy())
 
     def exp(self):
         # TODO - maybe a static method
@@ -713,12 +637,6 @@ class SO3(SuperPose):
         # TODO
         pass
 
-    def inv(self):
-        inv_mat = []
-        for each in self:
-            inv_mat.append(np.transpose(each))
-        return SO3.np(inv_mat)
-
     def eig(self):
         vec = []
         mat = []
@@ -767,8 +685,7 @@ class SE3(SO3):
     # ---------------------------------------------------------------------------------
 
     def __init__(self, x=None, y=None, z=None, rot=None, so3=None, se3=None, null=False):
-        self._list = []
-        self._transl = []
+        mats = []
         if null:
             pass
         elif x is not None and y is not None and z is not None and rot is None and so3 is None and se3 is None:
@@ -780,9 +697,8 @@ class SE3(SO3):
             if isinstance(x, list) and isinstance(y, list) and isinstance(z, list):
                 # Assert they are all same length
                 for i in range(len(x)):
-                    self._transl.append((x[i], y[i], z[i]))
                     rot = transforms.rotx(0)
-                    self._list.append(SE3.form_trans_matrix(rot, (x[i], y[i], z[i])))
+                    mats.append(SE3.form_trans_matrix(rot, (x[i], y[i], z[i])))
         elif x is not None and y is not None and z is not None and rot is not None and so3 is None and se3 is None:
             if (type(x) is int or type(x) is float) and \
                     (type(y) is int or type(y) is float) and \
@@ -794,8 +710,7 @@ class SE3(SO3):
                 rot = [rot]
             if isinstance(x, list) and isinstance(y, list) and isinstance(z, list) and isinstance(rot, list):
                 for i in range(len(x)):
-                    self._transl.append((x[i], y[i], z[i]))
-                    self._list.append(SE3.form_trans_matrix(rot[i], (x[i], y[i], z[i])))
+                    mats.append(SE3.form_trans_matrix(rot[i], (x[i], y[i], z[i])))
         elif x is not None and y is not None and z is not None and rot is None and so3 is not None and se3 is None:
             if (type(x) is int or type(x) is float) and \
                     (type(y) is int or type(y) is float) and \
@@ -806,26 +721,20 @@ class SE3(SO3):
                 z = [z]
             if isinstance(x, list) and isinstance(y, list) and isinstance(z, list):
                 for i in range(len(x)):
-                    self._transl.append((x[i], y[i], z[i]))
-                    self._list.append(SE3.form_trans_matrix(so3.data[i], (x[i], y[i], z[i])))
+                    mats.append(SE3.form_trans_matrix(so3.data[i], (x[i], y[i], z[i])))
         elif x is None and y is None and z is None and rot is not None and so3 is None and se3 is None:
             if type(rot) is np.matrix:
                 rot = [rot]
             if type(rot) is list:
                 for i in range(len(rot)):
-                    self._transl.append((0, 0, 0))
-                    self._list.append(SE3.form_trans_matrix(rot[i], (0, 0, 0)))
+                    mats.append(SE3.form_trans_matrix(rot[i], (0, 0, 0)))
         elif x is None and y is None and z is None and rot is None and so3 is not None and se3 is None:
             for each in so3:
-                self._transl.append((0, 0, 0))
-                self._list.append(SE3.form_trans_matrix(each, (0, 0, 0)))
+                mats.append(SE3.form_trans_matrix(each, (0, 0, 0)))
         elif x is None and y is None and z is None and rot is None and so3 is None and se3 is not None:
-            for i in range(se3.length):
-                self._transl.append(se3.transl[i])
-                self._list.append(se3.data[i])
+            mats = se3._data
         elif x is None and y is None and z is None and rot is None and so3 is None and se3 is None:
-            self._list.append(np.asmatrix(np.eye(4, 4)))
-            self._transl.append((0, 0, 0))
+            mats.append(np.eye(4, 4))
         else:
             raise AttributeError("\nINVALID instantiation. Valid scenarios:-\n"
                                  "- SE3(x, y, z)\n"
@@ -834,13 +743,39 @@ class SE3(SO3):
                                  "- SE3(so3)\n"
                                  "- SE3(se3)\n"
                                  "- SE3(rot)\n")
-
-        for i in range(len(self._list)):
-            self._list[i] = np.asmatrix(self._list[i].round(15))
+        self._data = SuperPose._stack(mats, 4)
 
     @property  # transl_vec is dependent on this !
     def transl(self):
-        return self._transl
+        return [tuple(each) for each in self._data[:, :3, 3].tolist()]
+
+    def transform_points(self, points, out=None, block=65536):
+        """
+        Applies the poses to an array of 3D points, p' = R p + t.
+        No homogeneous copy of the points is made. Points are processed in blocks,
+        so passing out=points transforms a single pose in place.
+        :param points: (M, 3) float32 or float64 ndarray of points.
+        :param out: Optional output buffer. (M, 3) for one pose, (N, M, 3) for N poses.
+        Its dtype sets the precision of the computation.
+        :param block: Number of points transformed per step.
+        :return: (M, 3) ndarray for one pose, (N, M, 3) ndarray for N poses.
+        """
+        check_args.transform_points_check(self, points, out)
+        if out is None:
+            dtype = points.dtype if points.dtype == np.float32 else np.float64
+            shape = points.shape if self.length == 1 else (self.length,) + points.shape
+            out = np.empty(shape, dtype=dtype)
+        out_stack = out.reshape((-1,) + points.shape)
+        buffer = np.empty((min(block, len(points)), 3), dtype=out.dtype)
+        for i in range(self.length):
+            rot_t = self._data[i, :3, :3].T.astype(out.dtype)
+            transl = self._data[i, :3, 3].astype(out.dtype)
+            for start in range(0, len(points), block):
+                stop = min(start + block, len(points))
+                tmp = buffer[:stop - start]
+                np.matmul(points[start:stop], rot_t, out=tmp)
+                np.add(tmp, transl, out=out_stack[i, start:stop])
+        return out
 
     @classmethod
     def Rx(cls, theta, unit="rad", x=None, y=None, z=None):
@@ -860,24 +795,26 @@ class SE3(SO3):
     @classmethod
     def se3(cls, args_in):
         assert (type(args_in) is SE3)
-        pose_se3 = cls(null=True)
-        for each in args_in:
-            pose_se3.append(each)
-
-        return pose_se3
+        return cls._from_array(args_in._data.copy())
 
     @classmethod
     def np(cls, arg_in):
         from .common import ishomog
-        assert (type(arg_in) is np.matrix) or (type(arg_in) is list)
+        assert (type(arg_in) is np.matrix) or (type(arg_in) is list) or (type(arg_in) is np.ndarray)
         se3 = cls(null=True)
-        if type(arg_in) is list:
+        if type(arg_in) is np.ndarray:
+            # Stack of (N, 4, 4) homogeneous transforms, validated all at once
+            data = np.array(arg_in, dtype=np.float64).reshape(-1, 4, 4)
+            assert np.allclose(data[:, 3], [0, 0, 0, 1])
+            assert np.allclose(np.linalg.det(data[:, :3, :3]), 1)
+            se3._data = data
+        elif type(arg_in) is list:
             for each in arg_in:
                 assert ishomog(each, (4, 4))
-                se3.append(each)
+            se3._data = cls._stack(arg_in, 4)
         else:
             assert ishomog(arg_in, (4, 4))
-            se3.append(arg_in)
+            se3._data = cls._stack(arg_in, 4)
         return se3
 
     @staticmethod
@@ -1,13 +1,14 @@
 # Author: Aditya Dua
 # 28 January, 2018
 from __future__ import print_function
+import math
+import numpy as np
 from .common import isvec
 from .common import ishomog
 from math import sqrt
 from numpy import trace
 from .transforms import *
-from ..tests.test_common import *
-from .graphics import *
+from .transforms import _rotation_rows
 
 
 class Quaternion:
@@ -192,11 +193,9 @@ class Quaternion:
 
     def __eq__(self, other):
         # assert type(other) is Quaternion
-        try:
-            np.testing.assert_almost_equal(self.s, other.s)
-        except AssertionError:
+        if abs(self.s - other.s) >= 1.5e-7:
             return False
-        if not matrices_equal(self.v, other.v, decimal=7):
+        if not np.all(np.abs(self.v - other.v) < 1.5e-7):
             return False
         return True
 
@@ -299,6 +298,7 @@ class UnitQuaternion(Quaternion):
         SO3.np(self.r()).plot()
 
     def animate(self, qr=None, duration=5, gif=None):
+        from .graphics import vtk, VtkPipeline, axesCube
         self.pipeline = VtkPipeline(total_time_steps=duration*60, gif_file=gif)
         axis = vtk.vtkAxesActor()
         axis.SetAxisLabels(0)
@@ -333,32 +333,16 @@ class UnitQuaternion(Quaternion):
         Algorithm source: https://en.wikipedia.org/wiki/Slerp
         :param qr: UnitQuaternion
         :param shortest: Take the shortest path along the great circle
-        :param r: interpolation point
-        :return: interpolated UnitQuaternion
+        :param r: interpolation point, or 1-D array of interpolation points
+        :return: interpolated UnitQuaternion, or UnitQuaternionArray for an array of points
         """
         assert type(qr) is UnitQuaternion
-        if self == qr:
-            return self
-
-        q1 = self.double()
-        q2 = qr.double()
-        dot = q1*np.transpose(q2)
-
-        # If the dot product is negative, the quaternions
-        # have opposite handed-ness and slerp won't take
-        # the shorter path. Fix by reversing one quaternion.
-        if shortest:
-            if dot < 0:
-                q1 = - q1
-                dot = -dot
-
-        dot = np.clip(dot, -1, 1)  # Clip within domain of acos()
-        theta_0 = math.acos(dot)  # theta_0 = angle between input vectors
-        theta = theta_0 * r  # theta = angle between v0 and result
-        s1 = float(math.cos(theta) - dot * math.sin(theta) / math.sin(theta_0))
-        s2 = math.sin(theta) / math.sin(theta_0)
-        out = (q1 * s1) + (q2 * s2)
-        return UnitQuaternion(s=float(out[0, 0]), v=out[0, 1:])
+        q1 = np.asarray(self.double(), dtype=np.float64).reshape(1, 4)
+        q2 = np.asarray(qr.double(), dtype=np.float64).reshape(1, 4)
+        out = _slerp(q1, q2, np.asarray(r, dtype=np.float64).reshape(-1), shortest)
+        if np.ndim(r) > 0:
+            return UnitQuaternionArray._from_array(out)
+        return UnitQuaternion(s=float(out[0, 0]), v=np.asmatrix(out[0, 1:]))
 
     def to_vec(self):
         if self.s < 0:
@@ -392,14 +376,7 @@ class UnitQuaternion(Quaternion):
         return SE3(so3=SO3.np(self.r()))
 
     def to_rot(self):
-        q = self.double()
-        s = q[0, 0]
-        x = q[0, 1]
-        y = q[0, 2]
-        z = q[0, 3]
-        return np.matrix([[1 - 2 * (y ** 2 + z ** 2), 2 * (x * y - s * z), 2 * (x * z + s * y)],
-                          [2 * (x * y + s * z), 1 - 2 * (x ** 2 + z ** 2), 2 * (y * z - s * x)],
-                          [2 * (x * z - s * y), 2 * (y * z + s * x), 1 - 2 * (x ** 2 + y ** 2)]])
+        return np.asmatrix(_q2r(np.asarray(self.double(), dtype=np.float64).reshape(1, 4))[0])
 
     def q2r(self):
         return self.to_rot()
@@ -413,52 +390,14 @@ class UnitQuaternion(Quaternion):
         Converts a homogeneous rotation matrix to a Quaternion object
         Code retrieved from: https://github.com/petercorke/robotics-toolbox-python/blob/master/robot/Quaternion.py
         Original authors: Luis Fernando Lara Tobar and Peter Corke
-        :param t: homogeneous matrix
-        :return: quaternion object
+        :param t: homogeneous matrix, or (N, 3, 3) ndarray of rotation matrices
+        :return: quaternion object, or UnitQuaternionArray for N matrices
         """
+        if type(t) is np.ndarray and t.ndim == 3:
+            return UnitQuaternionArray.rot(t)
         assert ishomog(t, (3, 3)), "Argument must be 3x3 homogeneous numpy matrix"
-        qs = sqrt(trace(t) + 1) / 2.0
-        kx = t[2, 1] - t[1, 2]  # Oz - Ay
-        ky = t[0, 2] - t[2, 0]  # Ax - Nz
-        kz = t[1, 0] - t[0, 1]  # Ny - Ox
-
-        if (t[0, 0] >= t[1, 1]) and (t[0, 0] >= t[2, 2]):
-            kx1 = t[0, 0] - t[1, 1] - t[2, 2] + 1  # Nx - Oy - Az + 1
-            ky1 = t[1, 0] + t[0, 1]  # Ny + Ox
-            kz1 = t[2, 0] + t[0, 2]  # Nz + Ax
-            add = (kx >= 0)
-        elif t[1, 1] >= t[2, 2]:
-            kx1 = t[1, 0] + t[0, 1]  # Ny + Ox
-            ky1 = t[1, 1] - t[0, 0] - t[2, 2] + 1  # Oy - Nx - Az + 1
-            kz1 = t[2, 1] + t[1, 2]  # Oz + Ay
-            add = (ky >= 0)
-        else:
-            kx1 = t[2, 0] + t[0, 2]  # Nz + Ax
-            ky1 = t[2, 1] + t[1, 2]  # Oz + Ay
-            kz1 = t[2, 2] - t[0, 0] - t[1, 1] + 1  # Az - Nx - Oy + 1
-            add = (kz >= 0)
-
-        if add:
-            kx = kx + kx1
-            ky = ky + ky1
-            kz = kz + kz1
-        else:
-            kx = kx - kx1
-            ky = ky - ky1
-            kz = kz - kz1
-
-        kv = np.matrix([[kx, ky, kz]])
-        nm = np.linalg.norm(kv)
-        qr = UnitQuaternion()
-        if nm == 0:
-            qr.s = 1.0
-            qr.v = np.matrix([[0.0, 0.0, 0.0]])
-
-        else:
-            qr.s = qs
-            qr.v = (sqrt(1 - qs ** 2) / nm) * kv
-
-        return qr
+        q = _tr2q(np.asarray(t, dtype=np.float64).reshape(1, 3, 3))[0]
+        return UnitQuaternion(s=float(q[0]), v=np.asmatrix(q[1:]))
 
     def __matmul__(self, other):
         assert type(other) is UnitQuaternion
@@ -467,3 +406,311 @@ class UnitQuaternion(Quaternion):
     def __floordiv__(self, other):
         assert type(other) is UnitQuaternion
         return (self / other).unit()
+
+
+def _qmul(q1, q2):
+    """
+    Hamilton product of two arrays of quaternions, broadcast over the leading dimension.
+    :param q1: (N, 4) or (1, 4) ndarray, [s, vx, vy, vz] per row
+    :param q2: (N, 4) or (1, 4) ndarray, [s, vx, vy, vz] per row
+    :return: (N, 4) ndarray
+    """
+    s1, v1 = q1[:, :1], q1[:, 1:]
+    s2, v2 = q2[:, :1], q2[:, 1:]
+    s = s1 * s2 - np.sum(v1 * v2, axis=1, keepdims=True)
+    v = s1 * v2 + s2 * v1 + np.cross(v1, v2)
+    return np.concatenate((s, v), axis=1)
+
+
+def _q2r(q):
+    """
+    Converts unit quaternions to rotation matrices.
+    :param q: (N, 4) ndarray, [s, vx, vy, vz] per row
+    :return: (N, 3, 3) ndarray
+    """
+    s, x, y, z = q.T
+    rot = np.empty((q.shape[0], 3, 3))
+    rot[:, 0, 0] = 1 - 2 * (y ** 2 + z ** 2)
+    rot[:, 0, 1] = 2 * (x * y - s * z)
+    rot[:, 0, 2] = 2 * (x * z + s * y)
+    rot[:, 1, 0] = 2 * (x * y + s * z)
+    rot[:, 1, 1] = 1 - 2 * (x ** 2 + z ** 2)
+    rot[:, 1, 2] = 2 * (y * z - s * x)
+    rot[:, 2, 0] = 2 * (x * z - s * y)
+    rot[:, 2, 1] = 2 * (y * z + s * x)
+    rot[:, 2, 2] = 1 - 2 * (x ** 2 + y ** 2)
+    return rot
+
+
+def _tr2q(t):
+    """
+    Converts rotation matrices to unit quaternions with Shepperd's method, the largest of the
+    trace and the diagonal elements being selected per matrix with masks. Each branch gives the
+    quaternion scaled by four times its largest element, which is then normalised as a whole,
+    avoiding the cancellation of sqrt(1 - s**2) for small rotations.
+    :param t: (N, 3, 3) ndarray of rotation matrices
+    :return: (N, 4) ndarray, [s, vx, vy, vz] per row with s >= 0
+    """
+    n_x, o_y, a_z = t[:, 0, 0], t[:, 1, 1], t[:, 2, 2]
+    trace = n_x + o_y + a_z
+    k_x = t[:, 2, 1] - t[:, 1, 2]  # Oz - Ay
+    k_y = t[:, 0, 2] - t[:, 2, 0]  # Ax - Nz
+    k_z = t[:, 1, 0] - t[:, 0, 1]  # Ny - Ox
+    sym_xy = t[:, 1, 0] + t[:, 0, 1]  # Ny + Ox
+    sym_xz = t[:, 2, 0] + t[:, 0, 2]  # Nz + Ax
+    sym_yz = t[:, 2, 1] + t[:, 1, 2]  # Oz + Ay
+
+    s_max = (trace >= n_x) & (trace >= o_y) & (trace >= a_z)
+    x_max = ~s_max & (n_x >= o_y) & (n_x >= a_z)
+    y_max = ~s_max & ~x_max & (o_y >= a_z)
+    z_max = ~s_max & ~x_max & ~y_max
+    q = np.empty((t.shape[0], 4))
+    q[s_max] = np.stack((1 + trace, k_x, k_y, k_z), axis=1)[s_max]
+    q[x_max] = np.stack((k_x, 1 + n_x - o_y - a_z, sym_xy, sym_xz), axis=1)[x_max]
+    q[y_max] = np.stack((k_y, sym_xy, 1 - n_x + o_y - a_z, sym_yz), axis=1)[y_max]
+    q[z_max] = np.stack((k_z, sym_xz, sym_yz, 1 - n_x - o_y + a_z), axis=1)[z_max]
+
+    q /= np.linalg.norm(q, axis=1, keepdims=True)
+    q[q[:, 0] < 0] *= -1
+    return q
+
+
+def _slerp(q0, q1, r, shortest=False):
+    """
+    Spherical linear interpolation between pairs of quaternions at many points.
+    Algorithm source: https://en.wikipedia.org/wiki/Slerp
+    :param q0: (P, 4) or (1, 4) ndarray of start quaternions
+    :param q1: (P, 4) or (1, 4) ndarray of end quaternions
+    :param r: (M,) ndarray of interpolation points
+    :param shortest: Take the shortest path along the great circle
+    :return: (P * M, 4) ndarray, the M points of the first pair, then of the second pair, ...
+    """
+    q0, q1 = np.broadcast_arrays(q0, q1)
+    dot = np.sum(q0 * q1, axis=1)
+
+    # If the dot product is negative, the quaternions
+    # have opposite handed-ness and slerp won't take
+    # the shorter path. Fix by reversing one quaternion.
+    if shortest:
+        q0 = np.where((dot < 0)[:, None], -q0, q0)
+        dot = np.abs(dot)
+
+    dot = np.clip(dot, -1, 1)[:, None]  # Clip within domain of acos()
+    theta_0 = np.arccos(dot)  # theta_0 = angle between input vectors, (P, 1)
+    sin_theta_0 = np.sin(theta_0)
+    r = r[None, :]
+
+    # Near zero angle sin(theta_0) vanishes, fall back to normalised linear interpolation there
+    near = sin_theta_0 < 1e-6
+    safe = np.where(near, 1, sin_theta_0)
+    s1 = np.where(near, 1 - r, np.sin((1 - r) * theta_0) / safe)  # (P, M)
+    s2 = np.where(near, r, np.sin(r * theta_0) / safe)
+    out = s1[:, :, None] * q0[:, None, :] + s2[:, :, None] * q1[:, None, :]
+    out = out.reshape(-1, 4)
+    if np.any(near):
+        out /= np.linalg.norm(out, axis=1, keepdims=True)
+    return out
+
+
+class UnitQuaternionArray:
+    # The quaternions are stored in one contiguous (N, 4) float64 ndarray, self._data,
+    # one [s, vx, vy, vz] row per quaternion.
+
+    def __init__(self, q=None):
+        """
+        An array of N unit quaternions with vectorised operations.
+        :param q: None for one identity quaternion, a list of UnitQuaternion objects,
+        or a (4,) or (N, 4) array-like of [s, vx, vy, vz] rows which are normalised.
+        """
+        if q is None:
+            self._data = np.array([[1.0, 0.0, 0.0, 0.0]])
+        elif isinstance(q, list) and all(isinstance(each, Quaternion) for each in q):
+            self._data = np.array([np.asarray(each.double()).reshape(4) for each in q], dtype=np.float64)
+            self._data /= np.linalg.norm(self._data, axis=1, keepdims=True)
+        else:
+            data = np.array(q, dtype=np.float64).reshape(-1, 4)
+            self._data = data / np.linalg.norm(data, axis=1, keepdims=True)
+
+    @classmethod
+    def _from_array(cls, data):
+        """
+        Creates an object wrapping a (N, 4) ndarray, without copying or normalising it.
+        Mostly for internal use only.
+        :param data: (N, 4) float64 ndarray.
+        :return: UnitQuaternionArray
+        """
+        obj = cls.__new__(cls)
+        obj._data = data
+        return obj
+
+    @classmethod
+    def rot(cls, arg_in):
+        """
+        Creates quaternions from rotation matrices in one call.
+        :param arg_in: 3x3 or 4x4 matrix, (N, 3, 3) or (N, 4, 4) ndarray, or a SO3 or SE3 object
+        whose rotational parts are converted
+        :return: UnitQuaternionArray
+        """
+        if hasattr(arg_in, 'array'):
+            arg_in = arg_in.array
+        return cls._from_array(_tr2q(_rotation_rows(arg_in)))
+
+    @classmethod
+    def angvec(cls, theta, v, unit='rad'):
+        """
+        Creates quaternions from rotations about axes.
+        :param theta: rotation angle, or (N,) array of angles
+        :param v: rotation axis, 3 vector or (N, 3) array of axes
+        :param unit: 'rad' or 'deg'
+        :return: UnitQuaternionArray
+        """
+        theta = np.asarray(theta, dtype=np.float64).reshape(-1)
+        if unit == 'deg':
+            theta = theta * math.pi / 180
+        v = np.asarray(v, dtype=np.float64).reshape(-1, 3)
+        n = np.linalg.norm(v, axis=1, keepdims=True)
+        axis = np.divide(v, n, out=np.zeros_like(v), where=n >= 10 * np.spacing([1])[0])
+        half = theta[:, None] / 2
+        vec = np.sin(half) * axis
+        return cls._from_array(np.concatenate((np.broadcast_to(np.cos(half), (vec.shape[0], 1)), vec), axis=1))
+
+    @classmethod
+    def omega(cls, w):
+        """
+        Creates quaternions from rotation vectors, the rotation angle being the vector norm.
+        Useful to integrate angular velocity samples, w * dt, in one call.
+        :param w: 3 vector or (N, 3) array of rotation vectors
+        :return: UnitQuaternionArray
+        """
+        w = np.asarray(w, dtype=np.float64).reshape(-1, 3)
+        return cls.angvec(np.linalg.norm(w, axis=1), w)
+
+    @property
+    def length(self):
+        """
+        Property to return number of quaternions in the array
+        :return: int
+        """
+        return self._data.shape[0]
+
+    @property
+    def array(self):
+        """
+        Returns the quaternions as one ndarray. No copy is made.
+        :return: (N, 4) ndarray
+        """
+        return self._data
+
+    @property
+    def s(self):
+        """
+        :return: (N,) ndarray of scalar parts
+        """
+        return self._data[:, 0]
+
+    @property
+    def v(self):
+        """
+        :return: (N, 3) ndarray of vector parts
+        """
+        return self._data[:, 1:]
+
+    @property
+    def data(self):
+        """
+        Returns the quaternions as a list of UnitQuaternion objects.
+        :return: list of UnitQuaternion
+        """
+        return [UnitQuaternion(s=float(each[0]), v=np.asmatrix(each[1:])) for each in self._data]
+
+    def __getitem__(self, item):
+        return self._from_array(self._data[item].reshape(-1, 4))
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def norm(self):
+        """
+        :return: (N,) ndarray of quaternion norms
+        """
+        return np.linalg.norm(self._data, axis=1)
+
+    def unit(self):
+        """
+        Normalises the quaternions, removing drift accumulated over many products.
+        :return: UnitQuaternionArray
+        """
+        return self._from_array(self._data / self.norm()[:, None])
+
+    def conj(self):
+        return self._from_array(self._data * np.array([1.0, -1.0, -1.0, -1.0]))
+
+    def inv(self):
+        # conjugate over squared norm, so inv() stays exact for slightly denormalised quaternions
+        return self._from_array(self.conj()._data / np.sum(self._data ** 2, axis=1, keepdims=True))
+
+    def rotate(self, vectors):
+        """
+        Rotates vectors by the quaternions.
+        :param vectors: 3 vector or (N, 3) ndarray, broadcast against the N quaternions
+        :return: (N, 3) ndarray of rotated vectors
+        """
+        vectors = np.asarray(vectors, dtype=np.float64).reshape(-1, 3)
+        assert self.length == 1 or vectors.shape[0] in (1, self.length), \
+            "Number of vectors must be 1 or match the number of quaternions"
+        s, u = self._data[:, :1], self._data[:, 1:]
+        t = 2 * np.cross(u, vectors)
+        return vectors + s * t + np.cross(u, t)
+
+    def interp(self, other, r=0.5, shortest=False):
+        """
+        Interpolates between pairs of quaternions at many points in one call.
+        :param other: UnitQuaternionArray or UnitQuaternion, one end quaternion per start
+        quaternion, or a single one shared by all
+        :param r: interpolation point, or 1-D array of M interpolation points
+        :param shortest: Take the shortest path along the great circle
+        :return: UnitQuaternionArray of P * M quaternions, the M points of each pair in turn
+        """
+        other = self._as_array(other)
+        return self._from_array(_slerp(self._data, other, np.asarray(r, dtype=np.float64).reshape(-1), shortest))
+
+    def to_rot(self):
+        """
+        :return: (N, 3, 3) ndarray of rotation matrices
+        """
+        return _q2r(self._data)
+
+    def to_tr(self):
+        """
+        :return: (N, 4, 4) ndarray of homogeneous transforms with zero translation
+        """
+        tr = np.zeros((self.length, 4, 4))
+        tr[:, :3, :3] = self.to_rot()
+        tr[:, 3, 3] = 1
+        return tr
+
+    def _as_array(self, other):
+        if isinstance(other, UnitQuaternionArray):
+            other = other._data
+        elif isinstance(other, Quaternion):
+            other = np.asarray(other.double(), dtype=np.float64).reshape(1, 4)
+        else:
+            raise AssertionError("Expecting UnitQuaternionArray or UnitQuaternion")
+        assert self.length == 1 or other.shape[0] in (1, self.length), \
+            "Both objects must contain the same number of quaternions, or one of them a single quaternion"
+        return other
+
+    def __mul__(self, other):
+        return self._from_array(_qmul(self._data, self._as_array(other)))
+
+    def __truediv__(self, other):
+        return self * self._from_array(self._as_array(other)).inv()
+
+    def __len__(self):
+        return self.length
+
+    def __repr__(self):
+        return "\n".join("%f <%f, %f, %f>" % tuple(each) for each in self._data)
+
+    def __str__(self):
+        return self.__repr__()
@@ -5,14 +5,10 @@ from abc import ABC
 import math
 from math import pi
 import numpy as np
-import vtk
 from . import transforms
-from .graphics import VtkPipeline
-from .graphics import axesCube
-from .graphics import axesCubeFloor
-from .graphics import vtk_named_colors
-import pkg_resources
-from scipy.optimize import minimize
+from collections import namedtuple
+
+IKSolution = namedtuple('IKSolution', ['q', 'success', 'iterations', 'searches', 'residual'])
 
 
 class SerialLink:
@@ -28,10 +24,11 @@ class SerialLink:
         :param base: base transform applied to the SerialLink object.
         :param stl_files: STL file names to associate with links. Only works for pre-implemented models in model module.
         :param q: initial angles for link joints.
-        :param colors: colors of STL files.
+        :param colors: colors of STL files, as (R,G,B) lists or vtk color names resolved when rendering.
         """
         self.pipeline = None
         self.links = links
+        self.compile()
         if q is None:
             self.q = np.matrix([0 for each in links])
         if base is None:
@@ -55,7 +52,7 @@ class SerialLink:
         else:
             self.name = name
         if colors is None:
-            self.colors = vtk_named_colors(["Grey"] * len(stl_files))
+            self.colors = ["Grey"] * len(stl_files)
         else:
             self.colors = colors
         if param is None:
@@ -72,6 +69,12 @@ class SerialLink:
     def __iter__(self):
         return (each for each in self.links)
 
+    def __getstate__(self):
+        # vtk objects of the render pipeline can not be pickled, e.g. when sent to worker processes
+        state = self.__dict__.copy()
+        state['pipeline'] = None
+        return state
+
     @property
     def length(self):
         """
@@ -80,6 +83,15 @@ class SerialLink:
         """
         return len(self.links)
 
+    def compile(self):
+        """
+        Builds the compiled kinematic model of the links.
+        Must be called again if DH parameters of the links are modified after construction.
+        :return: null.
+        """
+        self.kinematic_model = KinematicModel(self.links)
+        self._link_buffer = np.empty((self.length, 4, 4))
+
     def fkine(self, stance, unit='rad', apply_stance=False, actor_list=None, timer=None):
         """
         Calculates forward kinematics for a list of joint angles.
@@ -96,44 +108,97 @@ class SerialLink:
             stance = stance * pi / 180
         if timer is None:
             timer = 0
+        link_transforms = self.kinematic_model.link_transforms(np.asarray(stance)[timer], out=self._link_buffer)
         t = self.base
         for i in range(self.length):
             if apply_stance:
                 actor_list[i].SetUserMatrix(transforms.np2vtk(t))
-            t = t * self.links[i].A(stance[timer, i])
+            t = t * link_transforms[i]
         t = t * self.tool
         if apply_stance:
             actor_list[self.length].SetUserMatrix(transforms.np2vtk(t))
         return t
 
+    def fkine_batch(self, stances, unit='rad'):
+        """
+        Calculates forward kinematics for many joint configurations at once.
+        All link transforms are built in one vectorised pass and chained with np.matmul.
+        :param stances: (N, n) array of joint angles, one configuration per row.
+        :param unit: unit of input angles.
+        :return: (N, 4, 4) ndarray of homogeneous transformation matrices.
+        """
+        q = np.array(stances, dtype=np.float64, ndmin=2)
+        assert q.ndim == 2 and q.shape[1] == self.length, "stances must be of shape (N, %d)" % self.length
+        if unit == 'deg':
+            q = q * pi / 180
+        link_transforms = self.kinematic_model.link_transforms(q)
+        t = np.matmul(np.asarray(self.base), link_transforms[:, 0])
+        for i in range(1, self.length):
+            t = np.matmul(t, link_transforms[:, i])
+        return np.matmul(t, np.asarray(self.tool))
+
     def jacobian(self, q, unit='rad'):
         """
         Calculates the geometric jacobian of the robot, for specific joint coordinates 'q'.
         :param q: The joint coordinates for which the jacobian is calculated
-        :param uni: unit of input joint coordinates
+        :param unit: unit of input joint coordinates
+        :return: (6, n) ndarray. Rows are linear then angular velocity, expressed in the world frame.
         """
-        if type(q) is np.ndarray:
-            q = np.asmatrix(q)
-        jacobian = np.zeros((6,self.length+1))
-        i = 0
-        t = self.base
-        On = self.fkine(q,unit=unit)[0:3,3].A1
-        zi = t[0:3,2].A1
-        Oi = t[0:3,3].A1
-        jacobian[:3,i] = np.cross(zi,On-Oi)
-        jacobian[3:,i] = zi
-        for link in self:
-            i += 1
-            t = t * link.A(q[:,0])
-            zi = t[0:3,2].A1
-            Oi = t[0:3,3].A1
-            if link.kind == 'r':
-                jacobian[:3,i] = np.cross(zi,On-Oi)
-                jacobian[3:,i] = zi
-            elif link.kind == 'p':
-                jacobian[:3,i] = zi
-                jacobian[3:,i] = np.zeros((3,1))
-        return jacobian[:,:-1]
+        return self.jacobian_batch(np.asarray(q).reshape(1, self.length), unit=unit)[0]
+
+    def jacobe(self, q, unit='rad'):
+        """
+        Calculates the jacobian of the robot expressed in the end-effector frame, for joint coordinates 'q'.
+        :param q: The joint coordinates for which the jacobian is calculated
+        :param unit: unit of input joint coordinates
+        :return: (6, n) ndarray. Rows are linear then angular velocity, expressed in the end-effector frame.
+        """
+        return self.jacobian_batch(np.asarray(q).reshape(1, self.length), unit=unit, frame='ee')[0]
+
+    def jacobian_batch(self, q, unit='rad', frame='world'):
+        """
+        Calculates the jacobian for many joint configurations at once.
+        :param q: (N, n) array of joint coordinates, one configuration per row.
+        :param unit: unit of input joint coordinates
+        :param frame: 'world' for the geometric jacobian or 'ee' for the end-effector (body) frame jacobian.
+        :return: (N, 6, n) ndarray.
+        """
+        assert frame == 'world' or frame == 'ee', "frame must be 'world' or 'ee'"
+        q = np.array(q, dtype=np.float64, ndmin=2)
+        assert q.ndim == 2 and q.shape[1] == self.length, "q must be of shape (N, %d)" % self.length
+        if unit == 'deg':
+            q = q * pi / 180
+        t, jacobian = self._fkine_jacobian(q)
+        if frame == 'ee':
+            rt = np.swapaxes(t[:, :3, :3], 1, 2)
+            jacobian[:, :3] = np.matmul(rt, jacobian[:, :3])
+            jacobian[:, 3:] = np.matmul(rt, jacobian[:, 3:])
+        return jacobian
+
+    def _fkine_jacobian(self, q):
+        """
+        Internal function computing forward kinematics and the world frame jacobian in a single forward sweep.
+        :param q: (N, n) ndarray of joint coordinates in radians.
+        :return: (N, 4, 4) end-effector transforms and (N, 6, n) jacobians.
+        """
+        n = self.length
+        link_transforms = self.kinematic_model.link_transforms(q)
+        frames = np.empty((q.shape[0], n + 1, 4, 4))
+        frames[:, 0] = self.base
+        for i in range(n):
+            np.matmul(frames[:, i], link_transforms[:, i], out=frames[:, i + 1])
+        t = np.matmul(frames[:, n], np.asarray(self.tool))
+
+        # Joint i moves about the z-axis of frame i-1 (standard DH) or frame i (modified DH)
+        axes = np.where(self.kinematic_model.mdh[:, None, None], frames[:, 1:], frames[:, :-1])
+        z = axes[:, :, :3, 2]
+        o = axes[:, :, :3, 3]
+        revolute = self.kinematic_model.revolute[:, None]
+
+        jacobian = np.empty((q.shape[0], 6, n))
+        jacobian[:, :3] = np.swapaxes(np.where(revolute, _cross(z, t[:, None, :3, 3] - o), z), 1, 2)
+        jacobian[:, 3:] = np.swapaxes(np.where(revolute, z, 0), 1, 2)
+        return t, jacobian
 
     def ikine(self, T, q0=None, unit='rad'):
         """
@@ -150,22 +215,115 @@ class SerialLink:
             reach += abs(link.a) + abs(link.d)
         omega = np.diag([1, 1, 1, 3 / reach])
         if q0 is None:
-            q0 = np.asmatrix(np.zeros((1, self.length)))
+            q0 = np.zeros(self.length)
+        q0 = np.asarray(q0, dtype=np.float64).ravel()
+
         def objective(x):
             return (
                 np.square(((np.linalg.lstsq(T, self.fkine(x))[0]) - np.asmatrix(np.eye(4, 4))) * omega)).sum()
 
+        from .common import optional_import
+        minimize = optional_import('scipy.optimize', 'optimize').minimize
         sol = minimize(objective, x0=q0, bounds=bounds)
         if unit == 'deg':
             return np.asmatrix(sol.x * 180 / pi)
         else:
             return np.asmatrix(sol.x)
 
-    def plot(self, stance, unit='rad'):
+    def ikine_lm(self, T, q0=None, unit='rad', tol=1e-10, ilimit=50, slimit=20, damping=0.1):
+        """
+        Calculates inverse kinematics for homogeneous transformation matrix using the Levenberg-Marquardt
+        (damped least squares) method. Joint coordinates are kept within the qlim of each link, revolute
+        joints being wrapped by 2*pi into their limits where possible.
+        :param T: homogeneous transformation matrix.
+        :param q0: initial list of joint angles, in radians.
+        :param unit: preferred unit for returned joint angles. Allowed values: 'rad' or 'deg'.
+        :param tol: convergence tolerance on the norm of the pose error.
+        :param ilimit: maximum number of iterations per search.
+        :param slimit: maximum number of searches. Searches after the first restart from random joint angles.
+        :param damping: damping gain, scaled by the squared pose error at each iteration.
+        :return: IKSolution(q, success, iterations, searches, residual) where q is a 1xn np.matrix of joint angles.
+        """
+        T = np.asarray(T, dtype=np.float64)
+        assert T.shape == (4, 4)
+        lower, upper = self.kinematic_model.qlim
+        if q0 is None:
+            q0 = np.zeros(self.length)
+        q = self.kinematic_model.wrap(np.array(q0, dtype=np.float64).ravel())
+        eye = np.eye(self.length)
+
+        iterations = 0
+        for searches in range(1, slimit + 1):
+            t, jacobian = self._fkine_jacobian(q[None])
+            e = _pose_error(t[0], T)
+            residual = np.linalg.norm(e)
+            gain = damping
+            i = 0
+            while residual > tol and i < ilimit:
+                i += 1
+                j = jacobian[0]
+                dq = np.linalg.solve(np.dot(j.T, j) + (gain * 0.5 * residual ** 2 + 1e-9) * eye, np.dot(j.T, e))
+                q_new = self.kinematic_model.wrap(q + dq)
+                t_new, jacobian_new = self._fkine_jacobian(q_new[None])
+                e_new = _pose_error(t_new[0], T)
+                residual_new = np.linalg.norm(e_new)
+                if residual_new < residual:
+                    q, e, residual, jacobian = q_new, e_new, residual_new, jacobian_new
+                else:
+                    # Step rejected, move towards gradient descent
+                    gain = gain * 2
+                    if gain > 1e8:
+                        break
+            iterations += i
+            if residual <= tol:
+                break
+            q = np.random.uniform(np.maximum(lower, -pi), np.minimum(upper, pi))
+
+        if unit == 'deg':
+            q = q * 180 / pi
+        return IKSolution(np.asmatrix(q), bool(residual <= tol), iterations, searches, float(residual))
+
+    def ikine_batch(self, T, q0=None, unit='rad', processes=None, **kwargs):
+        """
+        Calculates inverse kinematics for a sequence of poses, such as a Cartesian trajectory, using ikine_lm.
+        Each solve is seeded with the solution of the previous pose. With processes > 1 the sequence is split
+        into that many contiguous segments which are solved in a process pool, each segment seeded with q0.
+        :param T: SE3 object, list of homogeneous transformation matrices or (N, 4, 4) ndarray.
+        :param q0: initial list of joint angles for the first pose of every segment, in radians.
+        :param unit: preferred unit for returned joint angles. Allowed values: 'rad' or 'deg'.
+        :param processes: number of worker processes. None or 1 solves in the calling process.
+        :param kwargs: passed on to ikine_lm.
+        :return: IKSolution(q, success, iterations, searches, residual) of arrays with one row per pose.
+        """
+        if hasattr(T, 'data') and not isinstance(T, np.ndarray):
+            T = T.data
+        T = np.array(T, dtype=np.float64, ndmin=3)
+        assert T.shape[1:] == (4, 4), "T must be of shape (N, 4, 4)"
+        if q0 is None:
+            q0 = np.zeros(self.length)
+        q0 = np.array(q0, dtype=np.float64).ravel()
+
+        if processes is None or processes <= 1 or T.shape[0] < 2:
+            sol = _ikine_segment(self, T, q0, kwargs)
+        else:
+            segments = np.array_split(T, min(processes, T.shape[0]))
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                futures = [executor.submit(_ikine_segment, self, segment, q0, kwargs) for segment in segments]
+                results = [future.result() for future in futures]
+            sol = IKSolution(*[np.concatenate(each) for each in zip(*results)])
+
+        if unit == 'deg':
+            sol = sol._replace(q=sol.q * 180 / pi)
+        return sol
+
+    def plot(self, stance, unit='rad', quality=None):
         """
         Plots the SerialLink object in a desired stance.
         :param stance: list of joint angles for SerialLink object.
         :param unit: unit of input angles.
+        :param quality: level of detail of link meshes, 'high', 'medium' or 'low'.
+        Chosen per link by its distance to the camera if None.
         :return: null.
         """
 
@@ -174,43 +332,121 @@ class SerialLink:
         if unit == 'deg':
             stance = stance * (pi / 180)
 
+        from .graphics import VtkPipeline
         self.pipeline = VtkPipeline()
-        self.pipeline.reader_list, self.pipeline.actor_list, self.pipeline.mapper_list = self.__setup_pipeline_objs()
+        self.__setup_scene(self.pipeline, stance, quality)
+        self.pipeline.render()
 
-        self.fkine(stance, apply_stance=True, actor_list=self.pipeline.actor_list)
+    def __setup_scene(self, pipeline, stances, quality=None):
+        """
+        Internal function to populate a pipeline with the link actors, posed at the first row of stances,
+        and the floor with cube axes.
+        :param pipeline: VtkPipeline object.
+        :param stances: nx6 dimensional input matrix of joint angles in radians.
+        :param quality: level of detail of link meshes, chosen by camera distance if None.
+        :return: null
+        """
+        from .graphics import axesCubeFloor
+        pipeline.mesh_list, pipeline.actor_list, pipeline.mapper_list = self.__setup_pipeline_objs(pipeline, quality)
+
+        self.fkine(stances, apply_stance=True, actor_list=pipeline.actor_list)
+        for each in pipeline.actor_list:
+            each.SetScale(self.scale)
 
-        cube_axes = axesCubeFloor(self.pipeline.ren,
+        cube_axes = axesCubeFloor(pipeline.ren,
                                   self.param.get("cube_axes_x_bounds"),
                                   self.param.get("cube_axes_y_bounds"),
                                   self.param.get("cube_axes_z_bounds"),
                                   self.param.get("floor_position"))
 
-        self.pipeline.add_actor(cube_axes)
+        pipeline.add_actor(cube_axes)
 
-        for each in self.pipeline.actor_list:
-            each.SetScale(self.scale)
+    def render_frames(self, stances, unit='rad', size=(640, 480), quality=None):
+        """
+        Renders SerialLink object offscreen over nx6 dimensional input matrix, one frame per row of joint angles.
+        Needs no display, e.g. for CI or servers.
+        :param stances: nx6 dimensional input matrix.
+        :param unit: unit of input angles. Allowed values: 'rad' or 'deg'
+        :param size: (width, height) of the frames in pixels.
+        :param quality: level of detail of link meshes, 'high', 'medium' or 'low'.
+        Chosen per link by its distance to the camera if None.
+        :return: (n, height, width, 3) uint8 ndarray of frames.
+        """
+        stances = np.asmatrix(stances)
+        frames = np.empty((stances.shape[0], size[1], size[0], 3), dtype=np.uint8)
+        for i, frame in enumerate(self._offscreen_frames(stances, unit, size, quality)):
+            frames[i] = frame
+        return frames
 
-        self.pipeline.render()
+    def record(self, stances, filename, unit='rad', fps=25, size=(640, 480), quality=None, **kwargs):
+        """
+        Renders SerialLink object offscreen over nx6 dimensional input matrix and streams the frames to a
+        video or image file, e.g. .mp4 or .gif, as they are rendered.
+        :param stances: nx6 dimensional input matrix.
+        :param filename: output file, its format is chosen by imageio from the extension.
+        :param unit: unit of input angles. Allowed values: 'rad' or 'deg'
+        :param fps: frames per second of the output.
+        :param size: (width, height) of the frames in pixels.
+        :param quality: level of detail of link meshes, chosen by camera distance if None.
+        :param kwargs: passed on to imageio.get_writer.
+        :return: null
+        """
+        from .common import optional_import
+        imageio = optional_import('imageio', 'graphics')
+        with imageio.get_writer(filename, fps=fps, **kwargs) as writer:
+            for frame in self._offscreen_frames(stances, unit, size, quality):
+                writer.append_data(frame)
+
+    def _offscreen_frames(self, stances, unit, size, quality=None):
+        """
+        Internal generator of offscreen rendered frames, one per row of stances.
+        """
+        from .graphics import VtkPipeline
+        stances = np.asmatrix(stances)
+        if stances.shape[0] == 0:
+            return
+        if unit == 'deg':
+            stances = stances * (pi / 180)
+
+        pipeline = VtkPipeline(offscreen=True, size=size)
+        self.__setup_scene(pipeline, stances, quality)
+        pipeline.render(ui=False)
+
+        for i in range(stances.shape[0]):
+            self.fkine(stances, apply_stance=True, actor_list=pipeline.actor_list, timer=i)
+            yield pipeline.capture()
 
-    def __setup_pipeline_objs(self):
+    def __setup_pipeline_objs(self, pipeline=None, quality=None):
         """
         Internal function to initialise vtk objects.
-        :return: reader_list, actor_list, mapper_list
+        Link meshes come from the process-wide mesh cache, shared with other pipelines and SerialLink objects.
+        :param pipeline: VtkPipeline object, whose renderer picks the level of detail of each link if quality is None.
+        :param quality: level of detail of link meshes, 'high', 'medium', 'low' or an index into LOD_REDUCTIONS.
+        :return: mesh_list, actor_list, mapper_list
         """
-        reader_list = [0] * len(self.stl_files)
+        from .graphics import vtk, vtk_named_colors, media_path, load_mesh_lod, lod_level, LodSelector
+        level = 0 if quality is None else lod_level(quality)
+        selector = None
+        if quality is None and pipeline is not None:
+            selector = pipeline.lod_selector = LodSelector(pipeline.ren)
+        mesh_list = [0] * len(self.stl_files)
         actor_list = [0] * len(self.stl_files)
         mapper_list = [0] * len(self.stl_files)
         for i in range(len(self.stl_files)):
-            reader_list[i] = vtk.vtkSTLReader()
-            loc = pkg_resources.resource_filename("robopy", '/'.join(('media', self.name, self.stl_files[i])))
-            reader_list[i].SetFileName(loc)
+            path = media_path(self.name, self.stl_files[i])
+            mesh_list[i] = load_mesh_lod(path, level)
             mapper_list[i] = vtk.vtkPolyDataMapper()
-            mapper_list[i].SetInputConnection(reader_list[i].GetOutputPort())
+            mapper_list[i].SetInputData(mesh_list[i])
             actor_list[i] = vtk.vtkActor()
             actor_list[i].SetMapper(mapper_list[i])
-            actor_list[i].GetProperty().SetColor(self.colors[i])  # (R,G,B)
+            if selector is not None:
+                selector.add(actor_list[i], mapper_list[i], path, level)
+            color = self.colors[i]
+            if type(color) is str:
+                color = vtk_named_colors(color)[0]
+            actor_list[i].GetProperty().SetColor(color)  # (R,G,B)
 
-        return reader_list, actor_list, mapper_list
+        return mesh_list, actor_list, mapper_list
 
     @staticmethod
     def _setup_file_names(num):
@@ -220,19 +456,23 @@ class SerialLink:
 
         return file_names
 
-    def animate(self, stances, unit='rad', frame_rate=25, gif=None):
+    def animate(self, stances, unit='rad', frame_rate=25, gif=None, quality=None):
         """
         Animates SerialLink object over nx6 dimensional input matrix, with each row representing list of 6 joint angles.
         :param stances: nx6 dimensional input matrix.
         :param unit: unit of input angles. Allowed values: 'rad' or 'deg'
         :param frame_rate: frame_rate for animation. Could be any integer more than 1. Higher value runs through stances faster.
+        :param quality: level of detail of link meshes, 'high', 'medium' or 'low'.
+        Chosen per link by its distance to the camera if None.
         :return: null
         """
         if unit == 'deg':
             stances = stances * (pi / 180)
 
+        from .graphics import VtkPipeline, axesCube
         self.pipeline = VtkPipeline(total_time_steps=stances.shape[0] - 1, gif_file=gif)
-        self.pipeline.reader_list, self.pipeline.actor_list, self.pipeline.mapper_list = self.__setup_pipeline_objs()
+        self.pipeline.mesh_list, self.pipeline.actor_list, self.pipeline.mapper_list = \
+            self.__setup_pipeline_objs(self.pipeline, quality)
         self.fkine(stances, apply_stance=True, actor_list=self.pipeline.actor_list)
         self.pipeline.add_actor(axesCube(self.pipeline.ren))
 
@@ -248,6 +488,161 @@ class SerialLink:
         self.pipeline.animate()
 
 
+def _cross(a, b):
+    """
+    Internal function for the cross product of stacks of 3-vectors along the last axis.
+    Cheaper than np.cross for the small stacks evaluated at every solver iteration.
+    """
+    c = np.empty(np.broadcast(a, b).shape)
+    c[..., 0] = a[..., 1] * b[..., 2] - a[..., 2] * b[..., 1]
+    c[..., 1] = a[..., 2] * b[..., 0] - a[..., 0] * b[..., 2]
+    c[..., 2] = a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]
+    return c
+
+
+def _pose_error(t, td):
+    """
+    Internal function to compute the error between two homogeneous transforms as a 6-vector.
+    The rotational error is the angle-axis vector of td * t^-1, expressed in the world frame.
+    :param t: current (4, 4) homogeneous transform.
+    :param td: desired (4, 4) homogeneous transform.
+    :return: (6,) ndarray of translation and rotation errors.
+    """
+    e = np.empty(6)
+    e[:3] = td[:3, 3] - t[:3, 3]
+    r = np.dot(td[:3, :3], t[:3, :3].T)
+    l = np.array([r[2, 1] - r[1, 2], r[0, 2] - r[2, 0], r[1, 0] - r[0, 1]])
+    ln = np.linalg.norm(l)
+    tr = r[0, 0] + r[1, 1] + r[2, 2]
+    if ln > 1e-12:
+        e[3:] = math.atan2(ln, tr - 1) / ln * l
+    elif tr > 0:
+        e[3:] = 0
+    else:
+        # Rotation by pi, axis recovered from the diagonal
+        e[3:] = pi / 2 * (np.diag(r) + 1)
+    return e
+
+
+def _ikine_segment(robot, T, q0, kwargs):
+    """
+    Internal function to solve inverse kinematics along a (N, 4, 4) sequence of poses with warm starts.
+    Defined at module level so it can be sent to worker processes.
+    :return: IKSolution of arrays with one row per pose, joint angles in radians.
+    """
+    n = T.shape[0]
+    q = np.empty((n, robot.length))
+    success = np.empty(n, dtype=bool)
+    iterations = np.empty(n, dtype=int)
+    searches = np.empty(n, dtype=int)
+    residual = np.empty(n)
+    for i in range(n):
+        sol = robot.ikine_lm(T[i], q0=q0, **kwargs)
+        q0 = q[i] = sol.q.A1
+        success[i], iterations[i], searches[i], residual[i] = sol.success, sol.iterations, sol.searches, sol.residual
+    return IKSolution(q, success, iterations, searches, residual)
+
+
+class KinematicModel:
+    """
+    Compiled kinematic model of a chain of links.
+    Constant DH parameters and their trigonometric terms are cached once in a contiguous float64 array.
+    """
+
+    def __init__(self, links):
+        """
+        Compiles the kinematic model.
+        :param links: a list of Link objects.
+        """
+        self.n = len(links)
+        self.params = np.zeros((8, self.n))
+        self.theta, self.d, self.a, self.alpha, self.offset, self.sign, self.sa, self.ca = self.params
+        for i, link in enumerate(links):
+            self.theta[i] = link.theta
+            self.d[i] = link.d
+            self.a[i] = link.a
+            self.alpha[i] = link.alpha
+            self.offset[i] = link.offset or 0
+            self.sign[i] = -1 if link.flip else 1
+        np.sin(self.alpha, out=self.sa)
+        np.cos(self.alpha, out=self.ca)
+        self.revolute = np.array([link.kind == 'r' for link in links])
+        self.qlim = np.empty((2, self.n))
+        for i, link in enumerate(links):
+            if isinstance(link.qlim, (tuple, list)) and len(link.qlim) == 2:
+                self.qlim[:, i] = link.qlim
+            else:
+                self.qlim[:, i] = (-np.inf, np.inf)
+        self.mdh = np.array([bool(link.mdh) for link in links])
+
+    def wrap(self, q):
+        """
+        Brings joint coordinates within the joint limits.
+        Revolute joints are wrapped by multiples of 2*pi where that lands them within limits, then all are clipped.
+        :param q: (n,) or (N, n) array of joint coordinates in radians.
+        :return: ndarray of joint coordinates within limits.
+        """
+        lower, upper = self.qlim
+        wrapped = np.where(np.isfinite(lower), lower + np.mod(q - lower, 2 * pi), q)
+        q = np.where(self.revolute & (wrapped <= upper), wrapped, q)
+        return np.clip(q, lower, upper)
+
+    def link_transforms(self, q, out=None):
+        """
+        Writes the transform of every link for one or many joint configurations.
+        :param q: (n,) or (N, n) array of joint coordinates in radians.
+        :param out: optional preallocated float64 buffer of shape q.shape + (4, 4).
+        :return: (n, 4, 4) or (N, n, 4, 4) ndarray of link transforms.
+        """
+        q = np.asarray(q, dtype=np.float64)
+        assert q.shape[-1] == self.n, "Expected %d joint coordinates" % self.n
+        if out is None:
+            out = np.empty(q.shape + (4, 4))
+        else:
+            assert out.shape == q.shape + (4, 4) and out.dtype == np.float64
+
+        qj = q * self.sign + self.offset
+        theta = np.where(self.revolute, qj, self.theta)
+        d = np.where(self.revolute, self.d, qj)
+        st = np.sin(theta, out=out[..., 1, 0])
+        ct = np.cos(theta, out=out[..., 0, 0])
+
+        np.multiply(st, -self.ca, out=out[..., 0, 1])
+        np.multiply(st, self.sa, out=out[..., 0, 2])
+        np.multiply(ct, self.a, out=out[..., 0, 3])
+        np.multiply(ct, self.ca, out=out[..., 1, 1])
+        np.multiply(ct, -self.sa, out=out[..., 1, 2])
+        np.multiply(st, self.a, out=out[..., 1, 3])
+        out[..., 2, 0] = 0
+        out[..., 2, 1] = self.sa
+        out[..., 2, 2] = self.ca
+        out[..., 2, 3] = d
+        out[..., 3, :3] = 0
+        out[..., 3, 3] = 1
+
+        if self.mdh.any():
+            # Modified DH convention
+            m = self.mdh
+            st, ct, d = st[..., m], ct[..., m], d[..., m]
+            sa, ca, a = self.sa[m], self.ca[m], self.a[m]
+            mdh = np.zeros(st.shape + (4, 4))
+            mdh[..., 0, 0] = ct
+            mdh[..., 0, 1] = -st
+            mdh[..., 0, 3] = a
+            mdh[..., 1, 0] = st * ca
+            mdh[..., 1, 1] = ct * ca
+            mdh[..., 1, 2] = -sa
+            mdh[..., 1, 3] = -sa * d
+            mdh[..., 2, 0] = st * sa
+            mdh[..., 2, 1] = ct * sa
+            mdh[..., 2, 2] = ca
+            mdh[..., 2, 3] = ca * d
+            mdh[..., 3, 3] = 1
+            out[..., m, :, :] = mdh
+
+        return out
+
+
 class Link(ABC):
     """
     Link object class.
@@ -4,26 +4,60 @@
 import numpy as np
 from . import check_args
 from abc import ABC, abstractmethod
-import numpy.testing as npt
 from . import pose
 
 
 class SuperPose(ABC):
+    # Matrices of a pose object are stored in one contiguous (N, d, d) float64 ndarray, self._data
+
+    @classmethod
+    def _from_array(cls, data):
+        """
+        Creates a pose object wrapping a (N, d, d) ndarray, without copying or validating it.
+        Mostly for internal use only.
+        :param data: (N, d, d) float64 ndarray.
+        :return: pose object
+        """
+        obj = cls(null=True)
+        obj._data = data
+        return obj
+
+    @staticmethod
+    def _stack(matrices, dim):
+        """
+        Stacks matrices into a (N, dim, dim) float64 ndarray rounded to 15 decimal places.
+        Rounding removes eps values.
+        :param matrices: list of matrices or (N, dim, dim) ndarray
+        :param dim: dimension of the square matrices
+        :return: (N, dim, dim) ndarray
+        """
+        data = np.array(matrices, dtype=np.float64).reshape(-1, dim, dim)
+        return np.round(data, 15, out=data)
+
     @property
     def length(self):
         """
         Property to return number of matrices in pose object
         :return: int
         """
-        return len(self._list)
+        return self._data.shape[0]
+
+    @property
+    def array(self):
+        """
+        Returns the matrices of the pose object as one ndarray. No copy is made.
+        :return: (N, d, d) ndarray.
+        """
+        return self._data
 
     @property
     def data(self):
         """
         Always returns a list containing the matrices of the pose object.
+        The matrices are views into the array of the pose object.
         :return: A list of matrices.
         """
-        return self._list
+        return [np.asmatrix(each) for each in self._data]
 
     @property
     def mat(self):
@@ -31,10 +65,10 @@ class SuperPose(ABC):
         Property to return the matrices of pose object.
         :return: Returns np.matrix type if only one matrix is present. Else returns a list of np.matrix.
         """
-        if len(self._list) == 1:
-            return self._list[0]
-        elif len(self._list) > 1:
-            return self._list
+        if self.length == 1:
+            return np.asmatrix(self._data[0])
+        elif self.length > 1:
+            return self.data
 
     @property
     def isSE(self):
@@ -54,26 +88,21 @@ class SuperPose(ABC):
         Assumed that all matrices have same dimension.
         :return: tuple
         """
-        return self._list[0].shape
+        return self._data.shape[1:]
 
     # TODO !! issym, simplify
 
     def is_equal(self, other):
         if (type(self) is type(other)) and (self.length == other.length):
-            for i in range(self.length):
-                try:
-                    npt.assert_almost_equal(self.data[i], other.data[i])
-                except AssertionError:
-                    return False
-            return True
+            return bool(np.all(np.abs(self._data - other._data) < 1.5e-7))
 
     def append(self, item):
         check_args.super_pose_appenditem(self, item)
         if type(item) is np.matrix:
-            self._list.append(item)
+            item = np.asarray(item, dtype=np.float64)[None]
         else:
-            for each_matrix in item:
-                self._list.append(each_matrix)
+            item = item._data
+        self._data = np.concatenate((self._data, item))
 
     def tr_2_rt(self):
         assert isinstance(self, pose.SE2) or isinstance(self, pose.SE3)
@@ -110,44 +139,65 @@ class SuperPose(ABC):
     def tranimate(self):
         pass  # TODO
 
+    def compose(self, other, outer=False):
+        """
+        Composes the poses of self with the poses of other in a single batched matrix product.
+        Broadcasting rules: N*N is element-wise, 1*N and N*1 apply the single pose to every pose of the other.
+        :param other: pose object of the same type
+        :param outer: If True, every pose of self is composed with every pose of other.
+        Result is ordered self-major, i.e. index i * other.length + j holds self[i] * other[j].
+        :return: pose object
+        """
+        check_args.super_pose_compose_check(self, other, outer)
+        if outer:
+            data = np.matmul(self._data[:, None], other._data[None])
+            data = data.reshape((-1,) + data.shape[2:])
+        else:
+            data = np.matmul(self._data, other._data)
+        return type(self)._from_array(data)
+
     def __mul__(self, other):
         check_args.super_pose_multiply_check(self, other)
         if isinstance(other, SuperPose):
-            new_pose = type(self)(null=True)  # Creates empty poses with no data
-            if self.length == other.length:
-                for i in range(self.length):
-                    mat = self.data[i] * other.data[i]
-                    new_pose.append(mat)
-                return new_pose
+            return self.compose(other)
+        else:
+            # Pose times column vectors. For SE poses, Euclidean points are accepted as well.
+            vec = np.asarray(other, dtype=np.float64)
+            dim = self.dim[1]
+            if vec.shape[0] == dim:
+                mat = np.matmul(self._data, vec)
             else:
-                for each_self_matrix in self:
-                    for each_other_matrix in other:
-                        mat = each_self_matrix * each_other_matrix
-                        new_pose.append(mat)
-            return new_pose
-        elif isinstance(other, np.matrix):
-            mat = []
-            for each_matrix in self:
-                mat.append(each_matrix * other)
-            # TODO !! Return np.matrix or pose object ?
+                mat = np.matmul(self._data[:, :dim - 1, :dim - 1], vec) + self._data[:, :dim - 1, dim - 1:]
+            if isinstance(other, np.matrix):
+                # TODO !! Return np.matrix or pose object ?
+                if len(mat) == 1:
+                    return np.asmatrix(mat[0])
+                elif len(mat) > 1:
+                    return [np.asmatrix(each) for each in mat]
             if len(mat) == 1:
                 return mat[0]
-            elif len(mat) > 1:
-                return mat
+            return mat
+
+    def inv(self):
+        """
+        Returns the inverse pose object, computed for all matrices at once.
+        Rotations are inverted by transposing them. SE poses are inverted as [R' -R't].
+        :return: pose object of same type and length
+        """
+        data = np.empty_like(self._data)
+        n = self.dim[0]
+        if self.isSE:
+            rot = data[:, :n - 1, :n - 1]
+            rot[:] = self._data[:, :n - 1, :n - 1].transpose(0, 2, 1)
+            data[:, :n - 1, n - 1:] = -np.matmul(rot, self._data[:, :n - 1, n - 1:])
+            data[:, n - 1] = self._data[:, n - 1]
+        else:
+            data[:] = self._data.transpose(0, 2, 1)
+        return type(self)._from_array(data)
 
     def __truediv__(self, other):
         check_args.super_pose_divide_check(self, other)
-        new_pose = type(self)(null=True)  # Creates empty poses with no data
-        if self.length == other.length:
-            for i in range(self.length):
-                new_pose.append(self.data[i] * np.linalg.inv(other.data[i]))
-        elif self.length == 1:
-            for i in range(other.length):
-                new_pose.append(np.linalg.inv(self.data[0]) * other.data[i])
-        elif other.length == 1:
-            for i in range(self.length):
-                new_pose.append(self.data[i] * np.linalg.inv(other.data[0]))
-        return new_pose
+        return self.compose(other.inv())
 
     def __add__(self, other):
         check_args.super_pose_add_sub_check(self, other)
@@ -172,17 +222,18 @@ class SuperPose(ABC):
             return mat
 
     def __getitem__(self, item):
-        new_pose = type(self)(null=True)
-        new_pose.append(self._list[item])
-        return new_pose
+        data = self._data[item]
+        if data.ndim == 2:
+            data = data[None]
+        return type(self)._from_array(data)
 
     def __iter__(self):
-        return (each for each in self._list)
+        return (np.asmatrix(each) for each in self._data)
 
     def __repr__(self):
-        if len(self.data) >= 1:
+        if self.length >= 1:
             str = '-----------------------------------------\n'
-            for each in self._list:
+            for each in self._data:
                 array = np.asarray(each)
                 str = str + np.array2string(array) \
                       + '\n-----------------------------------------\n'
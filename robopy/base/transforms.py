@@ -3,12 +3,94 @@
 """ This file contains all of the transforms functions that will be used within the toolbox"""
 import math
 import numpy as np
-from scipy.linalg import expm
 from . import check_args
-from ..tests import test_transforms
 from . import common
-import unittest
-import vtk
+
+
+# ---------------------------------------------------------------------------------------#
+def _rot_stack(theta, unit, axis):
+    """
+    Builds a stack of rotation matrices about one principal axis.
+
+    :param theta: 1-D array-like of N angles
+    :param unit: unit of input passed. 'rad' or 'deg'
+    :param axis: 0, 1 or 2 for rotation about x, y or z
+    :return: (N, 3, 3) ndarray
+    """
+    theta = np.asarray(theta, dtype=np.float64).reshape(-1)
+    if unit == "deg":
+        theta = theta * math.pi / 180
+    ct = np.cos(theta)
+    st = np.sin(theta)
+    i, j = [(1, 2), (2, 0), (0, 1)][axis]
+    mat = np.zeros((theta.shape[0], 3, 3))
+    mat[:, axis, axis] = 1
+    mat[:, i, i] = ct
+    mat[:, j, j] = ct
+    mat[:, i, j] = -st
+    mat[:, j, i] = st
+    return np.round(mat, 15, out=mat)
+
+
+# ---------------------------------------------------------------------------------------#
+def _homog_stack(rot, transl=None):
+    """
+    Builds a stack of homogeneous transforms from a stack of rotation matrices.
+
+    :param rot: (N, d, d) ndarray of rotation matrices
+    :param transl: d translation or (N, d) translations. Zero if None.
+    :return: (N, d+1, d+1) ndarray
+    """
+    n, dim = rot.shape[0], rot.shape[1]
+    mat = np.zeros((n, dim + 1, dim + 1))
+    mat[:, :dim, :dim] = rot
+    if transl is not None:
+        mat[:, :dim, dim] = transl
+    mat[:, dim, dim] = 1
+    return np.round(mat, 15, out=mat)
+
+
+# ---------------------------------------------------------------------------------------#
+def _angle_rows(angles, unit):
+    """
+    Converts a triple of angles, a list of triples or an (N, 3) array of angles to radians.
+
+    :param angles: list, list of lists, np.matrix or ndarray of angle triples
+    :param unit: unit of input passed. 'rad' or 'deg'
+    :return: (N, 3) ndarray in radians
+    """
+    rows = np.asarray(angles, dtype=np.float64).reshape(-1, 3)
+    if unit == 'deg':
+        rows = rows * math.pi / 180
+    return rows
+
+
+# ---------------------------------------------------------------------------------------#
+def _angle_rows_result(angles, mat):
+    """
+    Returns a stack of matrices in the form matching the angles it was computed from.
+    A single triple gives an np.matrix, a list of triples a list of np.matrix,
+    and a 2-D ndarray the (N, d, d) stack itself.
+    """
+    if isinstance(angles, np.ndarray) and not isinstance(angles, np.matrix) and angles.ndim == 2:
+        return mat
+    if mat.shape[0] == 1:
+        return np.asmatrix(mat[0])
+    return [np.asmatrix(each) for each in mat]
+
+
+# ---------------------------------------------------------------------------------------#
+def _rotation_rows(tr):
+    """
+    Returns the rotational parts of a matrix or stack of matrices.
+
+    :param tr: 3x3 or 4x4 matrix, or (N, 3, 3) or (N, 4, 4) ndarray
+    :return: (N, 3, 3) ndarray
+    """
+    tr = np.asarray(tr, dtype=np.float64)
+    if tr.shape[-2:] not in ((3, 3), (4, 4)):
+        raise TypeError('Argument must be a 3x3 or 4x4 matrix.')
+    return tr.reshape((-1,) + tr.shape[-2:])[:, :3, :3]
 
 
 # ---------------------------------------------------------------------------------------#
@@ -16,15 +98,18 @@ def rotx(theta, unit="rad"):
     """
     ROTX gives rotation about X axis
 
-    :param theta: angle for rotation matrix
+    :param theta: angle for rotation matrix, or 1-D array of angles
     :param unit: unit of input passed. 'rad' or 'deg'
-    :return: rotation matrix
+    :return: rotation matrix, or (N, 3, 3) ndarray for an array of angles
 
     rotx(THETA) is an SO(3) rotation matrix (3x3) representing a rotation
     of THETA radians about the x-axis
     rotx(THETA, "deg") as above but THETA is in degrees
+    rotx([THETA1, THETA2, ...]) for a 1-D array of N angles is an (N, 3, 3) ndarray stack
     """
     check_args.unit_check(unit)
+    if np.ndim(theta) > 0:
+        return _rot_stack(theta, unit, 0)
     if unit == "deg":
         theta = theta * math.pi / 180
     ct = math.cos(theta)
@@ -39,15 +124,18 @@ def roty(theta, unit="rad"):
     """
     ROTY Rotation about Y axis
 
-    :param theta: angle for rotation matrix
+    :param theta: angle for rotation matrix, or 1-D array of angles
     :param unit: unit of input passed. 'rad' or 'deg'
-    :return: rotation matrix
+    :return: rotation matrix, or (N, 3, 3) ndarray for an array of angles
 
     roty(THETA) is an SO(3) rotation matrix (3x3) representing a rotation
     of THETA radians about the y-axis
     roty(THETA, "deg") as above but THETA is in degrees
+    roty([THETA1, THETA2, ...]) for a 1-D array of N angles is an (N, 3, 3) ndarray stack
     """
     check_args.unit_check(unit)
+    if np.ndim(theta) > 0:
+        return _rot_stack(theta, unit, 1)
     if unit == "deg":
         theta = theta * math.pi / 180
     ct = math.cos(theta)
@@ -62,15 +150,18 @@ def rotz(theta, unit="rad"):
     """
     ROTZ Rotation about Z axis
 
-    :param theta: angle for rotation matrix
+    :param theta: angle for rotation matrix, or 1-D array of angles
     :param unit: unit of input passed. 'rad' or 'deg'
-    :return: rotation matrix
+    :return: rotation matrix, or (N, 3, 3) ndarray for an array of angles
 
     rotz(THETA) is an SO(3) rotation matrix (3x3) representing a rotation
     of THETA radians about the z-axis
     rotz(THETA, "deg") as above but THETA is in degrees
+    rotz([THETA1, THETA2, ...]) for a 1-D array of N angles is an (N, 3, 3) ndarray stack
     """
     check_args.unit_check(unit)
+    if np.ndim(theta) > 0:
+        return _rot_stack(theta, unit, 2)
     if unit == "deg":
         theta = theta * math.pi / 180
     ct = math.cos(theta)
@@ -85,17 +176,21 @@ def trotx(theta, unit="rad", xyz=[0, 0, 0]):
     """
     TROTX Rotation about X axis
 
-    :param theta: rotation in radians or degrees
+    :param theta: rotation in radians or degrees, or 1-D array of rotations
     :param unit: "rad" or "deg" to indicate unit being used
     :param xyz: the xyz translation, if blank defaults to [0,0,0]
-    :return: homogeneous transform matrix
+    :return: homogeneous transform matrix, or (N, 4, 4) ndarray for an array of rotations
 
     trotx(THETA) is a homogeneous transformation (4x4) representing a rotation
     of THETA radians about the x-axis.
     trotx(THETA, 'deg') as above but THETA is in degrees
     trotx(THETA, 'rad', [x,y,z]) as above with translation of [x,y,z]
+    trotx([THETA1, THETA2, ...]) for a 1-D array of N angles is an (N, 4, 4) ndarray stack,
+    xyz is then a translation shared by all, or an (N, 3) array
     """
     check_args.unit_check(unit)
+    if np.ndim(theta) > 0:
+        return _homog_stack(_rot_stack(theta, unit, 0), xyz)
     tm = rotx(theta, unit)
     tm = np.r_[tm, np.zeros((1, 3))]
     mat = np.c_[tm, np.array([[xyz[0]], [xyz[1]], [xyz[2]], [1]])]
@@ -108,17 +203,21 @@ def troty(theta, unit="rad", xyz=[0, 0, 0]):
     """
     TROTY Rotation about Y axis
 
-    :param theta: rotation in radians or degrees
+    :param theta: rotation in radians or degrees, or 1-D array of rotations
     :param unit: "rad" or "deg" to indicate unit being used
     :param xyz: the xyz translation, if blank defaults to [0,0,0]
-    :return: homogeneous transform matrix
+    :return: homogeneous transform matrix, or (N, 4, 4) ndarray for an array of rotations
 
     troty(THETA) is a homogeneous transformation (4x4) representing a rotation
     of THETA radians about the y-axis.
     troty(THETA, 'deg') as above but THETA is in degrees
     troty(THETA, 'rad', [x,y,z]) as above with translation of [x,y,z]
+    troty([THETA1, THETA2, ...]) for a 1-D array of N angles is an (N, 4, 4) ndarray stack,
+    xyz is then a translation shared by all, or an (N, 3) array
     """
     check_args.unit_check(unit)
+    if np.ndim(theta) > 0:
+        return _homog_stack(_rot_stack(theta, unit, 1), xyz)
     tm = roty(theta, unit)
     tm = np.r_[tm, np.zeros((1, 3))]
     mat = np.c_[tm, np.array([[xyz[0]], [xyz[1]], [xyz[2]], [1]])]
@@ -131,17 +230,21 @@ def trotz(theta, unit="rad", xyz=[0, 0, 0]):
     """
     TROTZ Rotation about Z axis
 
-    :param theta: rotation in radians or degrees
+    :param theta: rotation in radians or degrees, or 1-D array of rotations
     :param unit: "rad" or "deg" to indicate unit being used
     :param xyz: the xyz translation, if blank defaults to [0,0,0]
-    :return: homogeneous transform matrix
+    :return: homogeneous transform matrix, or (N, 4, 4) ndarray for an array of rotations
 
     trotz(THETA) is a homogeneous transformation (4x4) representing a rotation
     of THETA radians about the z-axis.
     trotz(THETA, 'deg') as above but THETA is in degrees
     trotz(THETA, 'rad', [x,y,z]) as above with translation of [x,y,z]
+    trotz([THETA1, THETA2, ...]) for a 1-D array of N angles is an (N, 4, 4) ndarray stack,
+    xyz is then a translation shared by all, or an (N, 3) array
     """
     check_args.unit_check(unit)
+    if np.ndim(theta) > 0:
+        return _homog_stack(_rot_stack(theta, unit, 2), xyz)
     tm = rotz(theta, unit)
     tm = np.r_[tm, np.zeros((1, 3))]
     mat = np.c_[tm, np.array([[xyz[0]], [xyz[1]], [xyz[2]], [1]])]
@@ -221,14 +324,16 @@ def rot2(theta, unit='rad'):
     """
     ROT2 SO(2) Rotational Matrix
 
-    :param theta: rotation in radians or degrees
+    :param theta: rotation in radians or degrees, or 1-D array of rotations
     :param unit: "rad" or "deg" to indicate unit being used
-    :return: rotational matrix (2x2)
+    :return: rotational matrix (2x2), or (N, 2, 2) ndarray for an array of rotations
 
     ROT2(THETA) is an SO(2) rotation matrix (2x2) representing a rotation of THETA radians.
     ROT2(THETA, 'deg') as above but THETA is in degrees.
     """
     check_args.unit_check(unit)
+    if np.ndim(theta) > 0:
+        return np.ascontiguousarray(_rot_stack(theta, unit, 2)[:, :2, :2])
     if unit == "deg":
         theta = theta * math.pi / 180
     ct = math.cos(theta)
@@ -243,9 +348,9 @@ def trot2(theta, unit='rad'):
     """
     TROT2 SE2 rotation matrix
 
-    :param theta: rotation in radians or degrees
+    :param theta: rotation in radians or degrees, or 1-D array of rotations
     :param unit: "rad" or "deg" to indicate unit being used
-    :return: homogeneous transform matrix (3x3)
+    :return: homogeneous transform matrix (3x3), or (N, 3, 3) ndarray for an array of rotations
 
     TROT2(THETA) is a homogeneous transformation (3x3) representing a rotation of
     THETA radians.
@@ -253,6 +358,8 @@ def trot2(theta, unit='rad'):
     Notes::
     - Translational component is zero.
     """
+    if np.ndim(theta) > 0:
+        return _homog_stack(rot2(theta, unit))
     tm = rot2(theta, unit)
     tm = np.r_[tm, np.zeros((1, 2))]
     mat = np.c_[tm, np.array([[0], [0], [1]])]
@@ -264,10 +371,10 @@ def rpy2r(thetas, order='zyx', unit='rad'):
     """
     RPY2R Roll-pitch-yaw angles to rotation matrix
 
-    :param thetas: list of angles
+    :param thetas: list of angles, list of lists of angles or (N, 3) ndarray of angles
     :param order: 'xyz', 'zyx' or 'yxz'
     :param unit: 'rad' or 'deg'
-    :return: rotation matrix
+    :return: rotation matrix, list of rotation matrices or (N, 3, 3) ndarray for (N, 3) ndarray input
 
     RPY2R(ROLL, PITCH, YAW, OPTIONS) is an SO(3) orthonormal rotation matrix
     (3x3) equivalent to the specified roll, pitch, yaw angles angles.
@@ -293,52 +400,19 @@ def rpy2r(thetas, order='zyx', unit='rad'):
     """
     check_args.unit_check(unit)
     check_args.rpy2r(theta=thetas, order=order)
-    if type(thetas[0]) is float or type(thetas[0]) is int:
-        # TODO
-        # enforce if one element is list.
-        # All are list. OR one element is int or float then all are either int or float
-        thetas = [thetas]  # Put list in a list
-
-    if unit == 'deg':
-        thetas = [[(angles * math.pi / 180) for angles in each_rpy] for each_rpy in thetas]
-    if type(thetas[0]) is list:
-        roll = [theta[0] for theta in thetas]
-        pitch = [theta[1] for theta in thetas]
-        yaw = [theta[2] for theta in thetas]
-
-        if order == 'xyz' or order == 'arm':
-            x = [rotx(theta) for theta in yaw]
-            y = [roty(theta) for theta in pitch]
-            z = [rotz(theta) for theta in roll]
-            xyz = [(x[i] * y[i] * z[i]) for i in range(len(thetas))]
-            xyz = [np.asmatrix(each.round(15)) for each in xyz]
-            if len(xyz) == 1:
-                return xyz[0]
-            else:
-                return xyz
-        if order == 'zyx' or order == 'vehicle':
-            z = [rotz(theta) for theta in yaw]
-            y = [roty(theta) for theta in pitch]
-            x = [rotx(theta) for theta in roll]
-            zyx = [(z[i] * y[i] * x[i]) for i in range(len(thetas))]
-            zyx = [np.asmatrix(each.round(15)) for each in zyx]
-            if len(zyx) == 1:
-                return zyx[0]
-            else:
-                return zyx
-        if order == 'yxz' or order == 'camera':
-            y = [roty(theta) for theta in yaw]
-            x = [rotx(theta) for theta in pitch]
-            z = [rotz(theta) for theta in roll]
-            yxz = [(y[i] * x[i] * z[i]) for i in range(len(thetas))]
-            yxz = [np.asmatrix(each.round(15)) for each in yxz]
-            if len(yxz) == 1:
-                return yxz[0]
-            else:
-                return yxz
+    rpy = _angle_rows(thetas, unit)
+    roll, pitch, yaw = rpy[:, 0], rpy[:, 1], rpy[:, 2]
+
+    if order == 'xyz' or order == 'arm':
+        rot = _rot_stack(yaw, 'rad', 0) @ _rot_stack(pitch, 'rad', 1) @ _rot_stack(roll, 'rad', 2)
+    elif order == 'zyx' or order == 'vehicle':
+        rot = _rot_stack(yaw, 'rad', 2) @ _rot_stack(pitch, 'rad', 1) @ _rot_stack(roll, 'rad', 0)
+    elif order == 'yxz' or order == 'camera':
+        rot = _rot_stack(yaw, 'rad', 1) @ _rot_stack(pitch, 'rad', 0) @ _rot_stack(roll, 'rad', 2)
     else:
-        raise TypeError('thetas must be a list of roll pitch yaw angles\n'
-                        'OR a list of list of roll pitch yaw angles.')
+        raise ValueError("order must be 'xyz'/'arm', 'zyx'/'vehicle' or 'yxz'/'camera'")
+    rot = np.round(rot, 15, out=rot)
+    return _angle_rows_result(thetas, rot)
 
 
 # ---------------------------------------------------------------------------------------#
@@ -346,10 +420,10 @@ def rpy2tr(thetas, order='zyx', unit='rad'):
     """
     RPY2TR Roll-pitch-yaw angles to homogeneous transform
 
-    :param thetas: list of angles
+    :param thetas: list of angles, list of lists of angles or (N, 3) ndarray of angles
     :param order: order can be 'xyz'/'arm', 'zyx'/'vehicle', 'yxz'/'camera'
     :param unit: unit of input angles
-    :return: homogeneous transformation matrix
+    :return: homogeneous transformation matrix, list of them or (N, 4, 4) ndarray for (N, 3) ndarray input
 
     T = RPY2TR(ROLL, PITCH, YAW, OPTIONS) is an SE(3) homogeneous
     transformation matrix (4x4) with zero translation and rotation equivalent
@@ -379,8 +453,10 @@ def rpy2tr(thetas, order='zyx', unit='rad'):
     rot = rpy2r(thetas, order, unit)
     if type(rot) is list:
         rot = [r2t(each) for each in rot]
-    else:
+    elif type(rot) is np.matrix:
         rot = r2t(rot)
+    else:
+        rot = _homog_stack(rot)
     return rot
 
 
@@ -389,8 +465,8 @@ def skew(v):
     """
     SKEW creates Skew-symmetric metrix from vector
 
-    :param v: 1 or 3 vector
-    :return: skew-symmetric matrix
+    :param v: 1 or 3 vector, or (N, 1) or (N, 3) ndarray of vectors
+    :return: skew-symmetric matrix, or (N, 2, 2) or (N, 3, 3) ndarray
     SKEW(V) is a skew-symmetric matrix formed from V.
 
     If V (1x1) then S =
@@ -405,13 +481,23 @@ def skew(v):
     Notes::
     - This is the inverse of the function VEX().
     - These are the generator matrices for the Lie algebras so(2) and so(3).
+    - An np.matrix, scalar or 1-D ndarray is a single vector, a 2-D ndarray is a stack of
+    vectors, one per row.
     """
-    if common.isvec(v, 3):
-        s = np.matrix([[0, -v[0, 2], v[0, 1]], [v[0, 2], 0, -v[0, 0]], [-v[0, 1], v[0, 0], 0]])
-    elif common.isvec(v, 1):
-        s = np.matrix([[0, -v[0, 0]], [v[0, 0], 0]])
-    else:
+    single = isinstance(v, np.matrix) or np.ndim(v) <= 1
+    v = np.asarray(v, dtype=np.float64)
+    if single:
+        v = v.reshape(1, -1)
+    if v.ndim != 2 or v.shape[1] not in (1, 3):
         raise AttributeError("argument must be a 1- or 3-vector")
+    if v.shape[1] == 3:
+        s = _skew_stack(v)
+    else:
+        s = np.zeros((v.shape[0], 2, 2))
+        s[:, 0, 1] = -v[:, 0]
+        s[:, 1, 0] = v[:, 0]
+    if single:
+        return np.asmatrix(s[0])
     return s
 
 
@@ -420,8 +506,8 @@ def skewa(s):
     """
     SKEWA creates augmented skew-symmetric matrix
 
-    :param s: 3 or 6 vector
-    :return: augmented skew-symmetric matrix
+    :param s: 3 or 6 vector, or (N, 3) or (N, 6) ndarray of vectors
+    :return: augmented skew-symmetric matrix, or (N, 3, 3) or (N, 4, 4) ndarray
 
     SKEWA(V) is an augmented skew-symmetric matrix formed from V.
 
@@ -441,18 +527,23 @@ def skewa(s):
     - These are the generator matrices for the Lie algebras se(2) and se(3).
     - Map twist vectors in 2D and 3D space to se(2) and se(3).
     """
-    s = s.flatten(1)
-    if s.size == 3:
-        omega = np.concatenate((skew(np.matrix(s[0, 2])), [[s[0, 0]], [s[0, 1]]]), axis=1)
-        omega = np.concatenate((omega, [[0, 0, 0]]), axis=0)
-        return omega
-    elif s.size == 6:
-        omega = np.concatenate((skew(np.matrix([s[0, 3], s[0, 4], s[0, 5]])), [[s[0, 0]], [s[0, 1]], [s[0, 2]]]),
-                               axis=1)
-        omega = np.concatenate((omega, [[0, 0, 0, 0]]), axis=0)
-        return omega
-    else:
+    single = isinstance(s, np.matrix) or np.ndim(s) == 1
+    s = np.asarray(s, dtype=np.float64)
+    if single:
+        s = s.reshape(1, -1)
+    if s.ndim != 2 or s.shape[1] not in (3, 6):
         raise AttributeError("expecting a 3- or 6-vector")
+    if s.shape[1] == 3:
+        omega = np.zeros((s.shape[0], 3, 3))
+        omega[:, :2, :2] = skew(s[:, 2:])
+        omega[:, :2, 2] = s[:, :2]
+    else:
+        omega = np.zeros((s.shape[0], 4, 4))
+        omega[:, :3, :3] = _skew_stack(s[:, 3:])
+        omega[:, :3, 3] = s[:, :3]
+    if single:
+        return np.asmatrix(omega[0])
+    return omega
 
 
 # ---------------------------------------------------------------------------------------#
@@ -479,25 +570,29 @@ def angvec2r(theta, v):
     ANGVEC2R(THETA, V) is an orthonormal rotation matrix (3x3)
     equivalent to a rotation of THETA about the vector V.
 
-    :param theta: rotation in radians
-    :param v: vector
-    :return: rotation matrix
+    :param theta: rotation in radians, or (N,) ndarray of rotations
+    :param v: vector, or (N, 3) ndarray of vectors
+    :return: rotation matrix, or (N, 3, 3) ndarray for N rotations
 
     Notes::
     - If THETA == 0 then return identity matrix.
     - If THETA ~= 0 then V must have a finite length.
+    - A scalar THETA with a single vector V, an np.matrix, list or 1-D ndarray, gives an
+    np.matrix, as in SKEW() a 2-D ndarray of vectors gives a stack.
     """
-    if np.isscalar(theta) is False or common.isvec(v) is False:
-        raise AttributeError("Arguments must be theta and vector")
-    # TODO implement ISA
-    elif np.linalg.norm(v) < 10 * np.spacing([1])[0]:
-        if False:
-            raise AttributeError("Bad arguments")
-        else:
-            return np.eye(3)
-    sk = skew(np.matrix(unitize(v)))
-    m = np.eye(3) + np.sin(theta) * sk + (1 - np.cos(theta)) * sk * sk
-    return m
+    if np.ndim(theta) == 0 and (isinstance(v, np.matrix) or np.ndim(v) == 1):
+        if np.size(v) != 3 or (isinstance(v, np.matrix) and common.isvec(v) is False):
+            raise AttributeError("Arguments must be theta and vector")
+        return np.asmatrix(angvec2r(np.array([theta]), np.asarray(v, dtype=np.float64).reshape(1, 3))[0])
+
+    theta = np.asarray(theta, dtype=np.float64).reshape(-1)
+    v = np.asarray(v, dtype=np.float64).reshape(-1, 3)
+    if v.shape[0] != theta.shape[0] and v.shape[0] != 1:
+        raise AttributeError("Arguments must be N angles and 1 or N vectors")
+    n = np.linalg.norm(v, axis=1, keepdims=True)
+    # A vector of zero length gives the identity matrix
+    axis = np.divide(v, n, out=np.zeros_like(v), where=n >= 10 * np.spacing([1])[0])
+    return _so3_exp(axis * theta[:, None])
 
 
 # ---------------------------------------------------------------------------------------#
@@ -506,16 +601,19 @@ def angvec2tr(theta, v):
     ANGVEC2TR(THETA, V) is a homogeneous transform matrix (4x4) equivalent to a
     rotation of THETA about the vector V.
 
-    :param theta: rotation in radians
-    :param v: vector
-    :return: homogenous transform matrix
+    :param theta: rotation in radians, or (N,) ndarray of rotations
+    :param v: vector, or (N, 3) ndarray of vectors
+    :return: homogenous transform matrix, or (N, 4, 4) ndarray for N rotations
 
     Notes::
     - The translational part is zero.
     - If THETA == 0 then return identity matrix.
     - If THETA ~= 0 then V must have a finite length.
     """
-    return r2t(angvec2r(theta, v))
+    rot = angvec2r(theta, v)
+    if type(rot) is np.matrix:
+        return r2t(rot)
+    return _homog_stack(rot)
 
 
 # ---------------------------------------------------------------------------------------#
@@ -523,8 +621,8 @@ def vex(s):
     """
     VEX Convert skew-symmetric matrix to vector
 
-    :param s:skew-symmetric matrix
-    :return: vector
+    :param s: skew-symmetric matrix, or (N, 2, 2) or (N, 3, 3) ndarray of them
+    :return: vector, or (N, 1) or (N, 3) ndarray
 
     VEX(S) is the vector which has the corresponding skew-symmetric matrix S.
     In the case that S (2x2) then V is 1x1
@@ -541,13 +639,18 @@ def vex(s):
     is actually skew-symmetric.
     - The function takes the mean of the two elements that correspond to each unique
     element of the matrix.
+    - An np.matrix or 2-D ndarray is a single matrix, a 3-D ndarray is a stack of matrices.
     """
-    if s.shape == (3, 3):
-        return 0.5 * np.matrix([[s[2, 1] - s[1, 2]], [s[0, 2] - s[2, 0]], [s[1, 0] - s[0, 1]]])
-    elif s.shape == (2, 2):
-        return 0.5 * np.matrix([[s[1, 0] - s[0, 1]]])
-    else:
+    single = isinstance(s, np.matrix) or np.ndim(s) == 2
+    s = np.asarray(s, dtype=np.float64)
+    if single:
+        s = s[None]
+    if s.ndim != 3 or s.shape[1:] not in ((2, 2), (3, 3)):
         raise AttributeError("Argument must be 2x2 or 3x3 matrix")
+    v = _vex_stack(s).reshape(s.shape[0], -1)
+    if single:
+        return np.asmatrix(v).T
+    return v
 
 
 # ---------------------------------------------------------------------------------------#
@@ -610,12 +713,160 @@ def rt2tr(r, t):
         return tr
 
 
+# ---------------------------------------------------------------------------------------#
+def _skew_stack(v):
+    """
+    Skew-symmetric matrices of a stack of 3-vectors.
+
+    :param v: (N, 3) ndarray
+    :return: (N, 3, 3) ndarray
+    """
+    s = np.zeros((v.shape[0], 3, 3))
+    s[:, 0, 1] = -v[:, 2]
+    s[:, 0, 2] = v[:, 1]
+    s[:, 1, 0] = v[:, 2]
+    s[:, 1, 2] = -v[:, 0]
+    s[:, 2, 0] = -v[:, 1]
+    s[:, 2, 1] = v[:, 0]
+    return s
+
+
+# ---------------------------------------------------------------------------------------#
+def _vex_stack(s):
+    """
+    Vectors of a stack of skew-symmetric matrices, from the mean of each pair of elements.
+
+    :param s: (N, 3, 3) or (N, 2, 2) ndarray
+    :return: (N, 3) or (N,) ndarray
+    """
+    if s.shape[1:] == (2, 2):
+        return 0.5 * (s[:, 1, 0] - s[:, 0, 1])
+    return 0.5 * np.stack((s[:, 2, 1] - s[:, 1, 2], s[:, 0, 2] - s[:, 2, 0], s[:, 1, 0] - s[:, 0, 1]), axis=1)
+
+
+# ---------------------------------------------------------------------------------------#
+def _exp_coefficients(theta):
+    """
+    Coefficients sin(t)/t, (1-cos(t))/t^2 and (t-sin(t))/t^3 of the Rodrigues formulas.
+    Taylor series are used for small angles, where the closed forms lose precision.
+
+    :param theta: ndarray of angles
+    :return: a, b, c ndarrays
+    """
+    small = np.abs(theta) < 1e-2
+    t = np.where(small, 1, theta)
+    t2 = theta * theta
+    a = np.where(small, 1 - t2 / 6 + t2 * t2 / 120, np.sin(t) / t)
+    b = np.where(small, 0.5 - t2 / 24 + t2 * t2 / 720, (1 - np.cos(t)) / t ** 2)
+    c = np.where(small, 1 / 6 - t2 / 120 + t2 * t2 / 5040, (t - np.sin(t)) / t ** 3)
+    return a, b, c
+
+
+# ---------------------------------------------------------------------------------------#
+def _so3_exp(w):
+    """
+    Rotation matrices of a stack of rotation vectors, R = I + a[w] + b[w]^2.
+
+    :param w: (N, 3) ndarray, axis times angle
+    :return: (N, 3, 3) ndarray
+    """
+    a, b, _ = _exp_coefficients(np.linalg.norm(w, axis=1))
+    sk = _skew_stack(w)
+    return np.eye(3) + a[:, None, None] * sk + b[:, None, None] * np.matmul(sk, sk)
+
+
+# ---------------------------------------------------------------------------------------#
+def _se3_exp(tw):
+    """
+    Homogeneous transforms of a stack of twists [v w], t = (I + b[w] + c[w]^2) v.
+
+    :param tw: (N, 6) ndarray
+    :return: (N, 4, 4) ndarray
+    """
+    w = tw[:, 3:]
+    a, b, c = _exp_coefficients(np.linalg.norm(w, axis=1))
+    sk = _skew_stack(w)
+    sk2 = np.matmul(sk, sk)
+    mat = np.zeros((tw.shape[0], 4, 4))
+    mat[:, :3, :3] = np.eye(3) + a[:, None, None] * sk + b[:, None, None] * sk2
+    v = np.eye(3) + b[:, None, None] * sk + c[:, None, None] * sk2
+    mat[:, :3, 3] = np.matmul(v, tw[:, :3, None])[:, :, 0]
+    mat[:, 3, 3] = 1
+    return mat
+
+
+# ---------------------------------------------------------------------------------------#
+def _so2_exp(theta):
+    """
+    Rotation matrices of a stack of angles.
+
+    :param theta: (N,) ndarray
+    :return: (N, 2, 2) ndarray
+    """
+    mat = np.empty((theta.shape[0], 2, 2))
+    mat[:, 0, 0] = mat[:, 1, 1] = np.cos(theta)
+    mat[:, 1, 0] = np.sin(theta)
+    mat[:, 0, 1] = -mat[:, 1, 0]
+    return mat
+
+
+# ---------------------------------------------------------------------------------------#
+def _se2_exp(tw):
+    """
+    Homogeneous transforms of a stack of se(2) twists [vx vy theta].
+
+    :param tw: (N, 3) ndarray
+    :return: (N, 3, 3) ndarray
+    """
+    theta = tw[:, 2]
+    a, b, _ = _exp_coefficients(theta)
+    b = b * theta
+    mat = np.zeros((tw.shape[0], 3, 3))
+    mat[:, :2, :2] = _so2_exp(theta)
+    mat[:, 0, 2] = a * tw[:, 0] - b * tw[:, 1]
+    mat[:, 1, 2] = b * tw[:, 0] + a * tw[:, 1]
+    mat[:, 2, 2] = 1
+    return mat
+
+
+# ---------------------------------------------------------------------------------------#
+def _so3_log(rot):
+    """
+    Angles and unit axes of a stack of rotation matrices.
+    The angle is computed from both its sine and cosine, so it is accurate near 0 and pi.
+    Beyond pi/2 the axis is taken from the symmetric part of R, which stays well
+    conditioned up to pi; its sign is recovered from the skew-symmetric part.
+
+    :param rot: (N, 3, 3) ndarray
+    :return: theta (N,) ndarray in [0, pi], axes (N, 3) ndarray, zero for the identity
+    """
+    anti = _vex_stack(rot)
+    sin = np.linalg.norm(anti, axis=1)
+    cos = (np.trace(rot, axis1=1, axis2=2) - 1) / 2
+    theta = np.arctan2(sin, cos)
+    axis = np.zeros_like(anti)
+
+    general = (cos >= 0) & (sin > 0)
+    axis[general] = anti[general] / sin[general, None]
+
+    large = cos < 0
+    if large.any():
+        sym = (rot[large] + rot[large].transpose(0, 2, 1)) / 2 - cos[large, None, None] * np.eye(3)
+        k = np.argmax(np.diagonal(sym, axis1=1, axis2=2), axis=1)
+        rows = np.arange(k.shape[0])
+        col = sym[rows, :, k]
+        n = col / np.sqrt(sym[rows, k, k] * (1 - cos[large]))[:, None]
+        sign = np.where(np.sum(n * anti[large], axis=1) < 0, -1, 1)
+        axis[large] = n * sign[:, None]
+    return theta, axis
+
+
 # ---------------------------------------------------------------------------------------#
 def trlog(T):
     """
     TRLOG logarithm of SO(3) or SE(3) matrix
 
-    :param T: SO(3) or SE(3) Matrix
+    :param T: SO(3) or SE(3) Matrix, or (N, 3, 3) or (N, 4, 4) ndarray of them
     :return: [rotation, vector]
 
     [theta,w] = trlog(R) as above but returns directly theta the rotation angle and w
@@ -624,117 +875,126 @@ def trlog(T):
     [theta,twist] = trlog(T) as above but returns directly theta the rotation angle
     and a twist vector (6x1) comprising [v w].
 
+    For a stack of N matrices theta is (N,) and w or twist are (N, 3) or (N, 6) ndarrays.
+
     Notes::
     - Efficient closed-form solution of the matrix logarithm for arguments that are
     SO(3) or SE(3).
     - Special cases of rotation by odd multiples of pi are handled.
     - Angle is always in the interval [0,pi].
+    - A pure translation gives theta = 1 and twist [t 0].
+    - An np.matrix or 2-D ndarray is a single matrix, a 3-D ndarray is a stack of matrices.
     """
-    tr = T.trace()
-    if common.isrot(T):
-        # deal with rotation matrix
-        R = T
-        if abs(tr[0, 0] - 3) < 100 * np.spacing([1])[0]:
-            # matrix is identity
-            w = [0, 0, 0]
-            theta = 0
-        elif abs(tr[0, 0] + 1) < 100 * np.spacing([1])[0]:
-            # tr R = -1
-            # rotation by +/- po, +/- 3pi ect
-            mx = R.diagonal().max()
-            k = R.diagonal().argmax()
-            I = np.eye(3)
-            col = R[:, k] + I[:, k]
-            w = col / np.sqrt(2 * (1 + mx))
-            theta = np.pi
-        else:
-            # general case
-            theta = np.arccos((tr[0, 0] - 1) / 2)
-            skw = (R - R.conj().transpose()) / 2 / np.sin(theta)
-            w = vex(skw)
-        return [theta, w]
-    elif common.ishomog(T, [T.shape[0], T.shape[1]]):
-        # SE(3) matrix
-        [R, t] = tr2rt(T)
-
-        if (tr - 3) < 100 * np.spacing([1])[0]:
-            # is identity matrix
-            w = np.matrix([[0, 0, 0]])
-            v = t
-            theta = 1
-            skw = np.zeros(3)
-        else:
-            [theta, w] = trlog(R)
-            skw = skew(w)
-
-        Ginv = np.eye(3) / theta - skw / 2 + (1 / theta - 1 / np.tan(theta / 2) / 2) * skw ** 2
-        v = Ginv * t
-        return [theta, w]
-    else:
+    single = isinstance(T, np.matrix) or np.ndim(T) == 2
+    T = np.asarray(T, dtype=np.float64)
+    if single:
+        T = T[None]
+    if T.ndim != 3 or T.shape[1:] not in ((3, 3), (4, 4)):
         raise AttributeError("Expect SO(3) or SE(3) matrix")
 
+    theta, w = _so3_log(T[:, :3, :3])
+    if T.shape[1] == 3:
+        if single:
+            return [theta[0], np.asmatrix(w[0]).T]
+        return [theta, w]
+
+    # SE(3), t = G v with G^-1 = I/theta - [w]/2 + (1/theta - cot(theta/2)/2) [w]^2
+    transl = T[:, :3, 3]
+    translation = theta < 10 * np.spacing([1])[0]
+    theta = np.where(translation, 1, theta)
+    small = theta < 1e-2
+    t = np.where(small, 1, theta)
+    coeff = np.where(small, theta / 12 + theta ** 3 / 720, 1 / t - 1 / np.tan(t / 2) / 2)
+    sk = _skew_stack(w)
+    ginv = np.eye(3) / theta[:, None, None] - sk / 2 + coeff[:, None, None] * np.matmul(sk, sk)
+    v = np.matmul(ginv, transl[:, :, None])[:, :, 0]
+    v[translation] = transl[translation]
+    twist = np.concatenate((v, w), axis=1)
+    if single:
+        return [theta[0], np.asmatrix(twist[0]).T]
+    return [theta, twist]
+
+
+# ---------------------------------------------------------------------------------------#
+def trlog2(T):
+    """
+    TRLOG2 logarithm of SO(2) or SE(2) matrix
+
+    :param T: SO(2) or SE(2) Matrix, or (N, 2, 2) or (N, 3, 3) ndarray of them
+    :return: rotation angle, or twist vector
+
+    theta = trlog2(R) is the rotation angle of R.
+
+    twist = trlog2(T) is the se(2) twist (1x3) [vx vy theta] such that
+    trexp2(twist) = T.
+
+    For a stack of N matrices the result is an (N,) or (N, 3) ndarray.
+    An np.matrix or 2-D ndarray is a single matrix, a 3-D ndarray is a stack of matrices.
+    """
+    single = isinstance(T, np.matrix) or np.ndim(T) == 2
+    T = np.asarray(T, dtype=np.float64)
+    if single:
+        T = T[None]
+    if T.ndim != 3 or T.shape[1:] not in ((2, 2), (3, 3)):
+        raise AttributeError("Expect SO(2) or SE(2) matrix")
+
+    theta = np.arctan2(T[:, 1, 0], T[:, 0, 0])
+    if T.shape[1] == 2:
+        return theta[0] if single else theta
+
+    # t = V v with V = [a -b; b a], a = sin(theta)/theta, b = (1 - cos(theta))/theta
+    a, b, _ = _exp_coefficients(theta)
+    b = b * theta
+    det = a * a + b * b
+    twist = np.empty((T.shape[0], 3))
+    twist[:, 0] = (a * T[:, 0, 2] + b * T[:, 1, 2]) / det
+    twist[:, 1] = (-b * T[:, 0, 2] + a * T[:, 1, 2]) / det
+    twist[:, 2] = theta
+    return np.asmatrix(twist) if single else twist
+
 
 # ------------------------------------------------------------------------------------------------------------------- #
 def tr2angvec(tr, unit='rad'):
     """
     TR2ANGVEC Convert rotation matrix to angle-vector form
-    :param tr: Rotation matrix
+    :param tr: Rotation matrix, or (N, 3, 3) or (N, 4, 4) ndarray of matrices
     :param unit: 'rad' or 'deg'
-    :return: Angle-vector form
+    :return: [theta, v], angle and 1x3 axis, or (N,) and (N, 3) ndarrays for N matrices
     TR2ANGVEC(R, OPTIONS) is rotation expressed in terms of an angle THETA (1x1) about the axis V (1x3) equivalent to the orthonormal rotation matrix R (3x3).
     TR2ANGVEC(T, OPTIONS) as above but uses the rotational part of the homogeneous transform T (4x4).
-    If R (3x3xK) or T (4x4xK) represent a sequence then THETA (Kx1)is a vector of angles for corresponding elements of the sequence and V (Kx3) are the corresponding axes, one per row.
+    If R (Kx3x3) or T (Kx4x4) represent a sequence then THETA (K)is a vector of angles for corresponding elements of the sequence and V (Kx3) are the corresponding axes, one per row.
     Options::
     'deg'   Return angle in degrees
     Notes::
     - For an identity rotation matrix both THETA and V are set to zero.
     - The rotation angle is always in the interval [0 pi], negative rotation is handled by inverting the direction of the rotation axis.
-    - If no output arguments are specified the result is displayed.
     """
     check_args.unit_check(unit)
     check_args.tr2angvec(tr=tr, unit=unit)
+    single = isinstance(tr, np.matrix) or np.ndim(tr) == 2
+    rot = _rotation_rows(tr)
 
-    if common.isrot(tr) is False:
-        tr = t2r(tr)
-
-    if common.isrot(tr) or common.ishomog(tr, dim=[4, 4]):
-        if tr.ndim > 2:
-            theta = np.zeros([tr.shape[2], 1])
-            n = np.zeros([tr.shape[2], 3])
-        else:
-            theta = np.zeros([1, 1])
-            n = np.zeros([1, 3])
-
-        for i in range(0, theta.shape[0]):
-            if theta.shape[0] == 1:
-                tri = tr[:, :]
-            else:
-                tri = tr[i, :, :]
-
-            if abs(np.linalg.det(tri) - 1) < 10 * np.spacing([1])[0]:
-                [th, v] = trlog(tri)
-                theta[i, 0] = th
-                n[i, :] = v
-                if unit == 'deg':
-                    theta[i, 0] = theta[i, 0] * 180 / math.pi
-                print('Rotation: ', theta[i, 0], unit, 'x', '[', n[i, :], ']')
-            else:
-                raise TypeError('Matrix in not orthonormal.')
-    else:
-        raise TypeError('Argument must be a SO(3) or SE(3) matrix.')
+    if np.any(np.abs(np.linalg.det(rot) - 1) > 100 * np.spacing([1])[0]):
+        raise TypeError('Matrix in not orthonormal.')
+    theta, n = _so3_log(rot)
+    if unit == 'deg':
+        theta = theta * 180 / math.pi
+    if single:
+        return [theta[0], np.asmatrix(n[0])]
+    return [theta, n]
 
 
 # ------------------------------------------------------------------------------------------------------------------- #
 def tr2eul(tr, unit='rad', flip=False):
     """
     TR2EUL Convert homogeneous transform to Euler angles
-    :param tr: Homogeneous transformation
+    :param tr: Homogeneous transformation, rotation matrix, or (N, 4, 4) or (N, 3, 3) ndarray of them
     :param unit: 'rad' or 'deg'
     :param flip: True or False
-    :return: Euler angles
+    :return: Euler angles, (1, 3) or (N, 3) ndarray
     TR2EUL(T, OPTIONS) are the ZYZ Euler angles (1x3) corresponding to the rotational part of a homogeneous transform T (4x4). The 3 angles EUL=[PHI,THETA,PSI] correspond to sequential rotations about the Z, Y and Z axes respectively.
     TR2EUL(R, OPTIONS) as above but the input is an orthonormal rotation matrix R (3x3).
-    If R (3x3xK) or T (4x4xK) represent a sequence then each row of EUL corresponds to a step of the sequence.
+    If R (Kx3x3) or T (Kx4x4) represent a sequence then each row of EUL corresponds to a step of the sequence.
     Options::
     'deg'   Compute angles in degrees (radians default)
     'flip'  Choose first Euler angle to be in quadrant 2 or 3.
@@ -744,30 +1004,21 @@ def tr2eul(tr, unit='rad', flip=False):
     """
     check_args.unit_check(unit)
     check_args.tr2eul(tr=tr, unit=unit, flip=flip)
+    tr = _rotation_rows(tr)
 
-    if tr.ndim > 2:
-        eul = np.zeros([tr.shape[2], 3])
-        for i in range(0, tr.shape[2]):
-            eul[i, :] = tr2eul(tr[i, :, :])
-        return eul
+    # Singular when the z axes are aligned. PHI is then set to zero.
+    lock = (np.abs(tr[:, 0, 2]) < np.spacing([1])[0]) & (np.abs(tr[:, 1, 2]) < np.spacing([1])[0])
+    if flip:
+        phi = np.arctan2(-tr[:, 1, 2], -tr[:, 0, 2])
     else:
-        eul = np.zeros([1, 3])
-
-    if abs(tr[0, 2]) < np.spacing([1])[0] and abs(tr[1, 2]) < np.spacing([1])[0]:
-        eul[0, 0] = 0
-        sp = 0
-        cp = 0
-        eul[0, 1] = math.atan2(cp * tr[0, 2] + sp * tr[1, 2], tr[2, 2])
-        eul[0, 2] = math.atan2(-sp * tr[0, 0] + cp * tr[1, 0], -sp * tr[0, 1] + cp * tr[1, 1])
-    else:
-        if flip:
-            eul[0, 0] = math.atan2(-tr[1, 2], -tr[0, 2])
-        else:
-            eul[0, 0] = math.atan2(tr[1, 2], tr[0, 2])
-        sp = math.sin(eul[0, 0])
-        cp = math.cos(eul[0, 0])
-        eul[0, 1] = math.atan2(cp * tr[0, 2] + sp * tr[1, 2], tr[2, 2])
-        eul[0, 2] = math.atan2(-sp * tr[0, 0] + cp * tr[1, 0], -sp * tr[0, 1] + cp * tr[1, 1])
+        phi = np.arctan2(tr[:, 1, 2], tr[:, 0, 2])
+    phi[lock] = 0
+    sp = np.sin(phi)
+    cp = np.cos(phi)
+    eul = np.empty((tr.shape[0], 3))
+    eul[:, 0] = phi
+    eul[:, 1] = np.arctan2(cp * tr[:, 0, 2] + sp * tr[:, 1, 2], tr[:, 2, 2])
+    eul[:, 2] = np.arctan2(-sp * tr[:, 0, 0] + cp * tr[:, 1, 0], -sp * tr[:, 0, 1] + cp * tr[:, 1, 1])
 
     if unit == 'deg':
         eul = eul * 180 / math.pi
@@ -779,13 +1030,13 @@ def tr2eul(tr, unit='rad', flip=False):
 def tr2rpy(tr, unit='rad', order='zyx'):
     """
     TR2RPY Convert a homogeneous transform to roll-pitch-yaw angles
-    :param tr: Homogeneous transformation
+    :param tr: Homogeneous transformation, rotation matrix, or (N, 4, 4) or (N, 3, 3) ndarray of them
     :param unit: 'rad' or 'deg'
     :param order: 'xyz', 'zyx' or 'yxz'
-    :return: Roll-pitch-yaw angle
+    :return: Roll-pitch-yaw angle, (1, 3) or (N, 3) ndarray
     TR2RPY(T, options) are the roll-pitch-yaw angles (1x3) corresponding to the rotation part of a homogeneous transform T. The 3 angles RPY=[R,P,Y] correspond to sequential rotations about the Z, Y and X axes respectively.
     TR2RPY(R, options) as above but the input is an orthonormal rotation matrix R (3x3).
-    If R (3x3xK) or T (4x4xK) represent a sequence then each row of RPY corresponds to a step of the sequence.
+    If R (Kx3x3) or T (Kx4x4) represent a sequence then each row of RPY corresponds to a step of the sequence.
     Options::
     'deg'   Compute angles in degrees (radians default)
     'xyz'   Return solution for sequential rotations about X, Y, Z axes
@@ -797,54 +1048,43 @@ def tr2rpy(tr, unit='rad', order='zyx'):
     """
     check_args.unit_check(unit)
     check_args.tr2rpy(tr=tr, unit=unit, order=order)
-
-    if tr.ndim > 2:
-        rpy = np.zeros([tr.shape[2], 3])
-        for i in range(0, tr.shape[2]):
-            rpy[i, :] = tr2rpy(tr[i, :, :])
-        return rpy
-    else:
-        rpy = np.zeros([1, 3])
-
-    if common.isrot(tr) or common.ishomog(tr, dim=[4, 4]):
-        if order == 'xyz' or order == 'arm':
-            if abs(abs(tr[0, 2]) - 1) < np.spacing([1])[0]:
-                rpy[0, 0] = 0
-                rpy[0, 1] = math.asin(tr[0, 2])
-                if tr[0, 2] > 0:
-                    rpy[0, 2] = math.atan2(tr[2, 1], tr[1, 1])
-                else:
-                    rpy[0, 2] = -math.atan2(tr[1, 0], tr[2, 0])
-            else:
-                rpy[0, 0] = -math.atan2(tr[0, 1], tr[0, 0])
-                rpy[0, 1] = math.atan2(tr[0, 2] * math.cos(rpy[0, 0]), tr[0, 0])
-                rpy[0, 2] = -math.atan2(tr[1, 2], tr[2, 2])
-        if order == 'zyx' or order == 'vehicle':
-            if abs(abs(tr[2, 0]) - 1) < np.spacing([1])[0]:
-                rpy[0, 0] = 0
-                rpy[0, 1] = -math.asin(tr[2, 0])
-                if tr[2, 0] < 0:
-                    rpy[0, 2] = -math.atan2(tr[0, 1], tr[0, 2])
-                else:
-                    rpy[0, 2] = math.atan2(-tr[0, 1], -tr[0, 2])
-            else:
-                rpy[0, 0] = math.atan2(tr[2, 1], tr[2, 2])
-                rpy[0, 1] = math.atan2(-tr[2, 0] * math.cos(rpy[0, 0]), tr[2, 2])
-                rpy[0, 2] = math.atan2(tr[1, 0], tr[0, 0])
-        if order == 'yxz' or order == 'camera':
-            if abs(abs(tr[1, 2]) - 1) < np.spacing([1])[0]:
-                rpy[0, 0] = 0
-                rpy[0, 1] = -math.asin(tr[1, 2])
-                if tr[1, 2] < 0:
-                    rpy[0, 2] = -math.atan2(tr[2, 0], tr[0, 0])
-                else:
-                    rpy[0, 2] = math.atan2(-tr[2, 0], -tr[2, 1])
-            else:
-                rpy[0, 0] = math.atan2(tr[1, 0], tr[1, 1])
-                rpy[0, 1] = math.atan2(-math.cos(rpy[0, 0]) * tr[1, 2], tr[1, 1])
-                rpy[0, 2] = math.atan2(tr[0, 2], tr[2, 2])
-    else:
+    if not (common.isrot(tr) or common.ishomog(tr, dim=(4, 4))):
         raise TypeError('Argument must be a 3x3 or 4x4 matrix.')
+    tr = _rotation_rows(tr)
+
+    if order == 'xyz' or order == 'arm':
+        lock_element = tr[:, 0, 2]
+        roll = -np.arctan2(tr[:, 0, 1], tr[:, 0, 0])
+        pitch = np.arctan2(tr[:, 0, 2], np.cos(roll) * tr[:, 0, 0] - np.sin(roll) * tr[:, 0, 1])
+        yaw = -np.arctan2(tr[:, 1, 2], tr[:, 2, 2])
+        lock_pitch = np.arcsin(np.clip(lock_element, -1, 1))
+        lock_yaw = np.where(lock_element > 0, np.arctan2(tr[:, 2, 1], tr[:, 1, 1]),
+                            -np.arctan2(tr[:, 1, 0], tr[:, 2, 0]))
+    elif order == 'zyx' or order == 'vehicle':
+        lock_element = tr[:, 2, 0]
+        roll = np.arctan2(tr[:, 2, 1], tr[:, 2, 2])
+        pitch = np.arctan2(-tr[:, 2, 0], np.cos(roll) * tr[:, 2, 2] + np.sin(roll) * tr[:, 2, 1])
+        yaw = np.arctan2(tr[:, 1, 0], tr[:, 0, 0])
+        lock_pitch = -np.arcsin(np.clip(lock_element, -1, 1))
+        lock_yaw = np.where(lock_element < 0, -np.arctan2(tr[:, 0, 1], tr[:, 0, 2]),
+                            np.arctan2(-tr[:, 0, 1], -tr[:, 0, 2]))
+    elif order == 'yxz' or order == 'camera':
+        lock_element = tr[:, 1, 2]
+        roll = np.arctan2(tr[:, 1, 0], tr[:, 1, 1])
+        pitch = np.arctan2(-tr[:, 1, 2], np.cos(roll) * tr[:, 1, 1] + np.sin(roll) * tr[:, 1, 0])
+        yaw = np.arctan2(tr[:, 0, 2], tr[:, 2, 2])
+        lock_pitch = -np.arcsin(np.clip(lock_element, -1, 1))
+        lock_yaw = np.where(lock_element < 0, -np.arctan2(tr[:, 2, 0], tr[:, 0, 0]),
+                            np.arctan2(-tr[:, 2, 0], -tr[:, 2, 1]))
+    else:
+        raise ValueError("order must be 'xyz'/'arm', 'zyx'/'vehicle' or 'yxz'/'camera'")
+
+    # Singular when pitch is +-pi/2. Roll is then set to zero.
+    lock = np.abs(np.abs(lock_element) - 1) < np.spacing([1])[0]
+    rpy = np.empty((tr.shape[0], 3))
+    rpy[:, 0] = np.where(lock, 0, roll)
+    rpy[:, 1] = np.where(lock, lock_pitch, pitch)
+    rpy[:, 2] = np.where(lock, lock_yaw, yaw)
 
     if unit == 'deg':
         rpy = rpy * 180 / math.pi
@@ -857,7 +1097,7 @@ def trexp(S, theta=None):
     """
     TREXP matrix exponential for so(3) and se(3)
 
-    :param S: SO(3), SE(3), unit vector or twist vector
+    :param S: so(3), se(3), unit vector or twist vector
     :param theta: Rotation in radians
     :return: matrix exponential
     For so(3)::
@@ -891,50 +1131,57 @@ def trexp(S, theta=None):
     - If theta is given then the first argument must be a unit vector or a
     skew-symmetric matrix from a unit vector.
     - Angle vector argument order is different to ANGVEC2R.
+    - Small rotations use Taylor series of the Rodrigues coefficients.
+    - S is always a single argument, a 2-D ndarray is a matrix. Stacks of arguments
+    are exponentiated with TREXP_BATCH().
     """
-    if common.ishomog(S, [4, 4]) or common.isvec(S, 6):
-        if theta is None:
-            if common.isvec(S, 6):
-                S = skewa(S)
-            return expm(S)
-        else:
-            if S.shape == (4, 4):
-                [skw, v] = tr2rt(S)
-            else:
-                v = S[:, 0]
-                skw = skew(np.matrix([[S[0, 3], S[0, 4], S[0, 5]]]))
-            R = trexp(skw, theta)
-            t = (np.eye(3) + np.sin(theta) * skw + (1 - np.cos(theta)) * skw * skw) * v
-            return rt2tr(R, t)
-    elif common.ishomog(S, [3, 3]) or common.isvec(S, 3):
-        if common.isrot(S):
-            w = vex(S)
-        elif common.isvec(S):
-            w = S
-        else:
-            raise AttributeError("Bad arguments, expectin 1x3 or 3x3")
-        if np.linalg.norm(w) < 10 * np.spacing([1])[0]:
-            return np.eye(3)
-        if theta is None:
-            theta = np.linalg.norm(w)
-            w = unitize(w)
-        else:
-            i = 0
-            # todo ISUNIT
-        S = skew(w)
-        T = np.eye(3) + np.sin(theta) * S + (1 - np.cos(theta)) * S ** 2
-        return T
-    else:
+    matrix = np.shape(S) in ((3, 3), (4, 4))
+    if not (matrix or (isinstance(S, np.matrix) and 1 in S.shape) or np.ndim(S) == 1):
+        raise AttributeError("First argument must be SO(3), 3-vector, SE(3) or 6-vector, use trexp_batch for stacks")
+    S = np.asarray(S, dtype=np.float64)
+    S = S[None] if matrix else S.reshape(1, -1)
+    return np.asmatrix(_trexp_stack(S, theta)[0])
+
+
+def trexp_batch(S, theta=None):
+    """
+    TREXP_BATCH matrix exponential for stacks of so(3) and se(3) arguments
+
+    :param S: (N, 3) or (N, 6) ndarray of unit or twist vectors, or (N, 3, 3) or (N, 4, 4) ndarray
+              of so(3) or se(3) matrices
+    :param theta: Rotation in radians, scalar or (N,) ndarray
+    :return: (N, 3, 3) or (N, 4, 4) ndarray
+
+    As TREXP() for each element of the stack, the first axis of S always indexes the stack.
+    """
+    return _trexp_stack(np.asarray(S, dtype=np.float64), theta)
+
+
+def _trexp_stack(S, theta):
+    """
+    Internal function for TREXP and TREXP_BATCH on a stack of arguments.
+    """
+    if S.shape[1:] == (4, 4):
+        S = np.concatenate((S[:, :3, 3], _vex_stack(S[:, :3, :3])), axis=1)
+    elif S.shape[1:] == (3, 3):
+        S = _vex_stack(S)
+    if S.ndim != 2 or S.shape[1] not in (3, 6):
         raise AttributeError(" First argument must be SO(3), 3-vector, SE(3) or 6-vector")
 
+    if theta is not None:
+        S = S * np.reshape(theta, (-1, 1))
+    if S.shape[1] == 6:
+        return _se3_exp(S)
+    return _so3_exp(S)
+
 
 # ---------------------------------------------------------------------------------------#
 def trexp2(S, theta=None):
     """
     TREXP2 matrix exponential for so(2) and se(2)
 
-    :param S:S: SO(2), SE(2) or unit vector
-    :param theta:
+    :param S: so(2), se(2), angle or twist vector
+    :param theta: Rotation in radians
     :return: matrix exponential
 
     R = TREXP2(OMEGA) is the matrix exponential (2x2) of the so(2) element OMEGA that
@@ -961,41 +1208,50 @@ def trexp2(S, theta=None):
       so(2) or se(2).
     - If theta is given then the first argument must be a unit vector or a
       skew-symmetric matrix from a unit vector.
+    - S is always a single argument, a 1-D ndarray is a vector and a 2-D ndarray a matrix.
+      Stacks of arguments are exponentiated with TREXP2_BATCH().
     """
-    if common.ishomog(S, [3, 3]) or common.isvec(S, 3):
-        if theta is None:
-            if common.isvec(S, 3):
-                S = skewa(S)  # todo
-            return expm(S)
-        else:
-            if common.ishomog(S, [3, 3]):
-                v = S[:2, 2]
-                skw = S[:2, :2]
-            else:
-                v = S[:1, :2]
-                skw = skew(S[2])
-            R = trexp2(skw, theta)
-
-            t = (np.eye(2) * theta + (1 - np.cos(theta)) * skw + (theta - np.sin(theta)) * skw * skw) * v
-            return rt2tr(R, t)
-    else:
-        if common.isrot2(S):
-            w = vex(S)
-        elif common.isvec(S, 1):
-            w = S
-        else:
-            raise AttributeError("Expecting scalar or 2x2")
-        if theta is None:
-            if np.linalg.norm(w) < 10 * np.spacing([1])[0]:
-                return np.eye(2)
-            theta = np.linalg.norm(w)
-            S = skew(unitize(w))
-        else:
-            if theta < 10 * np.spacing([1])[0]:
-                return np.eye(2)
-            # todo isunit
-            S = skew(w)
-        return np.eye(2, 2) + np.sin(theta) * S + (1 - np.cos(theta)) * S ** 2
+    matrix = np.shape(S) in ((2, 2), (3, 3))
+    if not (matrix or (isinstance(S, np.matrix) and 1 in S.shape) or np.ndim(S) <= 1):
+        raise AttributeError("Expecting scalar, 2x2, 3-vector or 3x3, use trexp2_batch for stacks")
+    S = np.asarray(S, dtype=np.float64)
+    S = S[None] if matrix else S.reshape(1, -1)
+    return np.asmatrix(_trexp2_stack(S, theta)[0])
+
+
+def trexp2_batch(S, theta=None):
+    """
+    TREXP2_BATCH matrix exponential for stacks of so(2) and se(2) arguments
+
+    :param S: (N,) ndarray of angles, (N, 3) ndarray of twists, or (N, 2, 2) or (N, 3, 3) ndarray
+              of so(2) or se(2) matrices
+    :param theta: Rotation in radians, scalar or (N,) ndarray
+    :return: (N, 2, 2) or (N, 3, 3) ndarray
+
+    As TREXP2() for each element of the stack, the first axis of S always indexes the stack.
+    """
+    S = np.asarray(S, dtype=np.float64)
+    if S.ndim == 1:
+        S = S[:, None]
+    return _trexp2_stack(S, theta)
+
+
+def _trexp2_stack(S, theta):
+    """
+    Internal function for TREXP2 and TREXP2_BATCH on a stack of arguments.
+    """
+    if S.shape[1:] == (3, 3):
+        S = np.concatenate((S[:, :2, 2], _vex_stack(S[:, :2, :2])[:, None]), axis=1)
+    elif S.shape[1:] == (2, 2):
+        S = _vex_stack(S)[:, None]
+    if S.ndim != 2 or S.shape[1] not in (1, 3):
+        raise AttributeError("Expecting scalar, 2x2, 3-vector or 3x3")
+
+    if theta is not None:
+        S = S * np.reshape(theta, (-1, 1))
+    if S.shape[1] == 3:
+        return _se2_exp(S)
+    return _so2_exp(S[:, 0])
 
 
 # ---------------------------------------------------------------------------------------#
@@ -1138,22 +1394,22 @@ def eul2r(phi, theta=None, psi=None, unit='rad'):
     """
     EUL2R Convert Euler angles to rotation matrix
 
-    :param phi: x axis rotation
+    :param phi: z axis rotation, or [PHI, THETA, PSI] / (N, 3) array if theta and psi are not given
     :param theta: y axis rotation
     :param psi: z axis rotation
     :param unit: 'rad' or 'deg' for angles
-    :return: rotation matrix
+    :return: rotation matrix, or (N, 3, 3) ndarray for N sets of angles
 
     R = EUL2R(PHI, THETA, PSI, UNIT) is an SO(3) orthonornal rotation
     matrix (3x3) equivalent to the specified Euler angles.  These correspond
     to rotations about the Z, Y, Z axes respectively. If PHI, THETA, PSI are
     column vectors (Nx1) then they are assumed to represent a trajectory and
-    R is a three-dimensional matrix (3x3xN), where the last index corresponds
+    R is a three-dimensional array (Nx3x3), where the first index corresponds
     to rows of PHI, THETA, PSI.
 
     R = EUL2R(EUL, OPTIONS) as above but the Euler angles are taken from the
     vector (1x3)  EUL = [PHI THETA PSI]. If EUL is a matrix (Nx3) then R is a
-    three-dimensional matrix (3x3xN), where the last index corresponds to
+    three-dimensional array (Nx3x3), where the first index corresponds to
     rows of RPY which are assumed to be [PHI,THETA,PSI].
 
     Options::
@@ -1163,26 +1419,18 @@ def eul2r(phi, theta=None, psi=None, unit='rad'):
     - The vectors PHI, THETA, PSI must be of the same length.
     """
     check_args.unit_check(unit)
-    if type(phi) is np.matrix and theta is None and psi is None:
-        theta = phi[:, 1]
-        psi = phi[:, 2]
-        phi = phi[:, 0]
-    if theta is None or psi is None:
+    if theta is None and psi is None:
+        eul = phi
+    elif theta is None or psi is None:
         raise AttributeError("Invalid arguments, expecting, 3 inputs or 3-vector")
-
-    if unit == 'deg':
-        d2r = np.pi / 180
-        phi = phi * d2r
-        theta = theta * d2r
-        psi = psi * d2r
-
-    if phi.shape[0] == 1:
-        return rotz(phi[0, 0]) * roty(theta[0, 0]) * rotz(psi[0, 0])
     else:
-        R = [phi.shape[0]]
-        for i in range(0, phi.shape[0]):
-            R[i] = (rotz(phi[i, 0]) * roty(theta[i, 0]) * rotz(psi[i, 0]))
-        return R
+        eul = np.column_stack([np.asarray(each, dtype=np.float64).reshape(-1) for each in (phi, theta, psi)])
+        if eul.shape[0] == 1:
+            eul = eul[0]
+    angles = _angle_rows(eul, unit)
+
+    rot = _rot_stack(angles[:, 0], 'rad', 2) @ _rot_stack(angles[:, 1], 'rad', 1) @ _rot_stack(angles[:, 2], 'rad', 2)
+    return _angle_rows_result(eul, rot)
 
 
 # ---------------------------------------------------------------------------------------#
@@ -1190,11 +1438,11 @@ def eul2tr(phi, theta=None, psi=None, unit='rad'):
     """
     EUL2TR Convert Euler angles to homogeneous transform
 
-    :param phi: x axis rotation
+    :param phi: z axis rotation, or [PHI, THETA, PSI] / (N, 3) array if theta and psi are not given
     :param theta: y axis rotation
     :param psi: z axis rotation
     :param unit: 'rad' or 'deg' for angles
-    :return: rotation matrix
+    :return: homogeneous transform, or (N, 4, 4) ndarray for N sets of angles
 
     T = EUL2TR(PHI, THETA, PSI, OPTIONS) is an SE(3) homogeneous
     transformation matrix (4x4) with zero translation and rotation equivalent
@@ -1217,11 +1465,16 @@ def eul2tr(phi, theta=None, psi=None, unit='rad'):
     - The translational part is zero.
     """
     R = eul2r(phi, theta, psi, unit)
-    return r2t(R)
+    if type(R) is list:
+        return [r2t(each) for each in R]
+    elif type(R) is np.matrix:
+        return r2t(R)
+    return _homog_stack(R)
 
 
 # ---------------------------------------------------------------------------------------#
 def np2vtk(mat):
+    from .graphics import vtk
     if mat.shape == (4, 4):
         obj = vtk.vtkMatrix4x4()
         for i in range(4):
@@ -1229,21 +1482,3 @@ def np2vtk(mat):
                 obj.SetElement(i, j, mat[i, j])
         return obj
 
-
-# ---------------------------------------------------------------------------------------#
-if __name__ == '__main__':
-    # When run as main, initialise test cases in test_classes_to_tun and runs them
-    # Refer
-    # https://stackoverflow.com/questions/5360833/how-to-run-multiple-classes-in-single-test-suite-in-python-unit-testing
-    test_classes_to_run = [test_transforms.TestRotx]
-
-    loader = unittest.TestLoader()
-
-    suits_list = []
-    for test_class in test_classes_to_run:
-        suits_list.append(loader.loadTestsFromTestCase(test_class))
-
-    big_suite = unittest.TestSuite(suits_list)
-
-    runner = unittest.TextTestRunner(verbosity=2)
-    results = runner.run(big_suite)
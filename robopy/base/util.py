@@ -1,103 +1,310 @@
-def ctraj(T0, T1, N):
+def ctraj(T0, T1, N, derivs=False):
     """
     CTRAJ(T0, T1, N) is a Cartesian trajectory (4x4xN) from pose T0 to T1
     with N points that follow a trapezoidal velocity profile along the path.
-    :param T0: Start pose
-    :param T1: End pose
-    :param N: number of points to be interpolated
-    :return: SE3 pose
+    All poses are computed with array operations and returned in an array-backed SE3.
+    :param T0: Start pose, a 4x4 matrix, a SE3 object, a list of 4x4 matrices or a (P, 4, 4) ndarray
+    :param T1: End pose, same forms as T0
+    :param N: number of points to be interpolated, or a time vector
+    :param derivs: also return velocities and accelerations
+    :return: SE3 pose, or a list of SE3 poses for many start or end poses. With derivs, a tuple
+    (traj, vel, acc) where vel and acc are (N, 6), or (P, N, 6), arrays of the translational
+    and world frame angular components [vx, vy, vz, wx, wy, wz], per unit of N or of the time vector.
     """
     from .common import ishomog
-    from .quaternion import UnitQuaternion
-    from .transforms import t2r, transl
+    from .quaternion import UnitQuaternionArray
+    from .transforms import _homog_stack
     from .pose import SE3
-    assert type(N) is float or type(N) is int
-    assert type(T0) is list or ishomog(T0, (4, 4))
-    assert type(T1) is list or ishomog(T1, (4, 4))
-
-    if type(T0) is list:
-        for each in T0:
-            assert ishomog(each, (4, 4))
-    if type(T1) is list:
-        for each in T1:
-            assert ishomog(each, (4, 4))
-
-    def one_to_one(T0, T1):
-        rot_0 = t2r(T0)
-        rot_1 = t2r(T1)
-        transl_0 = T0[0:3, 3]
-        transl_1 = T1[0:3, 3]
-        q0 = UnitQuaternion.rot(rot_0)
-        q1 = UnitQuaternion.rot(rot_1)
-
-        time_steps = lspb(0, 1, N)
-        traj = []
-
-        for i in time_steps:
-            rot_interped = q0.interp(q1, r=i).q2tr()
-            transl_interped = transl_0 + (transl_1 - transl_0) * i
-            transl_interped = transl([transl_interped[0, 0], transl_interped[1, 0], transl_interped[2, 0]])
-            traj.append(transl_interped * rot_interped)
-
-        return traj
-
-    if ishomog(T0, (4, 4)):
-        if ishomog(T1, (4, 4)):
-            return SE3.np(one_to_one(T0, T1))
-        elif type(T1) is list:
-            return [SE3.np(one_to_one(T0, each)) for each in T1]
-    elif type(T0) is list:
-        if ishomog(T1, (4, 4)):
-            return [SE3.np(one_to_one(each, T1)) for each in T0]
-        elif type(T1) is list:
-            assert len(T0) == len(T1), "For many to many trajectory computation, both lists should be of same length"
-            return [SE3.np(one_to_one(T0[i], T1[i])) for i in range(len(T0))]
+    import numpy as np
+    assert type(N) is float or type(N) is int or type(N) is np.ndarray
 
+    def as_stack(T):
+        if isinstance(T, SE3):
+            return T.array, T.length == 1
+        if type(T) is list:
+            for each in T:
+                assert ishomog(each, (4, 4))
+            return np.array(T, dtype=np.float64).reshape(-1, 4, 4), False
+        if type(T) is np.ndarray and T.ndim == 3:
+            assert T.shape[1:] == (4, 4)
+            return T, False
+        assert ishomog(T, (4, 4))
+        return np.asarray(T, dtype=np.float64).reshape(1, 4, 4), True
 
-def lspb(q0, q1, t, V=None):
+    T0, single_0 = as_stack(T0)
+    T1, single_1 = as_stack(T1)
+    assert T0.shape[0] == T1.shape[0] or T0.shape[0] == 1 or T1.shape[0] == 1, \
+        "For many to many trajectory computation, both lists should be of same length"
+    T0, T1 = np.broadcast_arrays(T0, T1)
+    pairs = T0.shape[0]
+
+    s, sd, sdd = _lspb(0, 1, N)
+    q0 = UnitQuaternionArray.rot(T0)
+    q1 = UnitQuaternionArray.rot(T1)
+    rot_interped = q0.interp(q1, r=s).to_rot()
+    transl_0 = T0[:, :3, 3]
+    transl_d = T1[:, :3, 3] - transl_0
+    transl_interped = transl_0[:, None, :] + transl_d[:, None, :] * s[None, :, None]
+    traj = _homog_stack(rot_interped, transl_interped.reshape(-1, 3)).reshape(pairs, -1, 4, 4)
+
+    if single_0 and single_1:
+        result = SE3._from_array(traj[0])
+    else:
+        result = [SE3._from_array(each) for each in traj]
+    if not derivs:
+        return result
+
+    # SLERP rotates at a constant rate about a fixed world axis, R0 * axis of q0^-1 * q1
+    q_rel = (q0.inv() * q1).array
+    vec_norm = np.linalg.norm(q_rel[:, 1:], axis=1, keepdims=True)
+    angle = 2 * np.arctan2(vec_norm, q_rel[:, :1])
+    axis = np.divide(q_rel[:, 1:], vec_norm, out=np.zeros_like(vec_norm * q_rel[:, 1:]), where=vec_norm > 0)
+    omega = np.einsum('pij,pj->pi', T0[:, :3, :3], axis * angle)
+    rate = np.concatenate((transl_d, omega), axis=1)[:, None, :]
+    vel = rate * sd[None, :, None]
+    acc = rate * sdd[None, :, None]
+    if single_0 and single_1:
+        return result, vel[0], acc[0]
+    return result, vel, acc
+
+
+def _lspb(q0, q1, t, V=None):
+    """
+    Vectorised linear segment with parabolic blend, over all samples and all joints at once.
+    :param q0: initial value, scalar or (n,) array of joint values
+    :param q1: final value, scalar or (n,) array of joint values
+    :param t: number of time steps, or a time vector
+    :param V: velocity of the linear segments, scalar or (n,) array, chosen if None
+    :return: (s, sd, sdd) position, velocity and acceleration ndarrays, (M,) for scalar
+    end values, else (M, n)
+    """
     import numpy as np
     if (type(t) is int) or (type(t) is float):
         t = np.arange(t)
-    else:
-        assert type(t) is np.ndarray
-
+    t = np.asarray(t, dtype=np.float64)
     tf = float(np.amax(t))
 
+    scalar = np.ndim(q0) == 0 and np.ndim(q1) == 0
+    q0 = np.atleast_1d(np.asarray(q0, dtype=np.float64))
+    q1 = np.atleast_1d(np.asarray(q1, dtype=np.float64))
+    q0, q1 = np.broadcast_arrays(q0, q1)
+    dq = q1 - q0
+    moving = dq != 0
+
     if V is None:
-        V = (q1 - q0) / tf * 1.5
+        V = dq / tf * 1.5
     else:
-        V = abs(V) * ((q1 - q0) / abs(q1 - q0))
-        if abs(V) < abs(q1 - q0) / tf:
+        V = np.abs(np.asarray(V, dtype=np.float64)) * np.sign(dq)
+        if np.any((np.abs(V) < np.abs(dq) / tf)[moving]):
             raise ValueError('V too small')
-        elif abs(V) > 2 * abs(q1 - q0) / tf:
+        elif np.any((np.abs(V) > 2 * np.abs(dq) / tf)[moving]):
             raise ValueError('V too big')
 
-    if q0 == q1:
-        s = np.ones(t.shape[0]) * q0
-        sd = np.zeros(t.shape[0])
-        sdd = np.zeros(t.shape[0])
-        return s, sd, sdd
-
-    tb = (q0 - q1 + V * tf) / V
-    a = V / tb
-
-    p = np.zeros(t.shape[0])
-    pd = np.copy(p)
-    pdd = np.copy(p)
-
-    for i in range(t.shape[0]):
-        tt = float(t[i])
-        if tt <= tb:
-            p[i] = q0 + a / 2 * tt ** 2
-            pd[i] = V
-            pdd[i] = a
-        elif tt <= (tf - tb):
-            p[i] = (q1 + q0 - V * tf) / 2 + V * tt
-            pd[i] = V
-            pdd[i] = a
+    # Joints which do not move keep a constant position, avoid dividing by their zero velocity
+    V_safe = np.where(moving, V, 1.0)
+    tb = np.where(moving, (-dq + V_safe * tf) / V_safe, 1.0)
+    # tb is zero for V = (q1 - q0) / tf, a linear motion without blends
+    a = np.where(moving & (tb > 0), V / np.where(tb > 0, tb, 1.0), 0.0)
+
+    t = t[:, None]
+    accel = (t <= tb) & (tb > 0)
+    coast = ~accel & (t <= (tf - tb))
+    p = np.where(accel, q0 + a / 2 * t ** 2,
+                 np.where(coast, (q1 + q0 - V * tf) / 2 + V * t,
+                          q1 - a / 2 * tf ** 2 + a * tf * t - a / 2 * t ** 2))
+    pd = np.where(accel, a * t, np.where(coast, V, a * tf - a * t))
+    pdd = np.where(accel, a, np.where(coast, 0.0, -a))
+    p = np.where(moving, p, q0)
+    if scalar:
+        return p[:, 0], pd[:, 0], pdd[:, 0]
+    return p, pd, pdd
+
+
+def lspb(q0, q1, t, V=None):
+    """
+    LSPB(Q0, Q1, T) is a trajectory from Q0 to Q1 with a linear segment and parabolic blends,
+    a trapezoidal velocity profile. Q0 and Q1 may be scalars or arrays of n joint values.
+    :param q0: initial value, scalar or (n,) array
+    :param q1: final value, scalar or (n,) array
+    :param t: number of time steps, or a time vector
+    :param V: velocity of the linear segments, scalar or (n,) array, chosen if None
+    :return: (s, sd, sdd) position, velocity and acceleration ndarrays, (M,) for scalar
+    end values, else (M, n). Velocity and acceleration are per time step if t is a number.
+    """
+    import numpy as np
+    if (type(t) is not int) and (type(t) is not float):
+        assert type(t) is np.ndarray
+    return _lspb(q0, q1, t, V)
+
+
+def jtraj(q0, q1, t, qd0=None, qd1=None):
+    """
+    JTRAJ(Q0, Q1, T) is a joint space trajectory from Q0 to Q1 following a quintic polynomial,
+    with zero acceleration at both ends.
+    :param q0: initial joint values, scalar or (n,) array
+    :param q1: final joint values, scalar or (n,) array
+    :param t: number of time steps, or a time vector
+    :param qd0: initial joint velocities, zero if None
+    :param qd1: final joint velocities, zero if None
+    :return: (q, qd, qdd) position, velocity and acceleration ndarrays, (M,) for scalar
+    end values, else (M, n). Velocity and acceleration are per time step if t is a number.
+    """
+    import numpy as np
+    if (type(t) is int) or (type(t) is float):
+        t = np.arange(t)
+    else:
+        assert type(t) is np.ndarray
+    t = np.asarray(t, dtype=np.float64)
+    tscal = float(np.amax(t))
+    tt = (t / tscal)[:, None]
+
+    scalar = np.ndim(q0) == 0 and np.ndim(q1) == 0
+    q0 = np.atleast_1d(np.asarray(q0, dtype=np.float64))
+    q1 = np.atleast_1d(np.asarray(q1, dtype=np.float64))
+    qd0 = np.zeros(q0.shape) if qd0 is None else np.asarray(qd0, dtype=np.float64) * tscal
+    qd1 = np.zeros(q0.shape) if qd1 is None else np.asarray(qd1, dtype=np.float64) * tscal
+
+    # Polynomial coefficients over normalised time, q = A tt^5 + B tt^4 + C tt^3 + E tt + F
+    dq = q1 - q0
+    A = 6 * dq - 3 * (qd1 + qd0)
+    B = -15 * dq + (8 * qd0 + 7 * qd1)
+    C = 10 * dq - (6 * qd0 + 4 * qd1)
+    E = qd0
+    F = q0
+
+    q = (((A * tt + B) * tt + C) * tt ** 2 + E) * tt + F
+    qd = (((5 * A * tt + 4 * B) * tt + 3 * C) * tt ** 2 + E) / tscal
+    qdd = ((20 * A * tt + 12 * B) * tt + 6 * C) * tt / tscal ** 2
+    if scalar:
+        return q[:, 0], qd[:, 0], qdd[:, 0]
+    return q, qd, qdd
+
+
+def _mstraj_plan(via, dt, tacc, qdmax=None, tsegment=None, q0=None, qd0=None, qdf=None):
+    """
+    Plans a multi-segment trajectory with linear segments joined by parabolic blends.
+    :return: dict with via times 'tv' (m+1,), points 'pts' (m+1, n), segment velocities 'vel' (m+2, n),
+    blend accelerations 'acc' (m+1, n), blend half time 'h' and number of samples 'samples'
+    """
+    import numpy as np
+    via = np.asarray(via, dtype=np.float64)
+    if via.ndim == 1:
+        via = via[:, None]
+    if q0 is None:
+        q0 = via[0]
+        via = via[1:]
+    q0 = np.asarray(q0, dtype=np.float64).reshape(1, -1)
+    assert via.shape[0] > 0, "At least one via point is required"
+    assert q0.shape[1] == via.shape[1], "q0 and via points must have the same number of axes"
+    assert (qdmax is None) != (tsegment is None), "Specify exactly one of qdmax and tsegment"
+    assert tacc >= 0, "tacc must not be negative"
+
+    # Blends last a whole number of samples on each side of a via point
+    h = np.ceil(tacc / 2 / dt) * dt
+    tacc = 2 * h
+    pts = np.concatenate((q0, via))
+    dq = np.diff(pts, axis=0)
+    if qdmax is not None:
+        qdmax = np.broadcast_to(np.asarray(qdmax, dtype=np.float64), (q0.shape[1],))
+        assert np.all(qdmax > 0), "qdmax must be positive"
+        # time of the slowest axis, rounded up to whole samples
+        tseg = np.ceil(np.amax(np.abs(dq) / qdmax, axis=1) / dt - 1e-9) * dt
+    else:
+        tseg = np.asarray(tsegment, dtype=np.float64).reshape(-1)
+        assert tseg.shape[0] == dq.shape[0], "tsegment must give one time per segment"
+    # Blends at both ends of a segment must not overlap
+    tseg = np.maximum(tseg, tacc)
+
+    n = q0.shape[1]
+    vel = np.concatenate((np.zeros((1, n)) if qd0 is None else np.asarray(qd0, dtype=np.float64).reshape(1, n),
+                          np.divide(dq, tseg[:, None], out=np.zeros_like(dq), where=tseg[:, None] > 0),
+                          np.zeros((1, n)) if qdf is None else np.asarray(qdf, dtype=np.float64).reshape(1, n)))
+    tv = np.concatenate(([0.0], np.cumsum(tseg)))
+    # Without blends, tacc == 0, the velocity steps at each via point
+    acc = np.diff(vel, axis=0) / tacc if tacc > 0 else np.zeros((vel.shape[0] - 1, n))
+    return {'tv': tv, 'pts': pts, 'vel': vel, 'acc': acc, 'h': h,
+            'samples': int(round((tv[-1] + tacc) / dt)) + 1}
+
+
+def _mstraj_eval(plan, t):
+    """
+    Evaluates a planned multi-segment trajectory at sample times.
+    :param plan: dict from _mstraj_plan
+    :param t: (M,) ndarray of times from the start of the trajectory
+    :return: (q, qd, qdd) ndarrays, each (M, n)
+    """
+    import numpy as np
+    tv, pts, vel, acc, h = plan['tv'], plan['pts'], plan['vel'], plan['acc'], plan['h']
+    last = tv.shape[0] - 1
+    # times relative to the first via point, which is reached after the first half blend
+    tau = t - h
+
+    # nearest via point
+    k = np.clip(np.searchsorted(tv, tau), 0, last)
+    prev = np.clip(k - 1, 0, last)
+    near = np.where(np.abs(tau - tv[prev]) < np.abs(tv[k] - tau), prev, k)
+    dt_near = (tau - tv[near])[:, None]
+    blend = np.abs(dt_near) <= h + 1e-12
+
+    # in a blend around via point j, accelerate from incoming velocity vel[j] to outgoing vel[j + 1]
+    tb = dt_near + h
+    q_blend = pts[near] - vel[near] * h + vel[near] * tb + acc[near] / 2 * tb ** 2
+    qd_blend = vel[near] + acc[near] * tb
+
+    # on a linear segment ending at via point j
+    seg = np.where(tau < tv[near], near, near + 1)
+    seg = np.clip(seg, 1, last)
+    q_line = pts[seg] + vel[seg] * (tau - tv[seg])[:, None]
+
+    q = np.where(blend, q_blend, q_line)
+    qd = np.where(blend, qd_blend, vel[seg])
+    qdd = np.where(blend, acc[near], 0.0)
+    return q, qd, qdd
+
+
+def mstraj_chunks(via, dt, tacc, qdmax=None, tsegment=None, q0=None, qd0=None, qdf=None, chunk=4096,
+                  derivs=False):
+    """
+    Generator version of mstraj, yielding the trajectory in chunks of at most CHUNK samples, so
+    that long densely sampled paths are produced with bounded memory.
+    :param chunk: number of samples per chunk
+    :param derivs: yield (q, qd, qdd) tuples instead of q
+    Other parameters are as for mstraj.
+    :return: generator of (chunk, n) ndarrays, the last one possibly shorter
+    """
+    import numpy as np
+    assert chunk > 0
+    plan = _mstraj_plan(via, dt, tacc, qdmax, tsegment, q0, qd0, qdf)
+    for start in range(0, plan['samples'], chunk):
+        t = np.arange(start, min(start + chunk, plan['samples'])) * dt
+        q, qd, qdd = _mstraj_eval(plan, t)
+        if derivs:
+            yield q, qd, qdd
         else:
-            p[i] = q1 - a / 2 * tf ** 2 + a * tf * tt - a / 2 * tt ** 2
-            pd[i] = a * tf - a * tt
-            pdd[i] = -a
+            yield q
+
 
-    return p
+def mstraj(via, dt, tacc, qdmax=None, tsegment=None, q0=None, qd0=None, qdf=None, derivs=False):
+    """
+    MSTRAJ(VIA, DT, TACC, QDMAX) is a multi-segment trajectory through the via points VIA, one per row,
+    sampled every DT. The motion between via points is linear, at a speed set by the slowest axis
+    with per-axis maximum speeds QDMAX, and the segments are joined by parabolic blends of duration TACC.
+    As with any parabolic blend the via points themselves are passed close to, not through.
+    :param via: (m, n) array of via points, or (m,) for a single axis
+    :param dt: sample interval
+    :param tacc: acceleration time of the blends, rounded up to a whole number of samples.
+    0 gives linear segments without blends.
+    :param qdmax: maximum speed, scalar or (n,) per-axis array. Either qdmax or tsegment is required.
+    :param tsegment: (m,) array of segment durations, instead of qdmax
+    :param q0: initial point, the first via point if None
+    :param qd0: initial velocity, zero if None
+    :param qdf: final velocity, zero if None
+    :param derivs: also return velocities and accelerations
+    :return: (M, n) ndarray, or (q, qd, qdd) tuple with derivs
+    """
+    import numpy as np
+    plan = _mstraj_plan(via, dt, tacc, qdmax, tsegment, q0, qd0, qdf)
+    q, qd, qdd = _mstraj_eval(plan, np.arange(plan['samples']) * dt)
+    if derivs:
+        return q, qd, qdd
+    return q
@@ -0,0 +1,70 @@
+"""
+Test module for package import cost. Rendering, optimisation and test code must load on first use only,
+importing robopy must stay within the import time budget documented in README.md, and the kinematics
+core must work without them installed.
+"""
+import unittest
+import subprocess
+import sys
+import json
+
+# Seconds, best of a few runs of "import robopy" in a fresh interpreter. numpy accounts for most of it.
+IMPORT_TIME_BUDGET = 0.5
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import robopy
+elapsed = time.perf_counter() - start
+print(json.dumps({'time': elapsed, 'modules': sorted(sys.modules)}))
+"""
+
+
+def _probe_import():
+    out = subprocess.check_output([sys.executable, '-c', PROBE])
+    return json.loads(out.decode().strip().splitlines()[-1])
+
+
+class TestImport(unittest.TestCase):
+    def test_import_does_not_load_optional_modules(self):
+        modules = set(_probe_import()['modules'])
+        for name in ('vtk', 'scipy', 'pkg_resources', 'imageio', 'unittest', 'robopy.tests',
+                     'robopy.base.graphics'):
+            self.assertNotIn(name, modules)
+
+    def test_import_time_budget(self):
+        elapsed = min(_probe_import()['time'] for i in range(3))
+        self.assertLess(elapsed, IMPORT_TIME_BUDGET)
+
+
+HEADLESS = """
+import sys
+sys.modules['vtk'] = None
+sys.modules['scipy'] = None
+import numpy as np
+from robopy.base import model, pose, transforms
+from robopy.base.quaternion import UnitQuaternion
+robot = model.Puma560()
+q = np.array([0.1, 0.2, 0.3, 0.1, 0.2, 0.1])
+T = robot.fkine(q)
+robot.jacobian(q)
+assert np.allclose(robot.fkine(robot.ikine_lm(T, q0=q + 0.05).q), T)
+pose.SE3.Rx([0.1, 0.2]) * pose.SE3.Ry(0.3)
+UnitQuaternion.rot(transforms.rotx(0.3))
+for call in (lambda: pose.SE3().plot(), lambda: robot.ikine(T)):
+    try:
+        call()
+    except ImportError as error:
+        print(str(error))
+"""
+
+
+class TestHeadless(unittest.TestCase):
+    def test_kinematics_without_optional_dependencies(self):
+        out = subprocess.check_output([sys.executable, '-c', HEADLESS]).decode()
+        self.assertIn('pip install robopy[graphics]', out)
+        self.assertIn('pip install robopy[optimize]', out)
+
+
+if __name__ == '__main__':
+    unittest.main()
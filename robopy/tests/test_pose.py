@@ -31,6 +31,111 @@ class TestSE3(unittest.TestCase):
             output_str = matrix_mismatch_string_builder(rec_mat, exp_mat)
             self.fail(output_str)
 
+    def test_pose_se3_array_returnData_dimension(self):
+        obj = pose.SE3.Rx([10, 20, 30], unit='deg', x=[1, 2, 3], y=[0, 0, 0], z=[0, 0, 0])
+        self.assertEqual(obj.array.shape, (3, 4, 4))
+        self.assertEqual(obj.array.dtype, np.float64)
+        self.assertEqual(obj.length, 3)
+
+    def test_pose_se3_data_is_view(self):
+        obj = pose.SE3.Rx([10, 20, 30], unit='deg', x=[1, 2, 3], y=[0, 0, 0], z=[0, 0, 0])
+        for i, each in enumerate(obj):
+            self.assertIs(type(each), np.matrix)
+            if not matrices_equal(each, obj.array[i]):
+                self.fail(matrix_mismatch_string_builder(each, obj.array[i]))
+        self.assertTrue(np.shares_memory(obj.data[1], obj.array))
+
+    def test_pose_se3_constructor_ndarray(self):
+        exp_mat = np.array([tr.trotz(uniform(0, 360), unit='deg') for i in range(5)])
+        obj = pose.SE3.np(exp_mat)
+        self.assertEqual(obj.length, 5)
+        if not matrices_equal(obj.array, exp_mat):
+            self.fail(matrix_mismatch_string_builder(obj.array, exp_mat))
+
+    def test_pose_se3_constructor_list(self):
+        exp_mat = [tr.trotz(uniform(0, 360), unit='deg') for i in range(5)]
+        obj = pose.SE3.np(exp_mat)
+        self.assertEqual(obj.array.shape, (5, 4, 4))
+        if not matrices_equal(obj.array, np.array(exp_mat)):
+            self.fail(matrix_mismatch_string_builder(obj.array, np.array(exp_mat)))
+        self.assertEqual(pose.SE3.np(exp_mat[0]).array.shape, (1, 4, 4))
+
+    def test_pose_se3_transl(self):
+        obj = pose.SE3(x=[1, 4], y=[2, 5], z=[3, 6])
+        self.assertEqual(obj.transl, [(1, 2, 3), (4, 5, 6)])
+        self.assertEqual(obj[1].transl, [(4, 5, 6)])
+
+    def test_pose_se3_append(self):
+        obj = pose.SE3()
+        obj.append(pose.SE3(x=1, y=2, z=3))
+        obj.append(np.asmatrix(np.eye(4)))
+        self.assertEqual(obj.array.shape, (3, 4, 4))
+
+    def test_pose_se3_mul_broadcast(self):
+        obj1 = pose.SE3.Rz([10, 20, 30], unit='deg', x=[1, 2, 3], y=[0, 0, 0], z=[0, 0, 0])
+        obj2 = pose.SE3.Rx(40, unit='deg', x=1, y=2, z=3)
+        for rec, exp in [(obj1 * obj2, [each * obj2.mat for each in obj1]),
+                         (obj2 * obj1, [obj2.mat * each for each in obj1]),
+                         (obj1 * obj1, [each * each for each in obj1])]:
+            self.assertEqual(rec.length, 3)
+            for i in range(3):
+                if not matrices_equal(rec.data[i], exp[i]):
+                    self.fail(matrix_mismatch_string_builder(rec.data[i], exp[i]))
+
+    def test_pose_se3_compose_outer(self):
+        obj1 = pose.SE3.Rz([10, 20, 30], unit='deg', x=[1, 2, 3], y=[0, 0, 0], z=[0, 0, 0])
+        obj2 = pose.SE3.Ry([40, 50], unit='deg', x=[0, 0], y=[1, 2], z=[0, 0])
+        rec = obj1.compose(obj2, outer=True)
+        self.assertEqual(rec.length, 6)
+        exp_mat = obj1.data[2] * obj2.data[1]
+        if not matrices_equal(rec.data[5], exp_mat):
+            self.fail(matrix_mismatch_string_builder(rec.data[5], exp_mat))
+
+    def test_pose_se3_inv(self):
+        obj = pose.SE3.Rz([10, 20, 30], unit='deg', x=[1, 2, 3], y=[4, 5, 6], z=[7, 8, 9])
+        rec = obj.inv()
+        self.assertIs(type(rec), pose.SE3)
+        exp_mat = np.linalg.inv(obj.array)
+        if not matrices_equal(rec.array, exp_mat):
+            self.fail(matrix_mismatch_string_builder(rec.array, exp_mat))
+
+    def test_pose_se3_divide(self):
+        obj1 = pose.SE3.Rz([10, 20, 30], unit='deg', x=[1, 2, 3], y=[4, 5, 6], z=[7, 8, 9])
+        obj2 = pose.SE3.Rx(40, unit='deg', x=1, y=2, z=3)
+        for rec, exp in [(obj1 / obj2, [each * np.linalg.inv(obj2.mat) for each in obj1]),
+                         (obj2 / obj1, [obj2.mat * np.linalg.inv(each) for each in obj1])]:
+            for i in range(3):
+                if not matrices_equal(rec.data[i], exp[i]):
+                    self.fail(matrix_mismatch_string_builder(rec.data[i], exp[i]))
+
+    def test_pose_se3_transform_points(self):
+        obj = pose.SE3.Rz([10, 20], unit='deg', x=[1, 2], y=[3, 4], z=[5, 6])
+        points = np.random.rand(10, 3)
+        rec_mat = obj.transform_points(points, block=4)
+        self.assertEqual(rec_mat.shape, (2, 10, 3))
+        exp_mat = np.asarray(obj.data[1] * np.r_[points.T, np.ones((1, 10))])[:3].T
+        if not matrices_equal(rec_mat[1], exp_mat):
+            self.fail(matrix_mismatch_string_builder(rec_mat[1], exp_mat))
+
+    def test_pose_se3_transform_points_in_place(self):
+        obj = pose.SE3.Rx(30, unit='deg', x=1, y=2, z=3)
+        points = np.random.rand(10, 3).astype(np.float32)
+        exp_mat = obj.transform_points(points.astype(np.float64))
+        rec_mat = obj.transform_points(points, out=points, block=3)
+        self.assertIs(rec_mat, points)
+        self.assertEqual(rec_mat.dtype, np.float32)
+        if not matrices_equal(rec_mat, exp_mat, decimal=5):
+            self.fail(matrix_mismatch_string_builder(rec_mat, exp_mat))
+
+    def test_pose_se3_mul_points(self):
+        obj = pose.SE3.Rz([10, 20], unit='deg', x=[1, 2], y=[3, 4], z=[5, 6])
+        points = np.random.rand(3, 7)
+        rec_mat = obj * points
+        self.assertEqual(rec_mat.shape, (2, 3, 7))
+        exp_mat = np.asarray(obj.data[1] * np.r_[points, np.ones((1, 7))])[:3]
+        if not matrices_equal(rec_mat[1], exp_mat):
+            self.fail(matrix_mismatch_string_builder(rec_mat[1], exp_mat))
+
 
 class TestSO3(unittest.TestCase):
     # TODO Validate tests on matrices other than identity as well!!
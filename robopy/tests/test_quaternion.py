@@ -0,0 +1,127 @@
+"""
+Test module for quaternions: UnitQuaternion and UnitQuaternionArray
+"""
+import unittest
+import numpy as np
+from math import pi
+from .test_common import matrix_mismatch_string_builder
+from .test_common import matrices_equal
+from ..base.quaternion import UnitQuaternion, UnitQuaternionArray
+from ..base import transforms as tr
+from ..base import pose
+
+
+class TestUnitQuaternionArray(unittest.TestCase):
+    def test_quaternion_array_constructor_normalises(self):
+        obj = UnitQuaternionArray(np.array([[2, 0, 0, 0], [1, 1, 1, 1]]))
+        self.assertEqual(obj.array.shape, (2, 4))
+        self.assertTrue(np.allclose(obj.norm(), 1))
+
+    def test_quaternion_array_mul(self):
+        a = UnitQuaternionArray(np.random.randn(10, 4))
+        b = UnitQuaternionArray(np.random.randn(10, 4))
+        rec = (a * b).array
+        for i, (qa, qb) in enumerate(zip(a, b)):
+            exp_mat = (qa * qb).double()
+            if not matrices_equal(rec[i:i + 1], exp_mat, ):
+                output_str = matrix_mismatch_string_builder(rec[i:i + 1], exp_mat)
+                self.fail(output_str)
+
+    def test_quaternion_array_mul_broadcast(self):
+        a = UnitQuaternionArray(np.random.randn(10, 4))
+        q = UnitQuaternion.Rz(0.3)
+        rec = (a * q).array
+        self.assertEqual(rec.shape, (10, 4))
+        self.assertTrue(np.allclose(rec[3], np.asarray((a.data[3] * q).double()).ravel()))
+
+    def test_quaternion_array_inv(self):
+        a = UnitQuaternionArray(np.random.randn(10, 4))
+        rec = (a * a.inv()).array
+        self.assertTrue(np.allclose(rec, [[1, 0, 0, 0]]))
+        self.assertTrue(np.allclose((a / a).array, [[1, 0, 0, 0]]))
+
+    def test_quaternion_array_rotate(self):
+        a = UnitQuaternionArray(np.random.randn(10, 4))
+        v = np.random.randn(10, 3)
+        rec = a.rotate(v)
+        for i, q in enumerate(a):
+            exp_mat = np.asarray(q.to_rot()) @ v[i]
+            if not matrices_equal(rec[i], exp_mat, ):
+                output_str = matrix_mismatch_string_builder(rec[i], exp_mat)
+                self.fail(output_str)
+
+    def test_quaternion_array_omega_integration(self):
+        # constant rate of 1 rad/s about z, integrated over 1000 steps of 1 ms
+        q = UnitQuaternionArray()
+        steps = UnitQuaternionArray.omega(np.tile([0, 0, 0.001], (1000, 1)))
+        for step in steps:
+            q = q * step
+        self.assertTrue(np.allclose(q.array, UnitQuaternionArray.angvec(1, [0, 0, 1]).array))
+
+    def test_quaternion_array_interp_matches_scalar(self):
+        q0 = UnitQuaternion.Rx(0.3)
+        q1 = UnitQuaternion.Ry(1.2)
+        r = np.linspace(0, 1, 7)
+        rec = q0.interp(q1, r=r)
+        self.assertIsInstance(rec, UnitQuaternionArray)
+        for i in range(r.shape[0]):
+            exp_mat = np.asarray(q0.interp(q1, r=float(r[i])).double())
+            if not matrices_equal(rec.array[i:i + 1], exp_mat, ):
+                output_str = matrix_mismatch_string_builder(rec.array[i:i + 1], exp_mat)
+                self.fail(output_str)
+        self.assertTrue(np.allclose(rec.to_rot()[-1], UnitQuaternion.Ry(1.2).to_rot()))
+
+    def test_quaternion_array_interp_pairs(self):
+        a = UnitQuaternionArray(np.random.randn(4, 4))
+        b = UnitQuaternionArray(np.random.randn(4, 4))
+        rec = a.interp(b, r=[0, 0.5, 1])
+        self.assertEqual(rec.length, 12)
+        self.assertTrue(np.allclose(rec.array[0::3], a.array))
+        self.assertTrue(np.allclose(rec.array[2::3], b.array))
+        self.assertTrue(np.allclose(rec.norm(), 1))
+
+    def test_quaternion_array_interp_near_zero_angle(self):
+        a = UnitQuaternionArray.angvec(1e-9, [0, 0, 1])
+        rec = UnitQuaternionArray().interp(a, r=np.linspace(0, 1, 5))
+        self.assertFalse(np.any(np.isnan(rec.array)))
+        self.assertTrue(np.allclose(rec.array, [[1, 0, 0, 0]]))
+
+    def test_quaternion_array_rot_roundtrip(self):
+        q = UnitQuaternionArray(np.random.randn(50, 4))
+        # q and -q are the same rotation, compare with non-negative scalar parts
+        exp = np.where(q.array[:, :1] < 0, -q.array, q.array)
+        rec = UnitQuaternionArray.rot(q.to_rot()).array
+        self.assertTrue(np.allclose(rec, exp))
+
+    def test_quaternion_array_rot_half_turns(self):
+        rot = np.stack([np.asarray(each) for each in (tr.rotx(pi), tr.roty(pi), tr.rotz(pi), np.eye(3))])
+        rec = UnitQuaternionArray.rot(rot).to_rot()
+        self.assertTrue(np.allclose(rec, rot))
+
+    def test_quaternion_tr2q_stack_matches_single(self):
+        rot = np.stack([np.asarray(tr.rpy2r([0.1 * i, 0.2, -0.3 * i])) for i in range(5)])
+        rec = UnitQuaternion.tr2q(rot)
+        self.assertIsInstance(rec, UnitQuaternionArray)
+        for i in range(5):
+            exp_mat = np.asarray(UnitQuaternion.tr2q(np.asmatrix(rot[i])).double())
+            if not matrices_equal(rec.array[i:i + 1], exp_mat, ):
+                output_str = matrix_mismatch_string_builder(rec.array[i:i + 1], exp_mat)
+                self.fail(output_str)
+
+    def test_quaternion_tr2q_small_angle_accuracy(self):
+        axis = np.array([1.0, 2.0, 3.0]) / np.sqrt(14)
+        for angle in (1e-9, 1e-6):
+            rec = UnitQuaternionArray.rot(tr.angvec2r(angle, np.asmatrix(axis))).array[0]
+            exp = np.concatenate(([np.cos(angle / 2)], np.sin(angle / 2) * axis))
+            # relative error of the vector part, which cancellation against s ~ 1 would destroy
+            self.assertLess(np.max(np.abs(rec[1:] - exp[1:])) / np.sin(angle / 2), 1e-12)
+            self.assertAlmostEqual(rec[0], exp[0], places=15)
+
+    def test_quaternion_array_rot_from_se3(self):
+        obj = pose.SE3.Rx([0.1, 0.2, 0.3])
+        rec = UnitQuaternionArray.rot(obj)
+        self.assertTrue(np.allclose(rec.to_tr(), obj.array))
+
+
+if __name__ == '__main__':
+    unittest.main()
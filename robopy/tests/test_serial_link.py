@@ -0,0 +1,334 @@
+"""
+Test module for SerialLink kinematics
+"""
+import unittest
+import importlib.util
+import os
+import tempfile
+import numpy as np
+from math import pi
+from .test_common import matrix_mismatch_string_builder
+from .test_common import matrices_equal
+from ..base import model
+
+
+class TestFkine(unittest.TestCase):
+    def setUp(self):
+        self.robot = model.Puma560()
+        self.stances = np.random.uniform(-pi, pi, (20, self.robot.length))
+
+    def test_serial_link_fkine_batch_returnData_dimension(self):
+        self.assertEqual(self.robot.fkine_batch(self.stances).shape, (20, 4, 4))
+
+    def test_serial_link_fkine_batch_matches_fkine(self):
+        rec_mat = self.robot.fkine_batch(self.stances)
+        for i in range(self.stances.shape[0]):
+            exp_mat = self.robot.fkine(np.asmatrix(self.stances[i]))
+            if not matrices_equal(rec_mat[i], exp_mat):
+                self.fail(matrix_mismatch_string_builder(rec_mat[i], exp_mat))
+
+    def test_serial_link_fkine_batch_deg(self):
+        rec_mat = self.robot.fkine_batch(self.stances * 180 / pi, unit='deg')
+        exp_mat = self.robot.fkine_batch(self.stances)
+        if not matrices_equal(rec_mat, exp_mat):
+            self.fail(matrix_mismatch_string_builder(rec_mat, exp_mat))
+
+    def test_serial_link_fkine_batch_single_stance(self):
+        rec_mat = self.robot.fkine_batch(self.robot.qn.A1)
+        exp_mat = self.robot.fkine(self.robot.qn)
+        if not matrices_equal(rec_mat[0], exp_mat):
+            self.fail(matrix_mismatch_string_builder(rec_mat[0], exp_mat))
+
+
+class TestKinematicModel(unittest.TestCase):
+    def setUp(self):
+        self.robot = model.Puma560()
+        self.q = np.random.uniform(-pi, pi, self.robot.length)
+
+    def test_serial_link_kinematic_model_matches_link_A(self):
+        rec_mat = self.robot.kinematic_model.link_transforms(self.q)
+        for i, link in enumerate(self.robot):
+            exp_mat = link.A(self.q[i])
+            if not matrices_equal(rec_mat[i], exp_mat):
+                self.fail(matrix_mismatch_string_builder(rec_mat[i], exp_mat))
+
+    def test_serial_link_kinematic_model_out_buffer(self):
+        out = np.empty((3, self.robot.length, 4, 4))
+        rec = self.robot.kinematic_model.link_transforms(np.tile(self.q, (3, 1)), out=out)
+        self.assertIs(rec, out)
+
+    def test_serial_link_kinematic_model_compile(self):
+        self.robot.links[1].a = 0.5
+        self.robot.compile()
+        self.assertEqual(self.robot.kinematic_model.a[1], 0.5)
+
+
+class TestJacobian(unittest.TestCase):
+    def setUp(self):
+        self.robot = model.Puma560()
+        self.q = np.random.uniform(-pi, pi, self.robot.length)
+
+    def numerical_jacobian(self, q, eps=1e-7):
+        t0 = self.robot.fkine_batch(q)[0]
+        jacobian = np.zeros((6, self.robot.length))
+        for i in range(self.robot.length):
+            dq = np.copy(q)
+            dq[i] += eps
+            t1 = self.robot.fkine_batch(dq)[0]
+            jacobian[:3, i] = (t1[:3, 3] - t0[:3, 3]) / eps
+            skw = np.dot((t1[:3, :3] - t0[:3, :3]) / eps, t0[:3, :3].T)
+            jacobian[3:, i] = [skw[2, 1], skw[0, 2], skw[1, 0]]
+        return jacobian
+
+    def test_serial_link_jacobian_returnData_dimension(self):
+        self.assertEqual(self.robot.jacobian(self.q).shape, (6, 6))
+
+    def test_serial_link_jacobian_matches_numerical(self):
+        rec_mat = self.robot.jacobian(self.q)
+        exp_mat = self.numerical_jacobian(self.q)
+        if not matrices_equal(rec_mat, exp_mat, decimal=5):
+            self.fail(matrix_mismatch_string_builder(rec_mat, exp_mat))
+
+    def test_serial_link_jacobe_rotates_jacobian(self):
+        rot = self.robot.fkine_batch(self.q)[0, :3, :3]
+        jacobe = self.robot.jacobe(self.q)
+        rec_mat = np.concatenate((np.dot(rot, jacobe[:3]), np.dot(rot, jacobe[3:])))
+        exp_mat = self.robot.jacobian(self.q)
+        if not matrices_equal(rec_mat, exp_mat):
+            self.fail(matrix_mismatch_string_builder(rec_mat, exp_mat))
+
+    def test_serial_link_jacobian_batch(self):
+        q = np.random.uniform(-pi, pi, (5, self.robot.length))
+        rec_mat = self.robot.jacobian_batch(q)
+        self.assertEqual(rec_mat.shape, (5, 6, 6))
+        for i in range(q.shape[0]):
+            exp_mat = self.robot.jacobian(q[i])
+            if not matrices_equal(rec_mat[i], exp_mat):
+                self.fail(matrix_mismatch_string_builder(rec_mat[i], exp_mat))
+
+
+class TestIkineLM(unittest.TestCase):
+    def setUp(self):
+        self.robot = model.Puma560()
+        self.q = np.array([0.2, 0.5, -0.3, 0.4, 0.6, 0.1])
+        self.T = self.robot.fkine(self.q)
+
+    def test_serial_link_ikine_lm_converges(self):
+        sol = self.robot.ikine_lm(self.T, q0=self.robot.qn)
+        self.assertTrue(sol.success)
+        self.assertLess(sol.residual, 1e-10)
+        rec_mat = self.robot.fkine(sol.q)
+        if not matrices_equal(rec_mat, self.T):
+            self.fail(matrix_mismatch_string_builder(rec_mat, self.T))
+
+    def test_serial_link_ikine_lm_joint_limits(self):
+        sol = self.robot.ikine_lm(self.T)
+        lower, upper = self.robot.kinematic_model.qlim
+        self.assertTrue(np.all(sol.q.A1 >= lower) and np.all(sol.q.A1 <= upper))
+
+    def test_serial_link_ikine_lm_deg(self):
+        sol = self.robot.ikine_lm(self.T, q0=self.q + 0.1, unit='deg')
+        rec_mat = self.robot.fkine(sol.q, unit='deg')
+        if not matrices_equal(rec_mat, self.T):
+            self.fail(matrix_mismatch_string_builder(rec_mat, self.T))
+
+    def test_serial_link_ikine_lm_iteration_limit(self):
+        sol = self.robot.ikine_lm(self.T, q0=self.robot.qz, ilimit=1, slimit=1)
+        self.assertFalse(sol.success)
+        self.assertEqual(sol.iterations, 1)
+        self.assertEqual(sol.searches, 1)
+
+
+class TestIkineBatch(unittest.TestCase):
+    def setUp(self):
+        self.robot = model.Puma560()
+        qa = np.array([0.1, 0.3, -0.5, 0.2, 0.4, 0])
+        qb = np.array([1.2, 0.9, -1.5, 1.0, -0.4, 1.0])
+        self.q0 = qa
+        self.path = qa + np.linspace(0, 1, 50)[:, None] * (qb - qa)
+        self.T = self.robot.fkine_batch(self.path)
+
+    def test_serial_link_ikine_batch_returnData_dimension(self):
+        sol = self.robot.ikine_batch(self.T, q0=self.q0)
+        self.assertEqual(sol.q.shape, (50, 6))
+        self.assertEqual(sol.success.shape, (50,))
+
+    def test_serial_link_ikine_batch_warm_start(self):
+        sol = self.robot.ikine_batch(self.T, q0=self.q0)
+        self.assertTrue(sol.success.all())
+        if not matrices_equal(sol.q, self.path, decimal=6):
+            self.fail(matrix_mismatch_string_builder(sol.q, self.path))
+
+    def test_serial_link_ikine_batch_se3(self):
+        from ..base.pose import SE3
+        sol = self.robot.ikine_batch(SE3.np([np.asmatrix(each) for each in self.T[:5]]), q0=self.q0)
+        if not matrices_equal(sol.q, self.path[:5], decimal=6):
+            self.fail(matrix_mismatch_string_builder(sol.q, self.path[:5]))
+
+    def test_serial_link_ikine_batch_processes(self):
+        rec = self.robot.ikine_batch(self.T, q0=self.q0, processes=2, unit='deg')
+        self.assertEqual(rec.q.shape, (50, 6))
+        rec_mat = self.robot.fkine_batch(rec.q, unit='deg')
+        if not matrices_equal(rec_mat, self.T):
+            self.fail(matrix_mismatch_string_builder(rec_mat, self.T))
+
+
+class TestPuma560IkineAnalytic(unittest.TestCase):
+    def setUp(self):
+        self.robot = model.Puma560()
+        self.T = self.robot.fkine_batch(np.random.uniform(-1.5, 1.5, (10, self.robot.length)))
+
+    def test_serial_link_ikine_analytic_returnData_dimension(self):
+        self.assertEqual(self.robot.ikine_analytic(self.T).shape, (10, 8, 6))
+        self.assertEqual(self.robot.ikine_analytic(self.T[0]).shape, (8, 6))
+        self.assertEqual(self.robot.ikine_analytic(self.T[0], config='run').shape, (6,))
+
+    def test_serial_link_ikine_analytic_all_configurations(self):
+        q = self.robot.ikine_analytic(self.T)
+        for i in range(len(self.robot.ik_configs)):
+            # configurations outside the joint limits are NaN
+            valid = ~np.isnan(q[:, i]).any(axis=1)
+            rec_mat = self.robot.fkine_batch(q[valid, i])
+            if not matrices_equal(rec_mat, self.T[valid]):
+                self.fail(matrix_mismatch_string_builder(rec_mat, self.T[valid]))
+
+    def test_serial_link_ikine_analytic_qn(self):
+        rec_mat = self.robot.ikine_analytic(self.robot.fkine(self.robot.qn), config='run', unit='deg')
+        exp_mat = np.array([0, 45, -180, 0, 45, 0])
+        if not matrices_equal(rec_mat, exp_mat):
+            self.fail(matrix_mismatch_string_builder(rec_mat, exp_mat))
+
+    def test_serial_link_ikine_analytic_joint_limits(self):
+        lower, upper = self.robot.kinematic_model.qlim
+        q = self.robot.ikine_analytic(self.T)
+        valid = ~np.isnan(q).any(axis=-1)
+        self.assertTrue(valid.any())
+        self.assertTrue(np.all((q[valid] >= lower) & (q[valid] <= upper)))
+        # joint 2 beyond pi is within its limits of -45 to 225 degrees
+        exp_mat = np.array([10, 200, -170, 20, 30, 40])
+        T = self.robot.fkine_batch(exp_mat * np.pi / 180)[0]
+        rec_mat = self.robot.ikine_analytic(T, config='ldn', unit='deg')
+        if not matrices_equal(rec_mat, exp_mat):
+            self.fail(matrix_mismatch_string_builder(rec_mat, exp_mat))
+
+    def test_serial_link_ikine_analytic_unreachable(self):
+        T = np.eye(4)
+        T[:3, 3] = [5, 0, 0]
+        self.assertTrue(np.isnan(self.robot.ikine_analytic(T)).all())
+
+
+@unittest.skipIf(importlib.util.find_spec('vtk') is None, "vtk is not installed")
+class TestOffscreenRender(unittest.TestCase):
+    def setUp(self):
+        self.robot = model.Puma560()
+        self.stances = np.linspace(0, 1, 3)[:, None] * np.array([[0.5, 0.3, -0.2, 0.1, 0.4, 0.2]])
+
+    def test_serial_link_render_frames_in_memory(self):
+        frames = self.robot.render_frames(self.stances, size=(64, 48))
+        self.assertEqual(frames.shape, (3, 48, 64, 3))
+        self.assertEqual(frames.dtype, np.uint8)
+        # the arm moves between the first and the last frame
+        self.assertTrue(np.any(frames[0] != frames[-1]))
+
+    def test_serial_link_render_frames_empty(self):
+        self.assertEqual(self.robot.render_frames(np.zeros((0, 6)), size=(64, 48)).shape, (0, 48, 64, 3))
+
+    def test_graphics_pipeline_capture(self):
+        from ..base.graphics import VtkPipeline
+        pipeline = VtkPipeline(offscreen=True, size=(32, 24))
+        self.assertIsNone(pipeline.iren)
+        pipeline.render()
+        frame = pipeline.capture()
+        self.assertEqual(frame.shape, (24, 32, 3))
+        # empty scene, every pixel has the background color
+        self.assertTrue(np.all(frame == frame[0, 0]))
+
+    @unittest.skipIf(importlib.util.find_spec('imageio') is None, "imageio is not installed")
+    def test_serial_link_record(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'puma.gif')
+            self.robot.record(self.stances, filename, size=(64, 48))
+            self.assertGreater(os.path.getsize(filename), 0)
+
+
+@unittest.skipIf(importlib.util.find_spec('vtk') is None, "vtk is not installed")
+class TestMeshCache(unittest.TestCase):
+    def setUp(self):
+        from ..base import graphics
+        self.graphics = graphics
+        graphics.clear_mesh_cache()
+
+    def tearDown(self):
+        self.graphics.MESH_CACHE_SIZE = 64
+
+    def test_graphics_mesh_shared_between_robots(self):
+        first = model.Puma560()._SerialLink__setup_pipeline_objs()
+        second = model.Puma560()._SerialLink__setup_pipeline_objs()
+        for mesh_a, mesh_b, mapper in zip(first[0], second[0], second[2]):
+            self.assertIs(mesh_a, mesh_b)
+            self.assertIs(mapper.GetInput(), mesh_a)
+
+    def test_graphics_mesh_reused_on_replot(self):
+        robot = model.Puma560()
+        robot.render_frames(np.zeros((1, 6)), size=(16, 12))
+        cached = dict(self.graphics._mesh_cache)
+        robot.render_frames(np.zeros((1, 6)), size=(16, 12))
+        self.assertEqual(len(self.graphics._mesh_cache), len(cached))
+        for key, mesh in cached.items():
+            self.assertIs(self.graphics._mesh_cache[key], mesh)
+
+    def test_graphics_mesh_cache_lru_eviction(self):
+        self.graphics.MESH_CACHE_SIZE = 2
+        paths = [self.graphics.media_path('puma_560', 'link%d.stl' % i) for i in range(3)]
+        first = self.graphics.load_mesh(paths[0])
+        self.graphics.load_mesh(paths[1])
+        self.assertIs(self.graphics.load_mesh(paths[0]), first)
+        self.graphics.load_mesh(paths[2])
+        # link1 was least recently used
+        self.assertEqual(set(self.graphics._mesh_cache), {os.path.abspath(paths[0]), os.path.abspath(paths[2])})
+
+    def test_graphics_compiled_mesh(self):
+        from vtk.util import numpy_support
+        path = self.graphics.media_path('puma_560', 'link2.stl')
+        with tempfile.TemporaryDirectory() as directory:
+            compiled = self.graphics.compile_mesh(path, os.path.join(directory, 'link2.npz'))
+            rec = self.graphics.load_mesh(compiled)
+        exp = self.graphics.load_mesh(path)
+        self.assertEqual(rec.GetNumberOfCells(), exp.GetNumberOfCells())
+        self.assertTrue(np.allclose(numpy_support.vtk_to_numpy(rec.GetPoints().GetData()),
+                                    numpy_support.vtk_to_numpy(exp.GetPoints().GetData())))
+
+    def test_graphics_mesh_lod_cached(self):
+        path = self.graphics.media_path('puma_560', 'link3.stl')
+        full = self.graphics.load_mesh(path)
+        low = self.graphics.load_mesh_lod(path, 2)
+        self.assertIs(self.graphics.load_mesh_lod(path, 0), full)
+        self.assertIs(self.graphics.load_mesh_lod(path, 2), low)
+        self.assertLess(low.GetNumberOfCells(), full.GetNumberOfCells())
+        self.assertGreater(low.GetNumberOfCells(), 0)
+
+    def test_graphics_mesh_lod_quality(self):
+        robot = model.Puma560()
+        meshes, _, mappers = robot._SerialLink__setup_pipeline_objs(quality='low')
+        for i, (mesh, mapper) in enumerate(zip(meshes, mappers)):
+            path = self.graphics.media_path(robot.name, robot.stl_files[i])
+            self.assertIs(mesh, self.graphics.load_mesh_lod(path, 2))
+            self.assertIs(mapper.GetInput(), mesh)
+        with self.assertRaises(AssertionError):
+            robot._SerialLink__setup_pipeline_objs(quality='ultra')
+
+    def test_graphics_mesh_lod_camera_distance(self):
+        robot = model.Puma560()
+        pipeline = self.graphics.VtkPipeline(offscreen=True, size=(640, 480))
+        robot._SerialLink__setup_scene(pipeline, np.asmatrix(np.zeros((1, 6))))
+        pipeline.render(ui=False)
+        near = [mapper.GetInput().GetNumberOfCells() for mapper in pipeline.mapper_list]
+        pipeline.ren.GetActiveCamera().Dolly(0.05)
+        pipeline.ren_win.Render()
+        self.assertEqual(pipeline.lod_selector.levels, [2] * 7)
+        far = [mapper.GetInput().GetNumberOfCells() for mapper in pipeline.mapper_list]
+        self.assertLess(sum(far), sum(near))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -19,6 +19,17 @@ from ..base import transforms
 
 # rotx | complete
 class TestRotx(unittest.TestCase):
+    def test_transforms_3d_rotx_validData_array(self):
+        theta = np.linspace(-pi, pi, 7)
+        received_mat = transforms.rotx(theta * 180 / pi, unit='deg')
+        self.assertEqual(received_mat.shape, (7, 3, 3))
+        for i in range(7):
+            expected_mat = transforms.rotx(theta[i])
+            if not matrices_equal(received_mat[i], expected_mat, ):
+                output_str = matrix_mismatch_string_builder(
+                    expected_mat, received_mat[i])
+                self.fail(output_str)
+
     def test_transforms_3d_rotx_validData_returnDatatype(self):
         self.assertIsInstance(transforms.rotx(0), np.matrix)
 
@@ -385,6 +396,18 @@ class Testrotz(unittest.TestCase):
 
 # trotx |  complete
 class Testtrotx(unittest.TestCase):
+    def test_transforms_3d_trotx_validData_array(self):
+        theta = np.linspace(-pi, pi, 7)
+        xyz = np.random.rand(7, 3)
+        received_mat = transforms.trotx(theta, xyz=xyz)
+        self.assertEqual(received_mat.shape, (7, 4, 4))
+        for i in range(7):
+            expected_mat = transforms.trotx(theta[i], xyz=xyz[i])
+            if not matrices_equal(received_mat[i], expected_mat, ):
+                output_str = matrix_mismatch_string_builder(
+                    expected_mat, received_mat[i])
+                self.fail(output_str)
+
     def test_transforms_3d_trotx_validData_returnDatatype(self):
         self.assertIsInstance(transforms.trotx(0), np.matrix)
 
@@ -749,6 +772,84 @@ class Testtrotz(unittest.TestCase):
         self.assertRaises(AssertionError, transforms.trotz, 180, unit=5)
 
 
+# rpy2r, tr2rpy | complete
+class TestRpy(unittest.TestCase):
+    def setUp(self):
+        self.rpy = np.random.uniform(-3, 3, (50, 3))
+        self.rpy[:, 1] = np.random.uniform(-1.5, 1.5, 50)
+
+    def test_transforms_3d_rpy2r_validData_array(self):
+        for order in ['xyz', 'zyx', 'yxz']:
+            received_mat = transforms.rpy2r(self.rpy, order=order)
+            self.assertEqual(received_mat.shape, (50, 3, 3))
+            expected_mat = transforms.rpy2r(list(self.rpy[7]), order=order)
+            if not matrices_equal(received_mat[7], expected_mat, ):
+                output_str = matrix_mismatch_string_builder(
+                    expected_mat, received_mat[7])
+                self.fail(output_str)
+
+    def test_transforms_3d_tr2rpy_validData_roundtrip(self):
+        for order in ['xyz', 'zyx', 'yxz']:
+            received_mat = transforms.tr2rpy(transforms.rpy2tr(self.rpy, order=order), order=order)
+            if not matrices_equal(received_mat, self.rpy, ):
+                output_str = matrix_mismatch_string_builder(
+                    self.rpy, received_mat)
+                self.fail(output_str)
+
+    def test_transforms_3d_tr2rpy_validData_gimbal_lock(self):
+        self.rpy[::2, 1] = pi / 2
+        for order in ['xyz', 'zyx', 'yxz']:
+            expected_mat = transforms.rpy2r(self.rpy, order=order)
+            received_mat = transforms.rpy2r(transforms.tr2rpy(expected_mat, order=order), order=order)
+            if not matrices_equal(received_mat, expected_mat, ):
+                output_str = matrix_mismatch_string_builder(
+                    expected_mat, received_mat)
+                self.fail(output_str)
+
+
+# eul2r, tr2eul | complete
+class TestEul(unittest.TestCase):
+    def setUp(self):
+        self.eul = np.random.uniform(-3, 3, (50, 3))
+        self.eul[:, 1] = np.random.uniform(0.1, 3, 50)
+
+    def test_transforms_3d_eul2r_validData_array(self):
+        received_mat = transforms.eul2r(self.eul)
+        self.assertEqual(received_mat.shape, (50, 3, 3))
+        expected_mat = transforms.eul2r(*self.eul[3])
+        if not matrices_equal(received_mat[3], expected_mat, ):
+            output_str = matrix_mismatch_string_builder(
+                expected_mat, received_mat[3])
+            self.fail(output_str)
+
+    def test_transforms_3d_tr2eul_validData_roundtrip(self):
+        received_mat = transforms.tr2eul(transforms.eul2tr(self.eul))
+        if not matrices_equal(received_mat, self.eul, ):
+            output_str = matrix_mismatch_string_builder(
+                self.eul, received_mat)
+            self.fail(output_str)
+
+    def test_transforms_3d_eul2tr_validData_list(self):
+        eul = [[0.1, 0.2, 0.3], [0.4, 0.5, 0.6]]
+        received_mat = transforms.eul2tr(eul)
+        self.assertEqual(len(received_mat), 2)
+        for angles, rec in zip(eul, received_mat):
+            expected_mat = transforms.r2t(transforms.eul2r(*angles))
+            if not matrices_equal(rec, expected_mat, ):
+                output_str = matrix_mismatch_string_builder(
+                    expected_mat, rec)
+                self.fail(output_str)
+
+    def test_transforms_3d_tr2eul_validData_singular(self):
+        self.eul[::2, 1] = 0
+        expected_mat = transforms.eul2r(self.eul)
+        received_mat = transforms.eul2r(transforms.tr2eul(expected_mat))
+        if not matrices_equal(received_mat, expected_mat, ):
+            output_str = matrix_mismatch_string_builder(
+                expected_mat, received_mat)
+            self.fail(output_str)
+
+
 # r2t
 class TestR2t(unittest.TestCase):
     def test_transforms_r2t_validData_returnDatatype(self):  # pass
@@ -824,14 +925,112 @@ class TestOa2tr(unittest.TestCase):
 # rt2tr
 
 # trlog
+class Testtrlog(unittest.TestCase):
+    def test_transforms_trlog_validData_returnDatatype(self):
+        theta, w = transforms.trlog(transforms.rotx(0.3))
+        self.assertAlmostEqual(theta, 0.3)
+        self.assertIsInstance(w, np.matrix)
+        self.assertEqual(w.shape, (3, 1))
+
+    def test_transforms_trlog_validData_se3_twist(self):
+        twist = np.matrix([[1, 2, 3, 0, 0, 1]])
+        theta, rec_twist = transforms.trlog(transforms.trexp(twist, 0.5))
+        self.assertAlmostEqual(theta, 0.5)
+        if not matrices_equal(rec_twist, twist.T, ):
+            output_str = matrix_mismatch_string_builder(
+                twist.T, rec_twist)
+            self.fail(output_str)
+
+    def test_transforms_trlog_validData_stack_near_pi(self):
+        axis = np.random.randn(20, 3)
+        axis = axis / np.linalg.norm(axis, axis=1)[:, None]
+        angle = pi - np.logspace(-12, -1, 20)
+        theta, w = transforms.trlog(transforms.trexp_batch(axis, angle))
+        if not matrices_equal(theta, angle, ) or not matrices_equal(w, axis, ):
+            output_str = matrix_mismatch_string_builder(
+                axis, w)
+            self.fail(output_str)
+
 
 # trexp
+class Testtrexp(unittest.TestCase):
+    def test_transforms_trexp_validData_returnDatatype(self):
+        self.assertIsInstance(transforms.trexp(np.matrix([[0, 0, 1]]), 0.3), np.matrix)
+
+    def test_transforms_trexp_validData_so3(self):
+        expected_mat = transforms.rotz(0.3)
+        received_mat = transforms.trexp(np.matrix([[0, 0, 0.3]]))
+        if not matrices_equal(received_mat, expected_mat, ):
+            output_str = matrix_mismatch_string_builder(
+                expected_mat, received_mat)
+            self.fail(output_str)
+
+    def test_transforms_trexp_validData_se3_pure_translation(self):
+        expected_mat = np.eye(4)
+        expected_mat[:3, 3] = [1, 2, 3]
+        received_mat = transforms.trexp(np.array([1, 2, 3, 0, 0, 0]))
+        if not matrices_equal(received_mat, expected_mat, ):
+            output_str = matrix_mismatch_string_builder(
+                expected_mat, received_mat)
+            self.fail(output_str)
+
+    def test_transforms_trexp_validData_stack_roundtrip(self):
+        twist = np.random.randn(20, 6)
+        twist[:5, 3:] *= 1e-9
+        received_mat = transforms.trexp_batch(twist)
+        self.assertEqual(received_mat.shape, (20, 4, 4))
+        theta, rec_twist = transforms.trlog(received_mat)
+        rec_mat = transforms.trexp_batch(rec_twist, theta)
+        if not matrices_equal(rec_mat, received_mat, ):
+            output_str = matrix_mismatch_string_builder(
+                received_mat, rec_mat)
+            self.fail(output_str)
+
+    def test_transforms_trexp_validData_ndarray_matrix(self):
+        # A plain (3, 3) ndarray is one so(3) matrix, as in vex
+        w = np.array([[0.1, -0.2, 0.3], [0.4, 0.5, -0.6], [0.7, 0.8, 0.9]])
+        received_mat = transforms.trexp(np.asarray(transforms.skew(w[0])))
+        self.assertIsInstance(received_mat, np.matrix)
+        expected_mat = transforms.trexp(w[0])
+        if not matrices_equal(received_mat, expected_mat, ):
+            output_str = matrix_mismatch_string_builder(
+                expected_mat, received_mat)
+            self.fail(output_str)
+        theta, rec_w = transforms.trlog(np.asarray(received_mat))
+        if not matrices_equal(theta * rec_w, np.matrix(w[0]).T, ):
+            output_str = matrix_mismatch_string_builder(
+                np.matrix(w[0]).T, theta * rec_w)
+            self.fail(output_str)
+
+    def test_transforms_trexp_validData_batch_of_three(self):
+        # A stack of three vectors is never read as one matrix
+        w = np.array([[0.1, -0.2, 0.3], [0.4, 0.5, -0.6], [0.7, 0.8, 0.9]])
+        for stack in (transforms.trexp_batch(w), transforms.trexp_batch(transforms.skew(w))):
+            self.assertEqual(stack.shape, (3, 3, 3))
+            for i in range(3):
+                if not matrices_equal(stack[i], transforms.trexp(w[i]), ):
+                    output_str = matrix_mismatch_string_builder(
+                        transforms.trexp(w[i]), stack[i])
+                    self.fail(output_str)
+        with self.assertRaises(AttributeError):
+            transforms.trexp(np.random.randn(5, 3))
 
 # ---------------------------------------------------------------------------------------#
 #                                    2D Transforms
 # ---------------------------------------------------------------------------------------#
 # rot2
 class Testrot2(unittest.TestCase):
+    def test_transforms_2d_rot2_validData_array(self):
+        theta = [0, 30, 90, 270]
+        received_mat = transforms.rot2(theta, unit='deg')
+        self.assertEqual(received_mat.shape, (4, 2, 2))
+        for i in range(4):
+            expected_mat = transforms.rot2(theta[i], unit='deg')
+            if not matrices_equal(received_mat[i], expected_mat, ):
+                output_str = matrix_mismatch_string_builder(
+                    expected_mat, received_mat[i])
+                self.fail(output_str)
+
     def test_transforms_2d_rot2_validData_returnDatatype(self):
         self.assertIsInstance(transforms.rot2(0), np.matrix)
 
@@ -1079,6 +1278,56 @@ class Testtrexp2(unittest.TestCase):
     def test_transforms_2d_trexp2_validData_returnDatatype(self):
         self.assertIsInstance(transforms.trexp2(transforms.rot2(10)), np.matrix)
 
+    def test_transforms_2d_trexp2_validData_stack_roundtrip(self):
+        twist = np.random.uniform(-3, 3, (20, 3))
+        received_mat = transforms.trexp2_batch(twist)
+        self.assertEqual(received_mat.shape, (20, 3, 3))
+        rec_twist = transforms.trlog2(received_mat)
+        if not matrices_equal(rec_twist, twist, ):
+            output_str = matrix_mismatch_string_builder(
+                twist, rec_twist)
+            self.fail(output_str)
+
+    def test_transforms_2d_trexp2_validData_ndarray_matrix(self):
+        # A plain (3, 3) ndarray is one se(2) matrix and a (3,) ndarray one twist
+        twist = np.array([1.0, 2.0, 0.3])
+        expected_mat = transforms.trexp2(twist)
+        self.assertIsInstance(expected_mat, np.matrix)
+        received_mat = transforms.trexp2(np.asarray(transforms.skewa(twist)))
+        self.assertIsInstance(received_mat, np.matrix)
+        if not matrices_equal(received_mat, expected_mat, ):
+            output_str = matrix_mismatch_string_builder(
+                expected_mat, received_mat)
+            self.fail(output_str)
+        rec_twist = transforms.trlog2(np.asarray(received_mat))
+        if not matrices_equal(rec_twist, np.matrix(twist), ):
+            output_str = matrix_mismatch_string_builder(
+                np.matrix(twist), rec_twist)
+            self.fail(output_str)
+
+    def test_transforms_2d_trexp2_validData_angles(self):
+        for angles in (np.array([0.1, 0.2]), np.array([0.1, 0.2, 0.3])):
+            received_mat = transforms.trexp2_batch(angles)
+            self.assertEqual(received_mat.shape, (len(angles), 2, 2))
+            expected_mat = transforms.rot2(0.2)
+            if not matrices_equal(received_mat[1], expected_mat, ):
+                output_str = matrix_mismatch_string_builder(
+                    expected_mat, received_mat[1])
+                self.fail(output_str)
+        with self.assertRaises(AttributeError):
+            transforms.trexp2(np.array([0.1, 0.2]))
+
+    def test_transforms_2d_trexp2_validData_batch_of_three(self):
+        twist = np.array([[1.0, 2.0, 0.3], [-1.0, 0.5, 1.2], [0.0, 0.0, -0.4]])
+        received_mat = transforms.trexp2_batch(twist)
+        self.assertEqual(received_mat.shape, (3, 3, 3))
+        for i in range(3):
+            expected_mat = transforms.trexp2(twist[i])
+            if not matrices_equal(received_mat[i], expected_mat, ):
+                output_str = matrix_mismatch_string_builder(
+                    expected_mat, received_mat[i])
+                self.fail(output_str)
+
 
 # ---------------------------------------------------------------------------------------#
 #                                 Differential Motion
@@ -1191,6 +1440,17 @@ class TestSkew(unittest.TestCase):
                 expected_mat, received_mat)
             self.fail(output_str)
 
+    def test_transforms_dif_skew_validData_stack(self):
+        v = np.array([[1, 2, 3], [3, 2, 1]])
+        received = transforms.skew(v)
+        self.assertEqual(received.shape, (2, 3, 3))
+        for i in range(2):
+            expected_mat = transforms.skew(np.matrix(v[i]))
+            if not matrices_equal(np.asmatrix(received[i]), expected_mat, ):
+                output_str = matrix_mismatch_string_builder(
+                    expected_mat, received[i])
+                self.fail(output_str)
+
 
 # skewa
 class TestSkewa(unittest.TestCase):
@@ -1299,6 +1559,17 @@ class TestSkewa(unittest.TestCase):
                 expected_mat, received_mat)
             self.fail(output_str)
 
+    def test_transforms_dif_skewa_validData_stack(self):
+        v = np.array([[1, 0, 1, 1, 1, 1], [1, 2, 3, 4, 5, 6]])
+        received = transforms.skewa(v)
+        self.assertEqual(received.shape, (2, 4, 4))
+        for i in range(2):
+            expected_mat = transforms.skewa(np.matrix(v[i]))
+            if not matrices_equal(np.asmatrix(received[i]), expected_mat, ):
+                output_str = matrix_mismatch_string_builder(
+                    expected_mat, received[i])
+                self.fail(output_str)
+
 
 # vex
 class TestVex(unittest.TestCase):
@@ -1328,6 +1599,17 @@ class TestVex(unittest.TestCase):
                 expected_mat, received_mat)
             self.fail(output_str)
 
+    def test_transforms_dif_vex_validData_stack(self):
+        v = np.array([[1., 2., 3.], [-3., 0.5, 1.]])
+        received = transforms.vex(transforms.skew(v))
+        self.assertEqual(received.shape, (2, 3))
+        self.assertTrue(np.allclose(received, v))
+
+    def test_transforms_dif_vex_validData_stack_2x2(self):
+        received = transforms.vex(transforms.skew(np.array([[1.], [2.]])))
+        self.assertEqual(received.shape, (2, 1))
+        self.assertTrue(np.allclose(received, [[1.], [2.]]))
+
     # # check whats going on herie
     # def test_transforms_dif_vex_validData_boundaryCondition_roty_30(self):
     #     expected_mat = np.matrix([[0.], [-0.98803162], [0.]])
@@ -1339,6 +1621,59 @@ class TestVex(unittest.TestCase):
     #         self.fail(output_str)
 
 
+# angvec2r
+class TestAngvec(unittest.TestCase):
+    def test_transforms_angvec2r_validData_single(self):
+        expected_mat = transforms.rotz(0.3)
+        received_mat = transforms.angvec2r(0.3, np.matrix([[0, 0, 2]]))
+
+        if not matrices_equal(received_mat, expected_mat, ):
+            output_str = matrix_mismatch_string_builder(
+                expected_mat, received_mat)
+            self.fail(output_str)
+
+    def test_transforms_angvec2r_validData_single_list_or_ndarray(self):
+        expected_mat = transforms.rotz(0.3)
+        for v in ([0, 0, 2], np.array([0, 0, 2])):
+            received_mat = transforms.angvec2r(0.3, v)
+            self.assertIsInstance(received_mat, np.matrix)
+            if not matrices_equal(received_mat, expected_mat, ):
+                output_str = matrix_mismatch_string_builder(
+                    expected_mat, received_mat)
+                self.fail(output_str)
+        self.assertIsInstance(transforms.angvec2tr(np.float64(0.3), [0, 0, 1]), np.matrix)
+
+    def test_transforms_angvec2r_validData_stack(self):
+        theta = np.array([0.3, -1.2, 2.5])
+        v = np.array([[1, 0, 0], [0, 1, 0], [0, 0, 1]])
+        received = transforms.angvec2r(theta, v)
+        self.assertEqual(received.shape, (3, 3, 3))
+        self.assertTrue(np.allclose(received[0], transforms.rotx(0.3)))
+        self.assertTrue(np.allclose(received[1], transforms.roty(-1.2)))
+        self.assertTrue(np.allclose(received[2], transforms.rotz(2.5)))
+
+    def test_transforms_angvec2tr_validData_stack(self):
+        received = transforms.angvec2tr(np.array([0.3, 0.4]), np.array([1, 0, 0]))
+        self.assertEqual(received.shape, (2, 4, 4))
+        self.assertTrue(np.allclose(received[1], transforms.trotx(0.4)))
+
+    def test_transforms_tr2angvec_validData_single(self):
+        theta, v = transforms.tr2angvec(transforms.troty(30, unit='deg'), unit='deg')
+        self.assertAlmostEqual(theta, 30)
+        self.assertIsInstance(v, np.matrix)
+        self.assertTrue(np.allclose(v, [[0, 1, 0]]))
+
+    def test_transforms_tr2angvec_validData_stack_roundtrip(self):
+        theta = np.array([0.1, 1.5, 3.0])
+        v = np.array([[1., 2., 3.], [0., -1., 1.], [2., 0., 0.]])
+        received_theta, received_v = transforms.tr2angvec(transforms.angvec2r(theta, v))
+        self.assertTrue(np.allclose(received_theta, theta))
+        self.assertTrue(np.allclose(received_v, v / np.linalg.norm(v, axis=1)[:, None]))
+
+    def test_transforms_tr2angvec_invalidData_not_orthonormal(self):
+        self.assertRaises(TypeError, transforms.tr2angvec, np.matrix(np.eye(3) * 2))
+
+
 # ---------------------------------------------------------------------------------------#
 #                                      Utility
 # ---------------------------------------------------------------------------------------#
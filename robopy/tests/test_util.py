@@ -0,0 +1,117 @@
+"""
+Test module for trajectory utilities: ctraj, lspb, jtraj and mstraj
+"""
+import unittest
+import numpy as np
+from .test_common import matrix_mismatch_string_builder
+from .test_common import matrices_equal
+from ..base import util
+from ..base import pose
+from ..base import transforms as tr
+
+
+class TestCtraj(unittest.TestCase):
+    def setUp(self):
+        self.T0 = tr.trotx(0.3) * tr.transl(1, 2, 3)
+        self.T1 = tr.troty(1) * tr.trotz(2.5) * tr.transl(0, 0, 1)
+
+    def test_util_ctraj_endpoints(self):
+        traj = util.ctraj(self.T0, self.T1, 20)
+        self.assertIsInstance(traj, pose.SE3)
+        self.assertEqual(traj.array.shape, (20, 4, 4))
+        for exp_mat, rec_mat in ((self.T0, traj.data[0]), (self.T1, traj.data[-1])):
+            if not matrices_equal(rec_mat, exp_mat, ):
+                output_str = matrix_mismatch_string_builder(rec_mat, exp_mat)
+                self.fail(output_str)
+
+    def test_util_ctraj_many_to_one(self):
+        T0 = pose.SE3.Rx([0.1, 0.2, 0.3])
+        traj = util.ctraj(T0.array, self.T1, 10)
+        self.assertEqual(len(traj), 3)
+        for i in range(3):
+            self.assertTrue(np.allclose(traj[i].array, util.ctraj(T0.data[i], self.T1, 10).array))
+
+    def test_util_ctraj_derivs(self):
+        traj, vel, acc = util.ctraj(self.T0, self.T1, 1000, derivs=True)
+        self.assertEqual(vel.shape, (1000, 6))
+        self.assertEqual(acc.shape, (1000, 6))
+        # integrating the velocity recovers the translation
+        transl = self.T0[:3, 3].T + np.cumsum((vel[1:, :3] + vel[:-1, :3]) / 2, axis=0)
+        self.assertTrue(np.allclose(transl, traj.array[1:, :3, 3], atol=1e-3))
+        # angular velocity matches successive rotations
+        rot = traj.array[:, :3, :3]
+        rel = np.einsum('nij,nkj->nik', rot[1:], rot[:-1])
+        omega = tr.vex(0.5 * (rel - rel.transpose(0, 2, 1)))
+        self.assertTrue(np.allclose(omega, (vel[1:, 3:] + vel[:-1, 3:]) / 2, atol=1e-3))
+
+
+class TestLspb(unittest.TestCase):
+    def test_util_lspb_scalar(self):
+        s, sd, sdd = util.lspb(0, 1, 50)
+        self.assertEqual(s.shape, (50,))
+        self.assertAlmostEqual(s[0], 0)
+        self.assertAlmostEqual(s[-1], 1)
+        self.assertTrue(np.allclose(np.gradient(s)[2:-2], sd[2:-2], atol=1e-3))
+
+    def test_util_lspb_joints(self):
+        q0 = np.zeros(3)
+        q1 = np.array([1, 0, -2])
+        t = np.linspace(0, 2, 201)
+        s, sd, sdd = util.lspb(q0, q1, t)
+        self.assertEqual(s.shape, (201, 3))
+        for j in range(3):
+            rec = util.lspb(q0[j], q1[j], t)
+            self.assertTrue(np.allclose(s[:, j], rec[0]))
+            self.assertTrue(np.allclose(sd[:, j], rec[1]))
+        self.assertTrue(np.allclose(s[-1], q1))
+        self.assertTrue(np.allclose(s[:, 1], 0))
+
+    def test_util_lspb_velocity_check(self):
+        self.assertRaises(ValueError, util.lspb, 0, 1, 10, 0.01)
+        self.assertRaises(ValueError, util.lspb, 0, 1, 10, 1.0)
+
+
+class TestJtraj(unittest.TestCase):
+    def test_util_jtraj_boundary_conditions(self):
+        q0 = np.array([0, 1, 2])
+        q1 = np.array([1, -1, 2])
+        t = np.linspace(0, 3, 301)
+        q, qd, qdd = util.jtraj(q0, q1, t, qd1=[0.1, 0, 0])
+        self.assertEqual(q.shape, (301, 3))
+        self.assertTrue(np.allclose(q[[0, -1]], [q0, q1]))
+        self.assertTrue(np.allclose(qd[[0, -1]], [[0, 0, 0], [0.1, 0, 0]]))
+        self.assertTrue(np.allclose(qdd[[0, -1]], 0))
+        self.assertTrue(np.allclose(np.gradient(q, t, axis=0)[1:-1], qd[1:-1], atol=1e-3))
+
+
+class TestMstraj(unittest.TestCase):
+    def setUp(self):
+        self.via = np.array([[0, 0], [1, 2], [1, 0], [3, 1]])
+
+    def test_util_mstraj_endpoints_and_speed(self):
+        q, qd, qdd = util.mstraj(self.via, 0.01, 0.4, qdmax=[1, 2], derivs=True)
+        self.assertEqual(q.shape[1], 2)
+        self.assertTrue(np.allclose(q[[0, -1]], self.via[[0, -1]]))
+        self.assertTrue(np.all(np.abs(qd) <= np.array([1, 2]) + 1e-9))
+        self.assertTrue(np.allclose(np.gradient(q, 0.01, axis=0)[1:-1], qd[1:-1], atol=0.05))
+
+    def test_util_mstraj_tsegment(self):
+        q = util.mstraj([0, 1, 0], 0.1, 0.2, tsegment=[1, 1])
+        self.assertEqual(q.shape, (23, 1))
+        self.assertTrue(np.allclose(q[::-1], q))
+
+    def test_util_mstraj_no_blend(self):
+        q, qd, qdd = util.mstraj([[0], [1], [0]], 0.1, 0, qdmax=1, derivs=True)
+        self.assertFalse(np.any(np.isnan(q)) or np.any(np.isnan(qd)))
+        self.assertTrue(np.allclose(q[:, 0], np.r_[np.linspace(0, 1, 11), np.linspace(0.9, 0, 10)]))
+        self.assertTrue(np.allclose(qdd, 0))
+
+    def test_util_mstraj_chunks(self):
+        full = util.mstraj(self.via, 0.01, 0.4, qdmax=[1, 2])
+        chunks = list(util.mstraj_chunks(self.via, 0.01, 0.4, qdmax=[1, 2], chunk=37))
+        self.assertTrue(all(each.shape[0] <= 37 for each in chunks))
+        self.assertTrue(np.allclose(np.concatenate(chunks), full))
+
+
+if __name__ == '__main__':
+    unittest.main()
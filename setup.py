@@ -93,7 +93,13 @@ setup(
     # If there are data files included in your packages that need to be
     # installed, specify them here.  If using Python 2.6 or less, then these
     # have to be included in MANIFEST.in as well.
-    include_package_data=True, install_requires=['imageio', 'numpy', 'scipy']
+    include_package_data=True, install_requires=['numpy'],
+    # Rendering and the optimisation based inverse kinematics are optional. The kinematics core
+    # runs on numpy alone. Install everything with: pip install robopy[graphics,optimize]
+    extras_require={
+        'graphics': ['vtk', 'imageio'],
+        'optimize': ['scipy'],
+    },
     # packages=find_packages('robopy'),
     # package_dir={'':'robopy'},
     # package_data={